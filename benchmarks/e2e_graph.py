@@ -0,0 +1,423 @@
+"""Offline end-to-end benchmark of the conversation graph.
+
+Drives concurrent conversations through ``graph.ainvoke`` with deterministic stand-ins for
+Groq, Together and ElevenLabs, a hashing embedder and an in-memory Qdrant, so it needs no
+network or API keys and runs in CI. Each stand-in sleeps for a lognormal latency seeded by its
+input, so two runs with the same arguments see the same provider latencies and routing.
+
+Reports turn latency percentiles, turns per second, per-node and per-provider span
+percentiles (from the instrumentation), token counts and memory growth.
+
+Usage:
+    uv run python benchmarks/e2e_graph.py
+    uv run python benchmarks/e2e_graph.py --conversations 32 --turns 10 --llm-latency-ms 400
+    uv run python benchmarks/e2e_graph.py --json e2e.json --max-p95-ms 2500  # CI gate
+
+Rate limits of the provider gateways are raised unless --respect-rate-limits is given, so the
+numbers show the graph and not the configured throttling.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import RunnableLambda
+
+from ai_companion.settings import settings
+
+NAMES = ["Ada", "Tunde", "Amara", "Kofi", "Zainab", "Chidi", "Ngozi", "Femi"]
+CITIES = ["Lagos", "Abuja", "Accra", "Nairobi", "London", "Ibadan"]
+HOBBIES = ["football", "afrobeats", "chess", "cooking", "painting", "running"]
+SMALL_TALK = ["How far?", "Wetin dey happen today?", "lol", "ok", "Tell me a joke abeg"]
+
+
+class Latency:
+    """Lognormal latency around a median, seeded by the call input for repeatable runs."""
+
+    def __init__(self, median_ms: float, sigma: float, seed: int):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.seed = seed
+
+    def seconds(self, key: str) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        rng = random.Random(f"{self.seed}:{key}")
+        return self.median_ms * rng.lognormvariate(0.0, self.sigma) / 1000
+
+    async def sleep(self, key: str) -> None:
+        await asyncio.sleep(self.seconds(key))
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, PromptValue):
+        value = value.to_messages()
+    if isinstance(value, list):
+        return str(value[-1].content) if value else ""
+    if isinstance(value, BaseMessage):
+        return str(value.content)
+    return str(value)
+
+
+def _structured_response(schema: Any, text: str) -> Any:
+    """Answer router and memory prompts the way the real model mostly would."""
+    from ai_companion.graph.utils.chains import RouterResponse
+    from ai_companion.modules.memory.long_term.memory_manager import (
+        MemoryAnalysis,
+        MemoryBatchAnalysis,
+    )
+
+    if schema is RouterResponse:
+        lowered = text.lower()
+        if "picture" in lowered or "photo" in lowered:
+            return RouterResponse(response_type="image")
+        if "voice" in lowered:
+            return RouterResponse(response_type="audio")
+        return RouterResponse(response_type="conversation")
+    if schema is MemoryAnalysis:
+        message = text.rsplit("Message:", 1)[-1].split("Output:", 1)[0].strip()
+        is_fact = message.startswith("My ")
+        return MemoryAnalysis(is_important=is_fact, formatted_memory=message if is_fact else None)
+    if schema is MemoryBatchAnalysis:
+        lines = [line.split(". ", 1)[-1].strip('"') for line in text.splitlines()]
+        return MemoryBatchAnalysis(memories=[line for line in lines if line.startswith("My ")])
+    return schema.model_construct()
+
+
+class FakeChatGroq(BaseChatModel):
+    """Stand-in for ChatGroq with the constructor arguments the app uses."""
+
+    model: str = "fake"
+    api_key: Any = None
+    temperature: float = 0.7
+    max_retries: int = 0
+    latency: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency.seconds(_text(messages)))
+        return self._reply(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await self.latency.sleep(_text(messages))
+        return self._reply(messages)
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        """The canned reply to the last message, with token usage like Groq reports it."""
+        reply = f"Omo, I hear you! {_text(messages)[:60]}"
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        message = AIMessage(
+            content=reply,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": len(reply.split()),
+                "total_tokens": prompt_tokens + len(reply.split()),
+            },
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=message)], llm_output={"model_name": self.model}
+        )
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Any:
+        async def respond(value: Any) -> Any:
+            text = _text(value)
+            await self.latency.sleep(text)
+            return _structured_response(schema, text)
+
+        return RunnableLambda(respond)
+
+
+class FakeTextToImage:
+    def __init__(self, latency: Latency):
+        self.latency = latency
+
+    async def create_scenario(self, chat_history: List[BaseMessage]) -> Any:
+        text = _text(chat_history)
+        await self.latency.sleep(f"scenario:{text}")
+        return SimpleNamespace(narrative="A sunny day", image_prompt=f"Photo of {text[:40]}")
+
+    async def generate_image(self, prompt: str, output_path: str = "") -> bytes:
+        await self.latency.sleep(f"image:{prompt}")
+        return b""
+
+
+class FakeTextToSpeech:
+    def __init__(self, latency: Latency):
+        self.latency = latency
+
+    async def synthesize(self, text: str) -> bytes:
+        await self.latency.sleep(f"tts:{text}")
+        return b"\0" * 1024
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embeddings, so texts sharing words land close together."""
+
+    def __init__(self, dimension: int = 384, latency: Optional[Latency] = None):
+        self.dimension = dimension
+        self.latency = latency
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: Any, normalize_embeddings: bool = False, **kwargs: Any) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if self.latency is not None:
+            time.sleep(self.latency.seconds("|".join(batch)))
+        vectors = np.zeros((len(batch), self.dimension), dtype=np.float32)
+        for row, text in enumerate(batch):
+            for word in text.lower().split():
+                digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+                vectors[row, int.from_bytes(digest, "little") % self.dimension] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1.0, norms)
+        return vectors[0] if single else vectors
+
+
+def user_message(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.35:
+        return (
+            f"My name is {rng.choice(NAMES)} and I live in {rng.choice(CITIES)}, "
+            f"I really like {rng.choice(HOBBIES)}"
+        )
+    if roll < 0.45:
+        return f"Send me a picture of you in {rng.choice(CITIES)}"
+    if roll < 0.5:
+        return "Abeg send me a voice note"
+    if roll < 0.75:
+        return rng.choice(SMALL_TALK)
+    return f"What do you think about {rng.choice(HOBBIES)} in {rng.choice(CITIES)}?"
+
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentiles(seconds: List[float]) -> Dict[str, float]:
+    if not seconds:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99])
+    return {"p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2)}
+
+
+def configure(args: argparse.Namespace) -> None:
+    """Point settings and provider factories at the stand-ins, before the graph is imported."""
+    settings.INSTRUMENTATION_ENABLED = True
+    settings.INSTRUMENTATION_TRACING_ENABLED = False
+    settings.INSTRUMENTATION_PROMETHEUS_PORT = None
+    settings.WARMUP_ON_STARTUP = False
+    settings.VECTOR_BACKEND = "qdrant"
+    settings.SPECULATIVE_ROUTING_ENABLED = args.speculative_routing
+    if not args.respect_rate_limits:
+        settings.PROVIDER_RATE_LIMIT_PER_SECOND = {
+            provider: 1_000_000.0 for provider in settings.PROVIDER_RATE_LIMIT_PER_SECOND
+        }
+        settings.PROVIDER_MAX_CONCURRENCY = {
+            provider: 1024 for provider in settings.PROVIDER_MAX_CONCURRENCY
+        }
+    # The in-memory Qdrant needs no credentials, but VectorStore checks they are set
+    os.environ.setdefault("QDRANT_URL", "http://localhost:6333")
+    os.environ.setdefault("QDRANT_API_KEY", "offline")
+
+    import langchain_groq
+
+    llm_latency = Latency(args.llm_latency_ms, args.latency_sigma, args.seed)
+
+    class BenchmarkChatGroq(FakeChatGroq):
+        latency: Any = llm_latency
+
+    # Every ChatGroq is created through a lazy import, so they all pick up the stand-in
+    langchain_groq.ChatGroq = BenchmarkChatGroq
+
+    from ai_companion.graph import nodes
+
+    text_to_image = FakeTextToImage(Latency(args.image_latency_ms, args.latency_sigma, args.seed))
+    text_to_speech = FakeTextToSpeech(Latency(args.tts_latency_ms, args.latency_sigma, args.seed))
+    nodes.get_text_to_image_module = lambda: text_to_image
+    nodes.get_text_to_speech_module = lambda: text_to_speech
+
+    from ai_companion.modules.memory.long_term.qdrant_backend import QdrantBackend, QdrantSchema
+    from ai_companion.modules.memory.long_term.vector_store import get_vector_store
+
+    store = get_vector_store()
+    if args.real_embeddings:
+        store._load_model()
+    else:
+        store._model = HashingEmbedder(
+            latency=Latency(args.embedding_latency_ms, args.latency_sigma, args.seed)
+        )
+    store._backend = QdrantBackend(
+        store.COLLECTION_NAME, location=":memory:", schema=QdrantSchema.from_settings()
+    )
+
+
+async def run_conversation(graph: Any, index: int, turns: int, seed: int) -> List[float]:
+    rng = random.Random(f"{seed}:conversation:{index}")
+    config = {"configurable": {"thread_id": f"conv-{index}"}}
+    latencies = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        await graph.ainvoke({"messages": [HumanMessage(content=user_message(rng))]}, config)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from ai_companion.core.instrumentation import get_instrumentation
+    from ai_companion.graph.graph import create_workflow
+    from ai_companion.graph.utils.speculation import get_speculation_metrics
+    from ai_companion.modules.memory.long_term.vector_store import get_vector_store
+
+    graph = create_workflow().compile(checkpointer=MemorySaver())
+    rss_start = rss_mb()
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_conversation(graph, i, args.turns, args.seed) for i in range(args.conversations))
+    )
+    wall_seconds = time.perf_counter() - started
+
+    turn_seconds = [seconds for conversation in results for seconds in conversation]
+    snapshot = get_instrumentation().snapshot()
+    backend = get_vector_store()._backend
+    return {
+        "conversations": args.conversations,
+        "turns": len(turn_seconds),
+        "wall_seconds": round(wall_seconds, 3),
+        "turns_per_second": round(len(turn_seconds) / wall_seconds, 2),
+        "turn": percentiles(turn_seconds),
+        "spans": {
+            name: {key: round(value, 2) for key, value in stats.items()}
+            for name, stats in sorted(snapshot["spans"].items())
+        },
+        "tokens": snapshot["tokens"],
+        "cache_hit_rates": snapshot["cache_hit_rates"],
+        "speculation": asdict(get_speculation_metrics()),
+        "memory": {
+            "rss_start_mb": round(rss_start, 1),
+            "rss_end_mb": round(rss_mb(), 1),
+            "rss_growth_mb": round(rss_mb() - rss_start, 1),
+            "stored_memories": backend.count()
+            if backend is not None and backend.collection_exists()
+            else 0,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    turn = report["turn"]
+    print(
+        f"{report['turns']} turns in {report['conversations']} conversations, "
+        f"{report['wall_seconds']}s, {report['turns_per_second']} turns/s"
+    )
+    print(f"turn latency p50 {turn['p50_ms']}ms  p95 {turn['p95_ms']}ms  p99 {turn['p99_ms']}ms")
+    print()
+    print(f"{'span':<40}{'count':>8}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}{'errors':>8}")
+    for name, stats in report["spans"].items():
+        print(
+            f"{name:<40}{stats['count']:>8.0f}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+            f"{stats['p99_ms']:>10}{stats['errors']:>8.0f}"
+        )
+    print()
+    memory = report["memory"]
+    print(
+        f"rss {memory['rss_start_mb']} -> {memory['rss_end_mb']} MB "
+        f"(+{memory['rss_growth_mb']} MB), {memory['stored_memories']} memories stored"
+    )
+    speculation = report["speculation"]
+    if speculation["started"]:
+        print(
+            f"speculative replies: {speculation['used']} used, {speculation['cancelled']} "
+            f"cancelled, {speculation['failed']} failed of {speculation['started']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=5, help="Turns per conversation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=150.0, help="Median LLM latency")
+    parser.add_argument("--image-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--tts-latency-ms", type=float, default=400.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=5.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="Lognormal spread")
+    parser.add_argument(
+        "--real-embeddings",
+        action="store_true",
+        help="Use the configured embedding model instead of the hashing embedder",
+    )
+    parser.add_argument("--respect-rate-limits", action="store_true")
+    parser.add_argument(
+        "--speculative-routing", action="store_true", help="Set SPECULATIVE_ROUTING_ENABLED"
+    )
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument(
+        "--max-p95-ms", type=float, help="Exit with status 1 if the turn p95 is above this"
+    )
+    args = parser.parse_args()
+
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    # The image node writes into the working directory
+    os.chdir(tempfile.mkdtemp(prefix="sabi-mate-e2e-"))
+    configure(args)
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_p95_ms is not None and report["turn"]["p95_ms"] > args.max_p95_ms:
+        print(f"Turn p95 {report['turn']['p95_ms']}ms is above {args.max_p95_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Recall vs latency benchmark of the memory embedding engines.
+
+Encodes a synthetic corpus of memory-like sentences with every engine and compares
+nearest-neighbour results against the fp32 PyTorch model, which is what the vector store used
+before EMBEDDING_ENGINE existed.
+
+Usage:
+    uv run python benchmarks/embedding_engines.py
+    uv run python benchmarks/embedding_engines.py --engines torch onnx-int8 --dimensions 384 256
+    uv run python benchmarks/embedding_engines.py --json results.json
+
+The ONNX engines need ONNX Runtime: pip install 'sentence-transformers[onnx]'.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ai_companion.modules.memory.long_term.embeddings import (
+    EMBEDDING_ENGINES,
+    load_embedding_model,
+)
+from ai_companion.modules.memory.long_term.vector_store import VectorStore
+
+SUBJECTS = ["My name", "My sister", "My best friend", "My boss", "My brother", "My cousin"]
+VERBS = ["lives in", "works at", "studies in", "just moved to", "grew up in", "travels to"]
+OBJECTS = [
+    "Lagos",
+    "Berlin",
+    "Nairobi",
+    "a hospital",
+    "a bank",
+    "a startup",
+    "the university",
+    "Accra",
+    "London",
+    "a school",
+]
+HOBBIES = ["football", "jollof rice", "afrobeats", "chess", "running", "painting", "cooking"]
+
+
+def synthetic_corpus(size: int, seed: int = 0) -> List[str]:
+    """Generate memory-like sentences, e.g. "My sister works at a bank and loves chess"."""
+    rng = random.Random(seed)
+    combos = list(itertools.product(SUBJECTS, VERBS, OBJECTS, HOBBIES))
+    rng.shuffle(combos)
+    return [
+        f"{subject} {verb} {obj} and loves {hobby}"
+        for subject, verb, obj, hobby in itertools.islice(itertools.cycle(combos), size)
+    ]
+
+
+def synthetic_queries(size: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"Who {rng.choice(VERBS)} {rng.choice(OBJECTS)}? Anyone into {rng.choice(HOBBIES)}?"
+        for _ in range(size)
+    ]
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(expected: np.ndarray, actual: np.ndarray) -> float:
+    hits = [len(set(e) & set(a)) / len(e) for e, a in zip(expected, actual)]
+    return float(np.mean(hits))
+
+
+def run(
+    engines: List[str],
+    dimensions: List[Optional[int]],
+    corpus_size: int,
+    query_count: int,
+    k: int,
+    model_name: str,
+) -> List[Dict]:
+    corpus = synthetic_corpus(corpus_size)
+    queries = synthetic_queries(query_count)
+
+    baseline_model = load_embedding_model(model_name, engine="torch", dimensions=None)
+    baseline_corpus = baseline_model.encode(corpus, normalize_embeddings=True)
+    baseline_queries = baseline_model.encode(queries, normalize_embeddings=True)
+    expected = top_k(baseline_corpus, baseline_queries, k)
+    del baseline_model
+
+    results = []
+    for engine, dimension in itertools.product(engines, dimensions):
+        start = time.perf_counter()
+        model = load_embedding_model(model_name, engine=engine, dimensions=dimension)
+        load_seconds = time.perf_counter() - start
+
+        # Warm up before timing, the first call pays for graph and kernel initialization
+        model.encode(queries[:8], normalize_embeddings=True)
+
+        start = time.perf_counter()
+        corpus_embeddings = model.encode(corpus, normalize_embeddings=True)
+        batch_seconds = time.perf_counter() - start
+
+        latencies = []
+        query_embeddings = []
+        for query in queries:
+            start = time.perf_counter()
+            query_embeddings.append(model.encode(query, normalize_embeddings=True))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        actual = top_k(corpus_embeddings, np.stack(query_embeddings), k)
+        latencies.sort()
+        results.append(
+            {
+                "engine": engine,
+                "dimensions": int(corpus_embeddings.shape[1]),
+                "load_seconds": round(load_seconds, 3),
+                "batch_sentences_per_second": round(corpus_size / batch_seconds, 1),
+                "query_p50_ms": round(statistics.median(latencies), 3),
+                "query_p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+                f"recall_at_{k}": round(recall_at_k(expected, actual), 4),
+            }
+        )
+        del model
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("--engines", nargs="+", default=list(EMBEDDING_ENGINES))
+    parser.add_argument(
+        "--dimensions",
+        nargs="+",
+        type=int,
+        default=[0],
+        help="Truncated dimensions to test, 0 for the full model dimension",
+    )
+    parser.add_argument("--corpus-size", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--model", default=VectorStore.EMBEDDING_MODEL)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(
+        engines=args.engines,
+        dimensions=[d or None for d in args.dimensions],
+        corpus_size=args.corpus_size,
+        query_count=args.queries,
+        k=args.k,
+        model_name=args.model,
+    )
+
+    columns = list(results[0])
+    print("  ".join(f"{column:>26}" for column in columns))
+    for row in results:
+        print("  ".join(f"{row[column]!s:>26}" for column in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
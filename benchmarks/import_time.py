@@ -0,0 +1,104 @@
+"""Import time and memory of the application entry points.
+
+Each entry point is imported in a fresh interpreter several times, reporting the median wall
+time, the peak RSS and the slowest modules by cumulative import time (python -X importtime).
+Run it before and after changes to the import graph to catch startup regressions:
+
+    uv run python benchmarks/import_time.py
+    uv run python benchmarks/import_time.py --repeat 10 --json import_time.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ENTRY_POINTS = [
+    "ai_companion.settings",
+    "ai_companion.graph.graph",
+    "ai_companion.lifecycle",
+    "ai_companion.modules.memory.long_term.vector_store",
+    "ai_companion.modules.speech",
+    "ai_companion.graph.utils.helpers",
+]
+
+_MEASURE = """
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, rss_kb, len(sys.modules))
+"""
+
+
+def measure(module: str, repeat: int) -> Dict:
+    seconds: List[float] = []
+    rss_kb: List[int] = []
+    modules = 0
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _MEASURE.format(module=module)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        seconds.append(float(output[0]))
+        rss_kb.append(int(output[1]))
+        modules = int(output[2])
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(seconds) * 1000, 1),
+        "min_ms": round(min(seconds) * 1000, 1),
+        "peak_rss_mb": round(max(rss_kb) / 1024, 1),
+        "modules_loaded": modules,
+    }
+
+
+def slowest_imports(module: str, top: int) -> List[Dict]:
+    """The modules with the highest cumulative import time, from python -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines()[1:]:
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3:
+            rows.append({"module": parts[2].strip(), "cumulative_ms": int(parts[1]) / 1000})
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[1 : top + 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports shown per module")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        result["slowest_imports"] = slowest_imports(module, args.top)
+        results.append(result)
+
+        print(
+            f"{module:<55} {result['median_ms']:>8.1f} ms  {result['peak_rss_mb']:>7.1f} MB  "
+            f"{result['modules_loaded']:>5} modules"
+        )
+        for row in result["slowest_imports"]:
+            print(f"    {row['module']:<51} {row['cumulative_ms']:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Microbenchmarks of the long-term memory hot paths.
+
+Times the VectorStore and MemoryManager calls made on every turn against synthetic
+collections of increasing size in an in-memory Qdrant (or the local NumPy backend):
+
+- encode latency at several batch sizes
+- search_memories_async and search_memories_batch_async
+- find_similar_memory_async, the dedup check run before every store
+- store_memory_async and the batched store_memories_async
+- format_memories_for_prompt
+
+Each case reports min, mean, median, p95, standard deviation and operations per second over
+its rounds, in the spirit of pytest-benchmark, and --json writes a report that can be compared
+across commits with --compare.
+
+Usage:
+    uv run python benchmarks/memory_paths.py
+    uv run python benchmarks/memory_paths.py --sizes 1000 10000 100000 1000000 --json after.json
+    uv run python benchmarks/memory_paths.py --json after.json --compare before.json
+    uv run python benchmarks/memory_paths.py --backend local --real-embeddings
+
+The hashing embedder is used unless --real-embeddings is given, so the encode numbers only
+mean something with the real model. Filling a 1M point in-memory Qdrant takes several
+minutes and a few GB of RAM.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from e2e_graph import HashingEmbedder
+
+from ai_companion.settings import settings
+
+FILL_BATCH_SIZE = 2048
+TOPICS = ["work", "family", "food", "music", "travel", "health", "school", "football"]
+
+
+def _stats(seconds: List[float]) -> Dict[str, float]:
+    ordered = sorted(seconds)
+    mean = statistics.fmean(ordered)
+    return {
+        "rounds": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "mean_ms": round(mean * 1000, 4),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 4),
+        "stddev_ms": round(statistics.pstdev(ordered) * 1000, 4),
+        "ops_per_second": round(1 / mean, 1) if mean else 0.0,
+    }
+
+
+async def bench(call: Callable[[int], Any], rounds: int, warmup: int = 2) -> Dict[str, float]:
+    """Time ``call(round_number)``, awaiting it if needed, after a few warm-up rounds."""
+
+    async def once(i: int) -> None:
+        result = call(i)
+        if inspect.isawaitable(result):
+            await result
+
+    for i in range(warmup):
+        await once(-1 - i)
+    seconds = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        await once(i)
+        seconds.append(time.perf_counter() - start)
+    return _stats(seconds)
+
+
+def _query(i: int) -> str:
+    return f"What did I tell you about my {TOPICS[i % len(TOPICS)]} last week?"
+
+
+def _memory(i: int) -> str:
+    return f"User mentioned {TOPICS[i % len(TOPICS)]} plan number {i} for the weekend"
+
+
+def fill(backend: Any, size: int, dimension: int, seed: int) -> float:
+    """Insert ``size`` random unit vectors with memory-like payloads, returning the seconds."""
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    backend.create_collection(dimension)
+    for offset in range(0, size, FILL_BATCH_SIZE):
+        count = min(FILL_BATCH_SIZE, size - offset)
+        vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        ids = [str(uuid.UUID(int=offset + i + 1)) for i in range(count)]
+        payloads = [
+            {"text": f"Synthetic memory {offset + i}", "id": point_id, "timestamp": "2025-01-01"}
+            for i, point_id in enumerate(ids)
+        ]
+        backend.upsert(ids, vectors, payloads)
+    return time.perf_counter() - start
+
+
+def create_backend(kind: str, collection_name: str) -> Any:
+    if kind == "local":
+        from ai_companion.modules.memory.long_term.backends import LocalBackend
+
+        return LocalBackend(collection_name)
+
+    from ai_companion.modules.memory.long_term.qdrant_backend import QdrantBackend, QdrantSchema
+
+    return QdrantBackend(collection_name, location=":memory:", schema=QdrantSchema.from_settings())
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from ai_companion.modules.memory.long_term.memory_manager import MemoryManager
+    from ai_companion.modules.memory.long_term.vector_store import get_vector_store
+
+    store = get_vector_store()
+    if args.real_embeddings:
+        store._load_model()
+    else:
+        store._model = HashingEmbedder()
+    model = store._model
+    dimension = store._embedding_dimension(model)
+    rounds = args.rounds
+
+    report: Dict[str, Any] = {
+        "backend": args.backend,
+        "embedder": "model" if args.real_embeddings else "hashing",
+        "dimension": dimension,
+        "encode": {},
+        "format_memories_for_prompt": None,
+        "collections": {},
+    }
+
+    for batch_size in args.encode_batch_sizes:
+        texts = [_memory(i) for i in range(batch_size)]
+        report["encode"][str(batch_size)] = await bench(
+            lambda i: store._encode_async(texts, normalize_embeddings=True), rounds
+        )
+
+    memories = [_memory(i) for i in range(settings.MEMORY_TOP_K)]
+    report["format_memories_for_prompt"] = await bench(
+        lambda i: MemoryManager.format_memories_for_prompt(memories), rounds * 10
+    )
+
+    for size in args.sizes:
+        backend = create_backend(args.backend, f"bench_{size}")
+        fill_seconds = fill(backend, size, dimension, args.seed)
+        store._backend = backend
+        print(f"filled {size} points in {fill_seconds:.1f}s", file=sys.stderr)
+
+        queries = [_query(i) for i in range(settings.MEMORY_QUERY_MAX_TURNS)]
+        results = {
+            "fill_seconds": round(fill_seconds, 3),
+            "search_memories_async": await bench(
+                lambda i: store.search_memories_async(_query(i), k=settings.MEMORY_TOP_K), rounds
+            ),
+            "search_memories_async_rerank_pool": await bench(
+                lambda i: store.search_memories_async(
+                    _query(i), k=settings.MEMORY_CANDIDATE_POOL, with_vectors=True
+                ),
+                rounds,
+            ),
+            "search_memories_batch_async": await bench(
+                lambda i: store.search_memories_batch_async(queries, k=settings.MEMORY_TOP_K),
+                rounds,
+            ),
+            "find_similar_memory_async": await bench(
+                lambda i: store.find_similar_memory_async(_memory(i)), rounds
+            ),
+            # Negative rounds are warm-ups, keep their texts apart from the timed ones
+            "store_memory_async": await bench(
+                lambda i: store.store_memory_async(f"{size}:{i} {_memory(i)}", {}), rounds
+            ),
+            "store_memories_async_batch_8": await bench(
+                lambda i: store.store_memories_async(
+                    [f"{size}:{i}:{j} {_memory(i * 8 + j)}" for j in range(8)]
+                ),
+                rounds,
+            ),
+        }
+        report["collections"][str(size)] = results
+        store._backend = None
+        del backend
+
+    return report
+
+
+def _cases(report: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Flatten a report into case name -> stats."""
+    cases = {f"encode[batch={size}]": stats for size, stats in report["encode"].items()}
+    cases["format_memories_for_prompt"] = report["format_memories_for_prompt"]
+    for size, results in report["collections"].items():
+        for name, stats in results.items():
+            if isinstance(stats, dict):
+                cases[f"{name}[n={size}]"] = stats
+    return cases
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    before = _cases(baseline) if baseline else {}
+    header = f"{'case':<50}{'median_ms':>12}{'p95_ms':>12}{'ops/s':>12}"
+    print(header + (f"{'vs base':>10}" if before else ""))
+    for name, stats in _cases(report).items():
+        line = (
+            f"{name:<50}{stats['median_ms']:>12}{stats['p95_ms']:>12}{stats['ops_per_second']:>12}"
+        )
+        if name in before and before[name]["median_ms"]:
+            change = stats["median_ms"] / before[name]["median_ms"] - 1
+            line += f"{change:>+10.1%}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--backend", choices=["qdrant", "local"], default="qdrant")
+    parser.add_argument("--encode-batch-sizes", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--real-embeddings",
+        action="store_true",
+        help="Use the configured embedding model instead of the hashing embedder",
+    )
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--compare", help="A previous --json report to compare medians with")
+    args = parser.parse_args()
+
+    settings.VECTOR_BACKEND = args.backend
+    # The in-memory Qdrant needs no credentials, but VectorStore checks they are set
+    os.environ.setdefault("QDRANT_URL", "http://localhost:6333")
+    os.environ.setdefault("QDRANT_API_KEY", "offline")
+
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,25 @@ class TextToImageError(Exception):
     pass
 
 
+class ImageQueueFullError(TextToImageError):
+    """Raised when too many image jobs are waiting to take another one."""
+
+    pass
+
+
 class ImageToTextError(Exception):
     """Base class for image to text errors."""
 
     pass
+
+
+class ProviderUnavailableError(Exception):
+    """Raised when a provider's circuit breaker is open."""
+
+    pass
+
+
+class TranscodingError(Exception):
+    """Raised when ffmpeg fails to convert audio."""
+
+    pass
@@ -0,0 +1,299 @@
+import contextvars
+import inspect
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, ContextManager, Deque, Dict, Iterator, Optional
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from langchain_core.tracers.context import register_configure_hook
+
+from ai_companion.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Thread ID of the conversation being processed, attached to every span as a trace attribute
+current_thread_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_thread_id", default=None
+)
+
+
+@dataclass
+class SpanStats:
+    """Aggregated durations of one kind of span, with the most recent samples for percentiles."""
+
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=10_000))
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """The q-th percentile (0-100) of the recent durations, in seconds."""
+        return float(np.percentile(self.samples, q)) if self.samples else 0.0
+
+
+@dataclass
+class TokenUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@dataclass
+class _NodeRun:
+    """Token usage accumulated by the LLM calls of one node run."""
+
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+
+# Callback of the running instrumented node. Registered as a configure hook, so LLM calls of
+# nodes that take no config still report their tokens
+_node_callback: contextvars.ContextVar[Optional[BaseCallbackHandler]] = contextvars.ContextVar(
+    "node_callback", default=None
+)
+register_configure_hook(_node_callback, inheritable=True)
+
+_current_node_run: contextvars.ContextVar[Optional[_NodeRun]] = contextvars.ContextVar(
+    "current_node_run", default=None
+)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Records prompt and completion token counts reported by LLM responses."""
+
+    def __init__(self, instrumentation: "Instrumentation"):
+        self.instrumentation = instrumentation
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        llm_output = response.llm_output or {}
+        model = llm_output.get("model_name", "unknown")
+        usage = llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+
+        if prompt_tokens is None:
+            # Fall back to the usage metadata of the generated messages
+            prompt_tokens = completion_tokens = 0
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if metadata:
+                        prompt_tokens += metadata.get("input_tokens", 0)
+                        completion_tokens += metadata.get("output_tokens", 0)
+
+        self.instrumentation.record_tokens(model, prompt_tokens or 0, completion_tokens or 0)
+
+
+class Instrumentation:
+    """Timing spans, token usage and cache hit counters for the workflow.
+
+    Every span is aggregated in process (see ``snapshot``), observed by a Prometheus histogram
+    when prometheus_client is installed and exported as an OpenTelemetry span when
+    opentelemetry-api is installed and tracing is enabled. Traces carry the conversation's
+    thread ID. Metrics do not, to keep their label cardinality bounded.
+
+    When disabled, ``span`` returns a shared no-op context manager and the recorders return
+    immediately, and ``instrument_node`` leaves nodes unwrapped.
+
+    Args:
+        enabled: Master switch.
+        prometheus: Export Prometheus metrics.
+        tracing: Export OpenTelemetry spans through the globally configured tracer provider.
+    """
+
+    def __init__(self, enabled: bool, prometheus: bool = True, tracing: bool = True):
+        self.enabled = enabled
+        self.spans: Dict[str, SpanStats] = defaultdict(SpanStats)
+        self.tokens: Dict[str, TokenUsage] = defaultdict(TokenUsage)
+        self.cache_lookups: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.callback = TokenUsageCallback(self)
+        self._null = nullcontext()
+        self._metrics: Optional[Dict[str, Any]] = (
+            self._create_metrics() if enabled and prometheus else None
+        )
+        self._tracer = self._create_tracer() if enabled and tracing else None
+
+    @staticmethod
+    def _create_metrics() -> Optional[Dict[str, Any]]:
+        try:
+            from prometheus_client import Counter, Histogram  # pyright: ignore[reportMissingImports]
+        except ImportError:
+            logger.warning("prometheus_client is not installed, Prometheus metrics are disabled")
+            return None
+        return {
+            "span": Histogram(
+                "sabi_mate_span_duration_seconds",
+                "Duration of graph nodes and provider, embedding and vector store calls",
+                ["kind", "name", "status"],
+            ),
+            "tokens": Counter("sabi_mate_llm_tokens_total", "LLM tokens used", ["model", "type"]),
+            "cache": Counter(
+                "sabi_mate_cache_lookups_total", "Response cache lookups", ["cache", "result"]
+            ),
+        }
+
+    @staticmethod
+    def _create_tracer() -> Any:
+        try:
+            from opentelemetry import trace  # pyright: ignore[reportMissingImports]
+        except ImportError:
+            logger.warning("opentelemetry-api is not installed, tracing is disabled")
+            return None
+        return trace.get_tracer("ai_companion")
+
+    @property
+    def exports_metrics(self) -> bool:
+        return self._metrics is not None
+
+    def span(self, kind: str, name: str) -> ContextManager[Any]:
+        """Time a block of work, e.g. ``with instrumentation.span("provider", "groq"):``.
+
+        Args:
+            kind: Category of the work: "node", "provider", "embedding" or "vector_store".
+            name: What ran, e.g. the node or provider name.
+        """
+        if not self.enabled:
+            return self._null
+        return self._span(kind, name)
+
+    @contextmanager
+    def _span(self, kind: str, name: str) -> Iterator[Any]:
+        otel_span = (
+            self._tracer.start_as_current_span(
+                f"{kind}.{name}",
+                attributes={"thread_id": current_thread_id.get() or "", "kind": kind},
+            )
+            if self._tracer is not None
+            else nullcontext()
+        )
+        status = "ok"
+        started = time.perf_counter()
+        with otel_span as current:
+            try:
+                yield current
+            except BaseException:
+                status = "error"
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                stats = self.spans[f"{kind}.{name}"]
+                stats.count += 1
+                stats.total_seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+                stats.samples.append(elapsed)
+                if status == "error":
+                    stats.errors += 1
+                if self._metrics is not None:
+                    self._metrics["span"].labels(kind, name, status).observe(elapsed)
+
+    def record_tokens(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        if not self.enabled:
+            return
+        usage = self.tokens[model]
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
+        node_run = _current_node_run.get()
+        if node_run is not None:
+            node_run.usage.prompt_tokens += prompt_tokens
+            node_run.usage.completion_tokens += completion_tokens
+        if self._metrics is not None:
+            self._metrics["tokens"].labels(model, "prompt").inc(prompt_tokens)
+            self._metrics["tokens"].labels(model, "completion").inc(completion_tokens)
+
+    def record_cache_lookup(self, cache: str, result: str) -> None:
+        """Count a cache lookup, ``result`` being "exact", "semantic" or "miss"."""
+        if not self.enabled:
+            return
+        self.cache_lookups[cache][result] += 1
+        if self._metrics is not None:
+            self._metrics["cache"].labels(cache, result).inc()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """In-process view of everything recorded so far."""
+        cache_hit_rates = {}
+        for cache, lookups in self.cache_lookups.items():
+            total = sum(lookups.values())
+            cache_hit_rates[cache] = (total - lookups.get("miss", 0)) / total if total else 0.0
+        return {
+            "spans": {
+                name: {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "mean_ms": stats.mean_seconds * 1000,
+                    "p50_ms": stats.percentile(50) * 1000,
+                    "p95_ms": stats.percentile(95) * 1000,
+                    "p99_ms": stats.percentile(99) * 1000,
+                    "max_ms": stats.max_seconds * 1000,
+                }
+                for name, stats in self.spans.items()
+            },
+            "tokens": {
+                model: {"prompt": usage.prompt_tokens, "completion": usage.completion_tokens}
+                for model, usage in self.tokens.items()
+            },
+            "cache_hit_rates": cache_hit_rates,
+        }
+
+    def instrument_node(self, name: str, node: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a graph node with a span, its thread ID and token accounting.
+
+        Returns the node unchanged when instrumentation is disabled.
+        """
+        if not self.enabled:
+            return node
+
+        takes_config = "config" in inspect.signature(node).parameters
+
+        async def instrumented(state: Any, config: RunnableConfig) -> Any:
+            # LLM calls inside the node get the callback from the config, or from the hook
+            config = merge_configs(config, {"callbacks": [self.callback]})
+            configurable = config.get("configurable") or {}
+            thread_token = current_thread_id.set(configurable.get("thread_id"))
+            callback_token = _node_callback.set(self.callback)
+            node_run = _NodeRun()
+            run_token = _current_node_run.set(node_run)
+            try:
+                with self.span("node", name) as otel_span:
+                    result = node(state, config) if takes_config else node(state)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    if otel_span is not None:
+                        otel_span.set_attribute("llm.prompt_tokens", node_run.usage.prompt_tokens)
+                        otel_span.set_attribute(
+                            "llm.completion_tokens", node_run.usage.completion_tokens
+                        )
+                    return result
+            finally:
+                _current_node_run.reset(run_token)
+                _node_callback.reset(callback_token)
+                current_thread_id.reset(thread_token)
+
+        # Not functools.wraps: LangGraph reads the signature to decide whether to pass config
+        instrumented.__name__ = instrumented.__qualname__ = node.__name__
+        return instrumented
+
+
+@lru_cache
+def get_instrumentation() -> Instrumentation:
+    """Get the process-wide instrumentation, starting the Prometheus endpoint if configured."""
+    instrumentation = Instrumentation(
+        enabled=settings.INSTRUMENTATION_ENABLED,
+        prometheus=settings.INSTRUMENTATION_PROMETHEUS_PORT is not None,
+        tracing=settings.INSTRUMENTATION_TRACING_ENABLED,
+    )
+    if instrumentation.exports_metrics and settings.INSTRUMENTATION_PROMETHEUS_PORT:
+        from prometheus_client import start_http_server  # pyright: ignore[reportMissingImports]
+
+        start_http_server(settings.INSTRUMENTATION_PROMETHEUS_PORT)
+    return instrumentation
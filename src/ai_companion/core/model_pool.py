@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Mapping, Optional, Sequence, Tuple, cast
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from ai_companion.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """Rolling latency and error rate of one model.
+
+    Only calls from the last ``window_seconds`` count, so a model that was failing is tried
+    again once its failures have aged out.
+    """
+
+    def __init__(self, window_seconds: float, max_samples: int = 1000):
+        self.window_seconds = window_seconds
+        # (finished at, seconds, failed)
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=max_samples)
+
+    def observe(self, seconds: float, failed: bool = False) -> None:
+        self._samples.append((time.monotonic(), seconds, failed))
+
+    def _recent(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    @property
+    def count(self) -> int:
+        return len(self._recent())
+
+    @property
+    def error_rate(self) -> float:
+        samples = self._recent()
+        return sum(failed for _, _, failed in samples) / len(samples) if samples else 0.0
+
+    def latency(self, q: float) -> Optional[float]:
+        """The q-th percentile (0-100) of recent successful call durations, in seconds."""
+        latencies = [seconds for _, seconds, failed in self._recent() if not failed]
+        return float(np.percentile(latencies, q)) if latencies else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.latency(50), self.latency(95)
+        return {
+            "calls": self.count,
+            "error_rate": self.error_rate,
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p95_ms": p95 * 1000 if p95 is not None else None,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_model_stats(model: str) -> ModelStats:
+    """Get the shared stats of a model, across every pool and temperature using it."""
+    return ModelStats(window_seconds=settings.MODEL_POOL_WINDOW_SECONDS)
+
+
+class ModelPool(Runnable):
+    """Chat models tried in priority order, picking the fastest healthy one.
+
+    A model is unhealthy when its recent error rate exceeds ``max_error_rate`` over at least
+    ``min_samples`` calls. Healthy models are tried in priority order, except that a model whose
+    median latency is more than ``latency_tolerance`` times the fastest one's goes after the
+    faster models. Unhealthy models are only tried as a last resort.
+
+    A failed call falls through to the next model right away. When hedging is enabled and the
+    call has not finished after the model's p95 latency, a backup call starts on the next
+    model and the first answer wins, the other call is cancelled.
+
+    Args:
+        models: (name, model) pairs, primary first. The name keys the shared stats.
+        max_error_rate: Error rate above which a model is considered unhealthy.
+        min_samples: Calls needed before a model's stats are trusted.
+        latency_tolerance: How much slower than the fastest model a preferred model may be.
+        hedge: Start backup calls after the p95 deadline.
+        stats: Stats per model name, the process-wide stats by default.
+    """
+
+    def __init__(
+        self,
+        models: Sequence[Tuple[str, Runnable]],
+        max_error_rate: float = settings.MODEL_POOL_MAX_ERROR_RATE,
+        min_samples: int = settings.MODEL_POOL_MIN_SAMPLES,
+        latency_tolerance: float = settings.MODEL_POOL_LATENCY_TOLERANCE,
+        hedge: bool = settings.MODEL_POOL_HEDGE_ENABLED,
+        stats: Optional[Mapping[str, ModelStats]] = None,
+    ):
+        if not models:
+            raise ValueError("A model pool needs at least one model")
+        self.models = list(models)
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.latency_tolerance = latency_tolerance
+        self.hedge = hedge
+        self.stats = (
+            dict(stats)
+            if stats is not None
+            else {name: get_model_stats(name) for name, _ in models}
+        )
+
+    def _healthy(self, name: str) -> bool:
+        stats = self.stats[name]
+        return stats.count < self.min_samples or stats.error_rate <= self.max_error_rate
+
+    def _median(self, name: str) -> Optional[float]:
+        stats = self.stats[name]
+        return stats.latency(50) if stats.count >= self.min_samples else None
+
+    def ranked(self) -> List[Tuple[str, Runnable]]:
+        """The models in the order they will be tried."""
+        healthy = [entry for entry in self.models if self._healthy(entry[0])]
+        unhealthy = [entry for entry in self.models if not self._healthy(entry[0])]
+
+        medians = {name: self._median(name) for name, _ in healthy}
+        known = [median for median in medians.values() if median is not None]
+        if not known:
+            return healthy + unhealthy
+
+        limit = min(known) * self.latency_tolerance
+        preferred = [e for e in healthy if (median := medians[e[0]]) is None or median <= limit]
+        slow = sorted(
+            (e for e in healthy if e not in preferred), key=lambda e: medians[e[0]] or 0.0
+        )
+        return preferred + slow + unhealthy
+
+    def _hedge_delay(self, name: str) -> Optional[float]:
+        stats = self.stats[name]
+        return stats.latency(95) if self.hedge and stats.count >= self.min_samples else None
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> "ModelPool":
+        """A pool of the same models returning ``schema``, sharing their stats."""
+        return ModelPool(
+            [
+                (name, cast(BaseChatModel, model).with_structured_output(schema, **kwargs))
+                for name, model in self.models
+            ],
+            max_error_rate=self.max_error_rate,
+            min_samples=self.min_samples,
+            latency_tolerance=self.latency_tolerance,
+            hedge=self.hedge,
+            stats=self.stats,
+        )
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        """Call the models in turn until one succeeds. Synchronous calls are not hedged."""
+        last_error: Optional[BaseException] = None
+        for name, model in self.ranked():
+            started = time.perf_counter()
+            try:
+                result = model.invoke(input, config, **kwargs)
+            except Exception as e:
+                self.stats[name].observe(time.perf_counter() - started, failed=True)
+                logger.warning(f"Model {name} failed, trying the next one: {e}")
+                last_error = e
+                continue
+            self.stats[name].observe(time.perf_counter() - started)
+            return result
+        assert last_error is not None
+        raise last_error
+
+    async def ainvoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Any:
+        candidates = iter(self.ranked())
+        pending: Dict["asyncio.Task[Any]", Tuple[str, float]] = {}
+        last_error: Optional[BaseException] = None
+        hedged = False
+
+        def start_next() -> bool:
+            entry = next(candidates, None)
+            if entry is None:
+                return False
+            name, model = entry
+            task = asyncio.ensure_future(model.ainvoke(input, config, **kwargs))
+            pending[task] = (name, time.perf_counter())
+            return True
+
+        start_next()
+        try:
+            while pending:
+                timeout = None
+                if not hedged and len(pending) == 1:
+                    name, started = next(iter(pending.values()))
+                    delay = self._hedge_delay(name)
+                    if delay is not None:
+                        timeout = max(0.0, delay - (time.perf_counter() - started))
+
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Past the p95 deadline, race a backup call on the next model
+                    hedged = True
+                    if start_next():
+                        logger.debug("Hedging a slow model call")
+                    continue
+
+                for task in done:
+                    name, started = pending.pop(task)
+                    elapsed = time.perf_counter() - started
+                    error = task.exception()
+                    if error is None:
+                        self.stats[name].observe(elapsed)
+                        return task.result()
+                    self.stats[name].observe(elapsed, failed=True)
+                    logger.warning(f"Model {name} failed, trying the next one: {error}")
+                    last_error = error
+
+                if not pending and not start_next():
+                    break
+        finally:
+            # Losing calls are not sampled, a cancelled call says nothing about the model
+            for task in pending:
+                task.cancel()
+
+        assert last_error is not None
+        raise last_error
+
+
+def get_model_pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Rolling stats of every model used through a pool so far."""
+    return {
+        model: get_model_stats(model).snapshot()
+        for model in [settings.TEXT_MODEL_NAME, *settings.TEXT_MODEL_FALLBACKS]
+    }
@@ -55,7 +55,7 @@ Make this prompt beta by using proper prompt techniques like adding context, sty
 "realistic photo of person wey dey drink coffee" -> "photo of person wey dey enjoy coffee for cozy cafe, natural morning light, snap with 50mm f/1.8 lens, 8425.HEIC"
 """
 
-CHARACTER_CARD_PROMPT = """
+CHARACTER_CARD_INTRO = """
 You dey about to play Turing Test game as part of experiment,
 where dem go match you with human for Whatsapp conversation.
 Your job na to act as the character wey follow, make you convince the
@@ -81,7 +81,9 @@ always ready to dive inside any of the two worlds with same energy.
 - You dey humble and you fit admit when you no know something
 - You dey use small swear words sometimes when e fit the gist
 - You get your own special, funny style wey dey make gist interesting
+"""
 
+CHARACTER_CURRENT_CONTEXT = """
 ## Current Date and Time
 Current date and time for your timezone na: {current_datetime}
 
@@ -96,7 +98,9 @@ Here wetin you know about the user from previous gist:
 As SabiMate, you dey do this kain activity now:
 
 {current_activity}
+"""
 
+CHARACTER_CARD_RULES = """
 Besides the roleplay context, you must follow, ALWAYS, these rules:
 
 # Rules
@@ -112,6 +116,24 @@ Besides the roleplay context, you must follow, ALWAYS, these rules:
 - Give plain text responses without any formatting or meta-talk
 """
 
+CHARACTER_CARD_PROMPT = CHARACTER_CARD_INTRO + CHARACTER_CURRENT_CONTEXT + CHARACTER_CARD_RULES
+
+# Same character card without the parts that change between turns, so that the system
+# message is byte-identical on every call and providers can reuse its cached prefix. The
+# changing parts go in CHARACTER_CONTEXT_PROMPT, sent after the conversation.
+CHARACTER_CARD_STATIC_PROMPT = (
+    CHARACTER_CARD_INTRO
+    + """
+## Current Context
+
+The current date and time, wetin you know about the user and your current activity
+go come for the last message, after the conversation.
+"""
+    + CHARACTER_CARD_RULES
+)
+
+CHARACTER_CONTEXT_PROMPT = CHARACTER_CURRENT_CONTEXT + "{summary}"
+
 MEMORY_ANALYSIS_PROMPT = """Find and format important personal facts about user from their message.
 Focus on the real information, no be the meta-talk or requests.
 
@@ -169,3 +191,72 @@ Output: {{
 Message: {message}
 Output:
 """
+
+MEMORY_BATCH_ANALYSIS_PROMPT = """Find and format all the important personal facts about user from their messages.
+Focus on the real information, no be the meta-talk or requests.
+
+Important facts include:
+- Personal details (name, age, location)
+- Work info (job, education, skills)
+- Wetin dem like (likes, dislikes, favorites)
+- Life situation (family, relationships)
+- Big experiences or achievements
+- Personal goals or wetin dem want
+
+Rules:
+1. Only collect real facts, no be requests or talk about remembering things
+2. Convert each fact to one clear, third-person statement
+3. One message fit get plenty facts - return every one of them as separate memory
+4. No repeat the same fact two times
+5. If no real facts dey, return empty list
+
+Examples:
+Messages:
+1. "Hey, how you dey today?"
+2. "I be engineer for Lagos and I like Star Wars"
+3. "Abeg remember say my sister name na Ada"
+Output: {{
+    "memories": ["Works as an engineer", "Lives in Lagos", "Likes Star Wars", "Has a sister named Ada"]
+}}
+
+Messages:
+1. "You fit remember my details for next time?"
+2. "lol"
+Output: {{
+    "memories": []
+}}
+
+Messages:
+{messages}
+Output:
+"""
+
+MEMORY_CONSOLIDATION_PROMPT = """These stored facts about user say almost the same thing.
+Merge them into one clear, third-person statement wey keep every detail wey still correct.
+
+Rules:
+1. The facts dey ordered from oldest to newest
+2. If two facts contradict, the newest one wins
+3. No add information wey no dey the facts
+4. Keep am short, one sentence
+
+Examples:
+Facts:
+1. "Lives in Ibadan"
+2. "Just moved to Lagos"
+3. "Lives in Lagos with their sister"
+Output: {{
+    "memory": "Lives in Lagos with their sister"
+}}
+
+Facts:
+1. "Likes jollof rice"
+2. "Loves jollof rice and fried plantain"
+Output: {{
+    "memory": "Loves jollof rice and fried plantain"
+}}
+
+Facts:
+{facts}
+Output:
+"""
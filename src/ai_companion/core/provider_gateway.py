@@ -0,0 +1,360 @@
+import asyncio
+import inspect
+import logging
+import random
+import re
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, TypeVar, Union
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from ai_companion.core.exceptions import ProviderUnavailableError
+from ai_companion.core.instrumentation import get_instrumentation
+from ai_companion.settings import settings
+
+R = TypeVar("R")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse a rate limit reset duration such as ``"2m59.56s"``, ``"150ms"`` or ``"7"``.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None if it cannot be parsed.
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    multipliers = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(amount) * multipliers[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Async token bucket limiting the request rate to a provider.
+
+    The bucket refills at ``rate`` tokens per second up to ``capacity``. Rate limit headers
+    returned by the provider can drain it and pause it until the provider's window resets.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for the given number of seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adjust the bucket from ``retry-after`` and ``x-ratelimit-*`` response headers."""
+        headers = {key.lower(): value for key, value in headers.items()}
+
+        retry_after = parse_duration(headers.get("retry-after", ""))
+        if retry_after:
+            self.pause(retry_after)
+            return
+
+        for kind in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}", ""))
+            if remaining is None or reset is None:
+                continue
+            try:
+                remaining_count = float(remaining)
+            except ValueError:
+                continue
+            if remaining_count <= 0:
+                self.pause(reset)
+            elif kind == "requests":
+                self._refill(time.monotonic())
+                self._tokens = min(self._tokens, remaining_count)
+
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures until a recovery period has passed.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls are rejected.
+    Once ``recovery_seconds`` have passed a single trial call is let through (half-open); its
+    outcome closes the circuit again or re-opens it. Only transient errors count as failures,
+    a non-retryable error such as a 400 shows the provider is up and counts as a success. A
+    cancelled trial leaves the circuit half-open for the next call.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._failures < self.failure_threshold:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.recovery_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> Optional[str]:
+        """Let a call through or reject it.
+
+        Returns:
+            Optional[str]: None if the call is rejected, otherwise the state it was let through
+                in. A call let through half-open holds the trial slot until ``release_trial``.
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return state
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return state
+        return None
+
+    def record_success(self) -> None:
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot, once the trial call has ended in any way."""
+        self._trial_in_flight = False
+
+
+@dataclass
+class GatewayMetrics:
+    """Snapshot of a provider gateway's load and health."""
+
+    provider: str
+    queue_depth: int = 0
+    in_flight: int = 0
+    calls: int = 0
+    retries: int = 0
+    failures: int = 0
+    rejected: int = 0
+    circuit_state: str = CircuitBreaker.CLOSED
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "http_status", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def _response_headers(exc: BaseException) -> Mapping[str, str]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None)
+    return headers if isinstance(headers, Mapping) else {}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Check whether a provider error is transient and worth retrying."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    status_code = _status_code(exc)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    # Provider SDKs raise their own connection and timeout error types
+    name = type(exc).__name__
+    return name.endswith("ConnectionError") or name.endswith("TimeoutError")
+
+
+class ProviderGateway:
+    """Shared entry point for calls to one external provider.
+
+    Every call waits for a free concurrency slot and a rate limit token, is retried with
+    jittered exponential backoff on transient errors, and is rejected straight away while the
+    provider's circuit breaker is open.
+
+    Args:
+        provider: Name of the provider, used in logs and metrics.
+        max_concurrency: Maximum number of calls in flight at once.
+        rate_per_second: Sustained request rate allowed by the token bucket.
+        max_retries: Number of retries after the first attempt for transient errors.
+        backoff_base_seconds: Base delay of the exponential backoff.
+        backoff_max_seconds: Upper bound of a single backoff delay.
+        failure_threshold: Consecutive failures that open the circuit.
+        recovery_seconds: Time the circuit stays open before a trial call.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        max_concurrency: int,
+        rate_per_second: float,
+        max_retries: int = settings.PROVIDER_MAX_RETRIES,
+        backoff_base_seconds: float = settings.PROVIDER_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds: float = settings.PROVIDER_BACKOFF_MAX_SECONDS,
+        failure_threshold: int = settings.PROVIDER_CIRCUIT_FAILURE_THRESHOLD,
+        recovery_seconds: float = settings.PROVIDER_CIRCUIT_RECOVERY_SECONDS,
+    ):
+        self.provider = provider
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.rate_limiter = TokenBucket(rate=rate_per_second, capacity=max(1.0, rate_per_second))
+        self.circuit_breaker = CircuitBreaker(failure_threshold, recovery_seconds)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._metrics = GatewayMetrics(provider=provider)
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def metrics(self) -> GatewayMetrics:
+        """Current queue depth, in-flight calls and counters."""
+        self._metrics.circuit_state = self.circuit_breaker.state
+        return GatewayMetrics(**asdict(self._metrics))
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Feed rate limit headers from a provider response into the rate limiter."""
+        self.rate_limiter.update_from_headers(headers)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        ceiling = min(self.backoff_max_seconds, self.backoff_base_seconds * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    async def _attempt(
+        self, fn: Callable[..., Union[R, Awaitable[R]]], *args: Any, **kwargs: Any
+    ) -> R:
+        admitted_in = self.circuit_breaker.allow_request()
+        if admitted_in is None:
+            self._metrics.rejected += 1
+            raise ProviderUnavailableError(
+                f"{self.provider} is unavailable after repeated failures, try again later"
+            )
+
+        try:
+            self._metrics.queue_depth += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._metrics.queue_depth -= 1
+
+            self._metrics.in_flight += 1
+            try:
+                await self.rate_limiter.acquire()
+                if inspect.iscoroutinefunction(fn):
+                    return await fn(*args, **kwargs)
+                return await asyncio.to_thread(fn, *args, **kwargs)  # type: ignore[return-value]
+            finally:
+                self._metrics.in_flight -= 1
+                self._semaphore.release()
+        finally:
+            # Only the trial call frees the slot, a call let through before the circuit opened
+            # may end while the trial is running. A cancelled trial would otherwise hold the
+            # slot forever, the outcome of a finished one is recorded right after this.
+            if admitted_in == CircuitBreaker.HALF_OPEN:
+                self.circuit_breaker.release_trial()
+
+    async def call(self, fn: Callable[..., Union[R, Awaitable[R]]], *args: Any, **kwargs: Any) -> R:
+        """Call a provider function through the gateway.
+
+        Coroutine functions are awaited, blocking functions are run in a worker thread.
+
+        Raises:
+            ProviderUnavailableError: If the provider's circuit breaker is open.
+        """
+        with get_instrumentation().span("provider", self.provider):
+            return await self._call_with_retries(fn, *args, **kwargs)
+
+    async def _call_with_retries(
+        self, fn: Callable[..., Union[R, Awaitable[R]]], *args: Any, **kwargs: Any
+    ) -> R:
+        attempt = 0
+        while True:
+            self._metrics.calls += 1
+            try:
+                result = await self._attempt(fn, *args, **kwargs)
+            except ProviderUnavailableError:
+                raise
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.circuit_breaker.record_failure()
+                    self.update_from_headers(_response_headers(e))
+                else:
+                    # The provider answered, a rejected request says nothing about its health
+                    self.circuit_breaker.record_success()
+                if not retryable or attempt >= self.max_retries:
+                    self._metrics.failures += 1
+                    raise
+
+                delay = self._backoff(attempt)
+                attempt += 1
+                self._metrics.retries += 1
+                self._logger.warning(
+                    f"{self.provider} call failed ({e}), retry {attempt}/{self.max_retries} "
+                    f"in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+            else:
+                self.circuit_breaker.record_success()
+                return result
+
+    def wrap(self, runnable: Runnable) -> Runnable:
+        """Route the async invocations of a LangChain runnable through the gateway."""
+
+        async def _ainvoke(input: Any, config: Optional[RunnableConfig] = None) -> Any:
+            return await self.call(runnable.ainvoke, input, config)
+
+        return RunnableLambda(runnable.invoke, afunc=_ainvoke, name=f"{self.provider}_gateway")
+
+
+@lru_cache(maxsize=None)
+def get_provider_gateway(provider: str) -> ProviderGateway:
+    """Get the shared gateway for a provider ('groq', 'together' or 'elevenlabs')."""
+    return ProviderGateway(
+        provider=provider,
+        max_concurrency=settings.PROVIDER_MAX_CONCURRENCY.get(provider, 4),
+        rate_per_second=settings.PROVIDER_RATE_LIMIT_PER_SECOND.get(provider, 1.0),
+    )
+
+
+def get_gateway_metrics() -> Dict[str, GatewayMetrics]:
+    """Get metrics for every provider gateway created so far."""
+    return {
+        provider: get_provider_gateway(provider).metrics
+        for provider in settings.PROVIDER_MAX_CONCURRENCY
+    }
@@ -0,0 +1,199 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Generic, Optional, TypeVar
+
+import numpy as np
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from ai_companion.core.instrumentation import get_instrumentation
+from ai_companion.settings import settings
+
+V = TypeVar("V")
+
+Embedder = Callable[[str], Awaitable[np.ndarray]]
+
+_PUNCTUATION = re.compile(r"[!?.,;:'\"`~\-_()]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_cache_key(text: str) -> str:
+    """Normalize text so that trivial variations ("Ok!!", " ok ") share a cache entry."""
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+@dataclass
+class _CacheEntry(Generic[V]):
+    value: V
+    expires_at: float
+    embedding: Optional[np.ndarray] = None
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters of a response cache."""
+
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / total if total else 0.0
+
+
+class ResponseCache(Generic[V]):
+    """Two-tier cache for classifier-style LLM calls.
+
+    The exact tier looks up the normalized input. The optional semantic tier embeds the input
+    and returns the value of the most similar cached input if its cosine similarity reaches
+    ``semantic_threshold``. Entries expire after ``ttl_seconds`` and the least recently used
+    entries are evicted beyond ``max_entries``.
+
+    Args:
+        name: Name of the cache, used in logs.
+        max_entries: Maximum number of cached responses.
+        ttl_seconds: Time to live of a cached response.
+        semantic_threshold: Minimum cosine similarity for a semantic hit. None disables the tier.
+        embedder: Coroutine returning a normalized embedding, required by the semantic tier.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = settings.LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = settings.LLM_CACHE_TTL_SECONDS,
+        semantic_threshold: Optional[float] = settings.LLM_CACHE_SEMANTIC_THRESHOLD,
+        embedder: Optional[Embedder] = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold if embedder is not None else None
+        self._embedder = embedder
+        self._entries: OrderedDict[str, _CacheEntry[V]] = OrderedDict()
+        self.stats = CacheStats()
+        self._logger = logging.getLogger(__name__)
+
+    def _get_exact(self, key: str, now: float) -> Optional[_CacheEntry[V]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _get_semantic(self, embedding: np.ndarray, now: float) -> Optional[_CacheEntry[V]]:
+        keys = [
+            key
+            for key, entry in self._entries.items()
+            if entry.embedding is not None and entry.expires_at > now
+        ]
+        if not keys or self.semantic_threshold is None:
+            return None
+
+        matrix = np.stack([self._entries[key].embedding for key in keys])  # type: ignore[misc]
+        similarities = matrix @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.semantic_threshold:
+            return None
+
+        self._entries.move_to_end(keys[best])
+        return self._entries[keys[best]]
+
+    async def aget(self, text: str) -> Optional[V]:
+        """Look up a cached response for the input text."""
+        key = normalize_cache_key(text)
+        now = time.monotonic()
+
+        instrumentation = get_instrumentation()
+        entry = self._get_exact(key, now)
+        if entry is not None:
+            self.stats.exact_hits += 1
+            instrumentation.record_cache_lookup(self.name, "exact")
+            return entry.value
+
+        if self.semantic_threshold is not None and self._embedder is not None:
+            entry = self._get_semantic(await self._embedder(key), now)
+            if entry is not None:
+                self.stats.semantic_hits += 1
+                instrumentation.record_cache_lookup(self.name, "semantic")
+                return entry.value
+
+        self.stats.misses += 1
+        instrumentation.record_cache_lookup(self.name, "miss")
+        return None
+
+    async def aput(self, text: str, value: V) -> None:
+        """Cache a response for the input text."""
+        key = normalize_cache_key(text)
+        embedding = None
+        if self.semantic_threshold is not None and self._embedder is not None:
+            embedding = await self._embedder(key)
+
+        self._entries[key] = _CacheEntry(
+            value=value, expires_at=time.monotonic() + self.ttl_seconds, embedding=embedding
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def cacheable_text(text: str) -> Optional[str]:
+    """Return the text if it is short enough to be worth caching, None otherwise.
+
+    Long messages rarely repeat and carry request-specific context, so they bypass the cache.
+    """
+    if not text or len(text) > settings.LLM_CACHE_MAX_KEY_CHARS:
+        return None
+    return text
+
+
+def with_response_cache(
+    runnable: Runnable,
+    cache: ResponseCache,
+    key: Callable[[Any], Optional[str]],
+) -> Runnable:
+    """Answer repeat inputs of an async runnable from a response cache.
+
+    Args:
+        runnable: The chain to wrap.
+        cache: The cache holding previous responses.
+        key: Extracts the text to cache on from the chain input, or None to bypass the cache.
+
+    Returns:
+        Runnable: A runnable that caches responses of ``ainvoke``. ``invoke`` is not cached.
+    """
+
+    async def _ainvoke(input: Any, config: Optional[RunnableConfig] = None) -> Any:
+        text = key(input)
+        if text is not None:
+            cached = await cache.aget(text)
+            if cached is not None:
+                return cached
+
+        result = await runnable.ainvoke(input, config)
+        if text is not None:
+            await cache.aput(text, result)
+        return result
+
+    return RunnableLambda(runnable.invoke, afunc=_ainvoke, name=f"cached_{cache.name}")
+
+
+@lru_cache(maxsize=None)
+def get_response_cache(name: str, embedder: Optional[Embedder] = None) -> ResponseCache:
+    """Get the shared response cache with the given name."""
+    return ResponseCache(name=name, embedder=embedder)
@@ -2,6 +2,7 @@ from functools import lru_cache
 
 from langgraph.graph import END, START, StateGraph
 
+from ai_companion.core.instrumentation import get_instrumentation
 from ai_companion.graph.edges import select_workflow, should_summarize_conversation
 
 from ai_companion.graph.nodes import (
@@ -12,35 +13,59 @@ from ai_companion.graph.nodes import (
     memory_extraction_node,
     memory_injection_node,
     router_node,
+    speculative_router_node,
     summarize_conversation_node,
 )
 from ai_companion.graph.state import AICompanionState
+from ai_companion.lifecycle import start_background_warm_up
+from ai_companion.settings import settings
 
 
 @lru_cache(maxsize=1)
 def create_workflow():
     graph_builder = StateGraph(AICompanionState)
+    # Timing spans and token accounting per node, a no-op unless INSTRUMENTATION_ENABLED
+    instrument = get_instrumentation().instrument_node
 
     # All nodes are added to the graph builder
-    graph_builder.add_node("memory_extraction_node", memory_extraction_node)
-    graph_builder.add_node("router_node", router_node)
-    graph_builder.add_node("context_injection_node", context_injection_node)
-    graph_builder.add_node("memory_injection_node", memory_injection_node)
-    graph_builder.add_node("conversation_node", conversation_node)
-    graph_builder.add_node("audio_node", audio_node)
-    graph_builder.add_node("image_node", image_node)
-    graph_builder.add_node("summarize_conversation_node", summarize_conversation_node)  # The Flow
+    graph_builder.add_node(
+        "memory_extraction_node", instrument("memory_extraction_node", memory_extraction_node)
+    )
+    if settings.SPECULATIVE_ROUTING_ENABLED:
+        graph_builder.add_node("router_node", instrument("router_node", speculative_router_node))
+    else:
+        graph_builder.add_node("router_node", instrument("router_node", router_node))
+    graph_builder.add_node(
+        "context_injection_node", instrument("context_injection_node", context_injection_node)
+    )
+    graph_builder.add_node(
+        "memory_injection_node", instrument("memory_injection_node", memory_injection_node)
+    )
+    graph_builder.add_node("conversation_node", instrument("conversation_node", conversation_node))
+    graph_builder.add_node("audio_node", instrument("audio_node", audio_node))
+    graph_builder.add_node("image_node", instrument("image_node", image_node))
+    graph_builder.add_node(
+        "summarize_conversation_node",
+        instrument("summarize_conversation_node", summarize_conversation_node),
+    )  # The Flow
     graph_builder.add_edge(START, "memory_extraction_node")
 
-    # Go to router_node next, which will set the workflow key
-    graph_builder.add_edge("memory_extraction_node", "router_node")
+    if settings.SPECULATIVE_ROUTING_ENABLED:
+        # Inject the context and memories first, so the router can start the reply right away
+        graph_builder.add_edge("memory_extraction_node", "context_injection_node")
+        graph_builder.add_edge("context_injection_node", "memory_injection_node")
+        graph_builder.add_edge("memory_injection_node", "router_node")
+        graph_builder.add_conditional_edges("router_node", select_workflow)
+    else:
+        # Go to router_node next, which will set the workflow key
+        graph_builder.add_edge("memory_extraction_node", "router_node")
 
-    # inject the context and memories
-    graph_builder.add_edge("router_node", "context_injection_node")
-    graph_builder.add_edge("context_injection_node", "memory_injection_node")
+        # inject the context and memories
+        graph_builder.add_edge("router_node", "context_injection_node")
+        graph_builder.add_edge("context_injection_node", "memory_injection_node")
 
-    # proceed to appropriate node after memory injection
-    graph_builder.add_conditional_edges("memory_injection_node", select_workflow)
+        # proceed to appropriate node after memory injection
+        graph_builder.add_conditional_edges("memory_injection_node", select_workflow)
 
     # Check for summarization after each conversation
     graph_builder.add_conditional_edges("conversation_node", should_summarize_conversation)
@@ -53,3 +78,7 @@ def create_workflow():
 
 
 graph = create_workflow().compile()
+
+if settings.WARMUP_ON_STARTUP:
+    # Load the embedding model and clients while the server finishes starting
+    start_background_warm_up()
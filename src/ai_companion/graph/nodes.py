@@ -1,9 +1,15 @@
+import asyncio
+import logging
 import os
+from contextlib import suppress
+from typing import Optional, Sequence
 from uuid import uuid4
 
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 
+from ai_companion.core.exceptions import ImageQueueFullError
+from ai_companion.core.provider_gateway import get_provider_gateway
 from ai_companion.graph.state import AICompanionState
 from ai_companion.graph.utils.chains import get_character_response_chain, get_router_chain
 from ai_companion.graph.utils.helpers import (
@@ -11,10 +17,14 @@ from ai_companion.graph.utils.helpers import (
     get_text_to_image_module,
     get_text_to_speech_module,
 )
+from ai_companion.graph.utils.speculation import get_speculation_metrics
+from ai_companion.modules.image.jobs import get_image_job_queue
 from ai_companion.modules.memory.long_term.memory_manager import get_memory_manager_async
 from ai_companion.modules.schedules.context_generation import ScheduleContextGenerator
 from ai_companion.settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 async def router_node(state: AICompanionState):
     chain = get_router_chain()
@@ -33,24 +43,117 @@ async def router_node(state: AICompanionState):
     return {"workflow": response_type}
 
 
+async def _generate_response(
+    state: AICompanionState,
+    config: RunnableConfig,
+    messages: Optional[Sequence[BaseMessage]] = None,
+) -> str:
+    """Generate SabiMate's reply to the conversation, or to ``messages`` when given."""
+    current_activity = ScheduleContextGenerator.get_current_activity()
+    memory_context = state.get("memory_context", "")
+
+    chain = get_character_response_chain(state.get("summary", ""))
+
+    return await get_provider_gateway("groq").call(
+        chain.ainvoke,
+        {
+            "messages": messages if messages is not None else state["messages"],
+            "current_activity": current_activity,
+            "memory_context": memory_context,
+        },
+        config,
+    )
+
+
+async def speculative_router_node(state: AICompanionState, config: RunnableConfig):
+    """Route the message while already generating the text reply most turns end up with.
+
+    The reply is kept for the conversation and audio nodes, which send the same prompt. It is
+    cancelled when the router picks the image workflow, whose prompt includes the generated
+    scenario. Outcomes are counted in the speculation metrics.
+    """
+    metrics = get_speculation_metrics()
+    metrics.started += 1
+    speculative_reply = asyncio.create_task(_generate_response(state, config))
+
+    try:
+        update = await router_node(state)
+    except BaseException:
+        speculative_reply.cancel()
+        metrics.cancelled += 1
+        raise
+
+    if update["workflow"] == "image":
+        speculative_reply.cancel()
+        with suppress(asyncio.CancelledError, Exception):
+            await speculative_reply
+        metrics.cancelled += 1
+        return {**update, "speculative_response": None}
+
+    try:
+        response = await speculative_reply
+    except Exception:
+        # The workflow node generates the reply again
+        logger.warning("Speculative reply failed", exc_info=True)
+        metrics.failed += 1
+        return {**update, "speculative_response": None}
+
+    metrics.used += 1
+    return {**update, "speculative_response": response}
+
+
+def _unprocessed_messages(state: AICompanionState) -> list[BaseMessage]:
+    """Get the messages after the batched memory extraction high-water mark."""
+    messages = state["messages"]
+    high_water_mark = state.get("memory_high_water_mark")
+    # Without the mark in the history, summarization trimmed it with the older messages, so
+    # every remaining message is newer. Pending ones were flushed before the trim.
+    start = 0
+    if high_water_mark:
+        for i, message in enumerate(messages):
+            if message.id == high_water_mark:
+                start = i + 1
+                break
+    return list(messages[start:])
+
+
+async def _extract_memories_batch(state: AICompanionState, min_messages: int) -> dict:
+    """Run batched memory extraction once enough unprocessed messages have accumulated."""
+    pending = _unprocessed_messages(state)
+    if sum(message.type == "human" for message in pending) < max(min_messages, 1):
+        return {}
+
+    memory_manager = await get_memory_manager_async()
+    # SabiMate's messages go along, they show the filter which replies answer a question
+    await memory_manager.extract_and_store_memories_batch(pending)
+    return {"memory_high_water_mark": state["messages"][-1].id}
+
+
 async def memory_extraction_node(state: AICompanionState):
     """Extract and store important memories from the conversation.
 
     This node processes the latest message in the conversation and stores
-    any important information in the long-term memory vector store.
+    any important information in the long-term memory vector store. In batch
+    mode it waits for MEMORY_BATCH_SIZE unprocessed user messages and analyzes
+    them together.
     """
     # Skip if there are no messages
     if not state["messages"]:
         return {"next": "router_node"}
 
+    if settings.MEMORY_EXTRACTION_MODE == "batch":
+        update = await _extract_memories_batch(state, settings.MEMORY_BATCH_SIZE)
+        return {"next": "router_node", **update}
+
     # Get the latest message
     latest_message = state["messages"][-1]
 
     # Get memory manager with async initialization
     memory_manager = await get_memory_manager_async()
 
-    # Extract and store memories asynchronously
-    await memory_manager.extract_and_store_memories(latest_message)
+    # Extract and store memories asynchronously, with the question the message may answer
+    previous_message = state["messages"][-2] if len(state["messages"]) > 1 else None
+    await memory_manager.extract_and_store_memories(latest_message, previous_message)
 
     # Always go to router_node next, which will set the workflow
     return {"next": "router_node"}
@@ -65,9 +168,11 @@ async def memory_injection_node(state: AICompanionState):
     # Get memory manager with async initialization
     memory_manager = await get_memory_manager_async()
 
-    # Convert all messages to a single string for context lookup
-    context = " ".join([str(m.content) for m in state["messages"][-5:] if hasattr(m, "content")])
-    memories = await memory_manager.get_relevant_memories_async(context)
+    # Search with each recent user message separately, AI replies left out
+    queries = memory_manager.build_memory_queries(state["messages"])
+    if not queries:
+        return {}
+    memories = await memory_manager.get_relevant_memories_async(queries)
     memory_context = memory_manager.format_memories_for_prompt(memories)
 
     return {"memory_context": memory_context}
@@ -88,6 +193,11 @@ async def summarize_conversation_node(state: AICompanionState):
     if len(state["messages"]) < settings.TOTAL_MESSAGES_SUMMARY_TRIGGER:
         return {}
 
+    # Flush pending batched memory extraction before older messages are dropped
+    update = {}
+    if settings.MEMORY_EXTRACTION_MODE == "batch":
+        update = await _extract_memories_batch(state, min_messages=1)
+
     # Using the chat model to create a summary
     chat_model = get_chat_model()
 
@@ -99,44 +209,51 @@ async def summarize_conversation_node(state: AICompanionState):
 
     # Generate the summary
     prompt = f"Summarize the following conversation briefly while preserving key facts and context:\n\n{message_content}"
-    summary = await chat_model.ainvoke(prompt)
+    summary = await get_provider_gateway("groq").call(chat_model.ainvoke, prompt)
 
     # Keep only the most recent messages after summary
     new_messages = state["messages"][-settings.TOTAL_MESSAGES_AFTER_SUMMARY :]
 
-    return {"messages": new_messages, "summary": summary}
+    return {"messages": new_messages, "summary": summary, **update}
 
 
 async def conversation_node(state: AICompanionState, config: RunnableConfig):
-    current_activity = ScheduleContextGenerator.get_current_activity()
-    memory_context = state.get("memory_context", "")
+    response = state.get("speculative_response") or await _generate_response(state, config)
+    return {"messages": AIMessage(content=response), "speculative_response": None}
+
+
+async def _image_job_reply(
+    state: AICompanionState, config: RunnableConfig, image_prompt: str, img_path: str
+) -> dict:
+    """Queue the image and reply without waiting for it, the interface delivers it later."""
+    try:
+        job = get_image_job_queue().submit(
+            image_prompt, img_path, thread_id=config.get("configurable", {}).get("thread_id")
+        )
+    except ImageQueueFullError as e:
+        # Backpressure: a text reply now beats an image much later
+        logger.warning(f"Replying without an image: {e}")
+        response = await _generate_response(state, config)
+        return {"messages": AIMessage(content=response), "image_job_id": None}
 
-    chain = get_character_response_chain(state.get("summary", ""))
-
-    response = await chain.ainvoke(
-        {
-            "messages": state["messages"],
-            "current_activity": current_activity,
-            "memory_context": memory_context,
-        },
-        config,
+    scenario_message = HumanMessage(
+        content=f"<image attached by SabiMate generated from prompt: {image_prompt}>"
     )
-    return {"messages": AIMessage(content=response)}
+    response = await _generate_response(state, config, state["messages"] + [scenario_message])
+    return {"messages": AIMessage(content=response), "image_job_id": job.id}
 
 
 async def image_node(state: AICompanionState, config: RunnableConfig):
-    import asyncio
-
-    current_activity = ScheduleContextGenerator.get_current_activity()
-    memory_context = state.get("memory_context", "")
-
-    chain = get_character_response_chain(state.get("summary", ""))
     text_to_image_module = get_text_to_image_module()
 
     scenario = await text_to_image_module.create_scenario(state["messages"][-5:])
     # Using asyncio.to_thread to move the blocking os.makedirs call to a separate thread
     await asyncio.to_thread(os.makedirs, "generated_images", exist_ok=True)
     img_path = f"generated_images/image_{str(uuid4())}.png"
+
+    if settings.IMAGE_JOBS_ENABLED:
+        return await _image_job_reply(state, config, scenario.image_prompt, img_path)
+
     await text_to_image_module.generate_image(scenario.image_prompt, img_path)
 
     # Inject the image prompt information as an AI message
@@ -145,33 +262,15 @@ async def image_node(state: AICompanionState, config: RunnableConfig):
     )
     updated_messages = state["messages"] + [scenario_message]
 
-    response = await chain.ainvoke(
-        {
-            "messages": updated_messages,
-            "current_activity": current_activity,
-            "memory_context": memory_context,
-        },
-        config,
-    )
+    response = await _generate_response(state, config, updated_messages)
 
     return {"messages": AIMessage(content=response), "image_path": img_path}
 
 
 async def audio_node(state: AICompanionState, config: RunnableConfig):
-    current_activity = ScheduleContextGenerator.get_current_activity()
-    memory_context = state.get("memory_context", "")
-
-    chain = get_character_response_chain(state.get("summary", ""))
     text_to_speech_module = get_text_to_speech_module()
 
-    response = await chain.ainvoke(
-        {
-            "messages": state["messages"],
-            "current_activity": current_activity,
-            "memory_context": memory_context,
-        },
-        config,
-    )
+    response = state.get("speculative_response") or await _generate_response(state, config)
     output_audio = await text_to_speech_module.synthesize(response)
 
-    return {"messages": response, "audio_buffer": output_audio}
+    return {"messages": response, "audio_buffer": output_audio, "speculative_response": None}
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from langgraph.graph import MessagesState
 
 
@@ -16,6 +18,9 @@ class AICompanionState(MessagesState):
         audio_buffer (str): The audio buffer to be used for speech-to-text conversion.
         current_activity (str): The current activity of SabiMate based on schedule
         memory_context (str): The context of the memory to be injected into the characted card.
+        memory_high_water_mark (str): ID of the last message covered by batched memory extraction.
+        speculative_response (str): Reply generated while the router ran, used by the text nodes.
+        image_job_id (str): Background job generating the image of the last image turn.
     """
 
     summary: str
@@ -25,3 +30,6 @@ class AICompanionState(MessagesState):
     memory_context: str
     apply_activity: str
     image_path: str
+    memory_high_water_mark: str
+    speculative_response: Optional[str]
+    image_job_id: Optional[str]
@@ -1,9 +1,20 @@
+from typing import Optional
+
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from pydantic import BaseModel, Field
 
-from ai_companion.core.prompts import CHARACTER_CARD_PROMPT, ROUTER_PROMPT
+from ai_companion.core.prompts import (
+    CHARACTER_CARD_PROMPT,
+    CHARACTER_CARD_STATIC_PROMPT,
+    CHARACTER_CONTEXT_PROMPT,
+    ROUTER_PROMPT,
+)
 from ai_companion.core.datetime_utils import get_current_datetime
+from ai_companion.core.provider_gateway import get_provider_gateway
+from ai_companion.core.response_cache import cacheable_text, get_response_cache, with_response_cache
 from ai_companion.graph.utils.helpers import AsteriskRemovalParser, get_chat_model
+from ai_companion.modules.memory.long_term.vector_store import embed_text_async
+from ai_companion.settings import settings
 
 
 class RouterResponse(BaseModel):
@@ -12,6 +23,22 @@ class RouterResponse(BaseModel):
     )
 
 
+def _router_cache_key(inputs: dict) -> Optional[str]:
+    """Cache router decisions on the whole window of messages the router sees.
+
+    Only short latest user messages are cached, and the earlier messages of the window are part
+    of the key: "yes" routes to an image after "want a picture?" but not after small talk.
+    """
+    messages = inputs.get("messages") or []
+    if not messages or messages[-1].type != "human":
+        return None
+    if not isinstance(messages[-1].content, str) or not cacheable_text(messages[-1].content):
+        return None
+    if not all(isinstance(message.content, str) for message in messages):
+        return None
+    return "\n".join(f"{message.type}: {message.content}" for message in messages)
+
+
 def get_router_chain():
     model = get_chat_model(
         temperature=0.3,
@@ -21,15 +48,41 @@ def get_router_chain():
         [("system", ROUTER_PROMPT), MessagesPlaceholder(variable_name="messages")],
     )
 
-    return prompt | model
+    chain = prompt | get_provider_gateway("groq").wrap(model)
+    if not settings.LLM_CACHE_ENABLED:
+        return chain
 
+    cache = get_response_cache("router", embed_text_async)
+    return with_response_cache(chain, cache, key=_router_cache_key)
 
-def get_character_response_chain(summary: str = "", timezone: str = "Africa/Lagos"):
-    model = get_chat_model()
 
+def get_character_prompt(summary: str = "", timezone: str = "Africa/Lagos") -> ChatPromptTemplate:
+    """Build the character prompt, taking ``messages``, ``memory_context`` and ``current_activity``.
+
+    With PROMPT_CACHE_FRIENDLY_LAYOUT the system message is the static character card, the
+    same on every call, and the date, memories, activity and summary follow the conversation
+    in a trailing system message. Providers then see a stable prefix they can cache.
+    """
     # Get current date and time based on specified timezone
     current_datetime = get_current_datetime(timezone)
 
+    if settings.PROMPT_CACHE_FRIENDLY_LAYOUT:
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", CHARACTER_CARD_STATIC_PROMPT),
+                MessagesPlaceholder(variable_name="messages"),
+                ("system", CHARACTER_CONTEXT_PROMPT),
+            ],
+        )
+        return prompt.partial(
+            current_datetime=current_datetime,
+            summary=(
+                f"\n## Summary of conversation earlier between SabiMate and the user\n{summary}"
+                if summary
+                else ""
+            ),
+        )
+
     # Format the prompt with the current date and time
     system_message = CHARACTER_CARD_PROMPT.format(
         memory_context="{memory_context}",
@@ -42,8 +95,13 @@ def get_character_response_chain(summary: str = "", timezone: str = "Africa/Lago
             f"\n\nSummary of conversation earlier between SabiMate and the user: {summary}"
         )
 
-    prompt = ChatPromptTemplate.from_messages(
+    return ChatPromptTemplate.from_messages(
         [("system", system_message), MessagesPlaceholder(variable_name="messages")],
     )
 
+
+def get_character_response_chain(summary: str = "", timezone: str = "Africa/Lagos"):
+    model = get_chat_model()
+    prompt = get_character_prompt(summary, timezone)
+
     return prompt | model | AsteriskRemovalParser()
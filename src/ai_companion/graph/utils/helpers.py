@@ -1,35 +1,76 @@
 import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Union
 
 from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
 from pydantic import SecretStr
 
-from ai_companion.modules.image.image_to_text import ImageToText
-from ai_companion.modules.image.text_to_image import TextToImage
-from ai_companion.modules.speech import TextToSpeech
 from ai_companion.settings import settings
 
+# Provider SDKs are imported by the factories on first use, so that importing the graph does
+# not pay for groq, together and elevenlabs. See benchmarks/import_time.py.
+if TYPE_CHECKING:
+    from langchain_groq import ChatGroq
+
+    from ai_companion.core.model_pool import ModelPool
+    from ai_companion.modules.image.image_to_text import ImageToText
+    from ai_companion.modules.image.text_to_image import TextToImage
+    from ai_companion.modules.speech import SpeechToText, TextToSpeech
+
+
+def get_chat_model(temperature: float = 0.7) -> Union["ChatGroq", "ModelPool"]:
+    """Get a ChatGroq model instance based on the provided model name.
+
+    With TEXT_MODEL_FALLBACKS set, returns a ModelPool of TEXT_MODEL_NAME and its fallbacks
+    instead, which picks the fastest healthy model and hedges slow calls.
+
+    Retries are left to the Groq provider gateway, so the client itself does not retry.
+    """
+    from langchain_groq import ChatGroq
 
-def get_chat_model(temperature: float = 0.7) -> ChatGroq:
-    """Get a ChatGroq model instance based on the provided model name."""
     api_key = SecretStr(settings.GROQ_API_KEY) if settings.GROQ_API_KEY else None
 
-    return ChatGroq(
-        model=settings.TEXT_MODEL_NAME,
-        api_key=api_key,
-        temperature=temperature,
+    def create(model: str) -> ChatGroq:
+        return ChatGroq(model=model, api_key=api_key, temperature=temperature, max_retries=0)
+
+    if not settings.TEXT_MODEL_FALLBACKS:
+        return create(settings.TEXT_MODEL_NAME)
+
+    from ai_companion.core.model_pool import ModelPool
+
+    return ModelPool(
+        [
+            (model, create(model))
+            for model in [settings.TEXT_MODEL_NAME, *settings.TEXT_MODEL_FALLBACKS]
+        ]
     )
 
 
-def get_text_to_speech_module():
+@lru_cache
+def get_text_to_speech_module() -> "TextToSpeech":
+    from ai_companion.modules.speech.text_to_speech import TextToSpeech
+
     return TextToSpeech()
 
 
-def get_image_to_text_module():
+@lru_cache
+def get_speech_to_text_module() -> "SpeechToText":
+    from ai_companion.modules.speech.speech_to_text import SpeechToText
+
+    return SpeechToText()
+
+
+@lru_cache
+def get_image_to_text_module() -> "ImageToText":
+    from ai_companion.modules.image.image_to_text import ImageToText
+
     return ImageToText()
 
 
-def get_text_to_image_module():
+@lru_cache
+def get_text_to_image_module() -> "TextToImage":
+    from ai_companion.modules.image.text_to_image import TextToImage
+
     return TextToImage()
 
 
@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass
+class SpeculationMetrics:
+    """Outcomes of replies generated while the router was still deciding the workflow.
+
+    A speculative reply is used when the router picks a text workflow, and wasted when it is
+    cancelled because the router picked another workflow or when it fails.
+    """
+
+    started: int = 0
+    used: int = 0
+    cancelled: int = 0
+    failed: int = 0
+
+    @property
+    def wasted(self) -> int:
+        return self.cancelled + self.failed
+
+    @property
+    def waste_rate(self) -> float:
+        return self.wasted / self.started if self.started else 0.0
+
+
+@lru_cache
+def get_speculation_metrics() -> SpeculationMetrics:
+    """Get the process-wide speculative routing metrics."""
+    return SpeculationMetrics()
@@ -0,0 +1,11 @@
+from .coalescing import CoalescedBatch, MessageCoalescer, join_text_messages
+from .deduplication import ConversationLocks, InboundMessageProcessor, MessageDeduplicator
+
+__all__ = [
+    "CoalescedBatch",
+    "ConversationLocks",
+    "InboundMessageProcessor",
+    "MessageCoalescer",
+    "MessageDeduplicator",
+    "join_text_messages",
+]
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from ai_companion.settings import settings
+
+T = TypeVar("T")
+
+
+def join_text_messages(payloads: List[str]) -> str:
+    """Merge text messages sent in quick succession into a single turn."""
+    return "\n".join(payloads)
+
+
+@dataclass
+class CoalescedBatch(Generic[T]):
+    """Messages gathered for one conversation within the coalescing window."""
+
+    payloads: List[T] = field(default_factory=list)
+    message_ids: List[str] = field(default_factory=list)
+    first_arrival: float = field(default_factory=time.monotonic)
+    last_arrival: float = field(default_factory=time.monotonic)
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class MessageCoalescer(Generic[T]):
+    """Debounces rapid-fire messages for a conversation into a single graph turn.
+
+    The first message of a burst waits until no new message has arrived for ``window_seconds``,
+    ``max_wait_seconds`` have passed since it arrived, or ``max_messages`` were gathered. Later
+    messages of the burst join its batch and return immediately, so only the first caller goes on
+    to run the graph, with every message of the burst merged into one payload.
+
+    Args:
+        window_seconds: Quiet period that closes a burst.
+        max_wait_seconds: Upper bound on how long the first message of a burst is held back.
+        max_messages: Number of messages that closes a burst straight away.
+        merge: Combines the payloads of a batch into a single payload, joins text by default.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = settings.INBOUND_COALESCE_WINDOW_SECONDS,
+        max_wait_seconds: float = settings.INBOUND_COALESCE_MAX_WAIT_SECONDS,
+        max_messages: int = settings.INBOUND_COALESCE_MAX_MESSAGES,
+        merge: Callable[[List[Any]], Any] = join_text_messages,
+    ):
+        self.window_seconds = window_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.max_messages = max_messages
+        self.merge = merge
+        self._batches: Dict[str, CoalescedBatch[T]] = {}
+
+    async def gather(
+        self, thread_id: str, message_id: Optional[str], payload: T
+    ) -> Optional[CoalescedBatch[T]]:
+        """Add a message to the current burst of its conversation.
+
+        Returns:
+            Optional[CoalescedBatch[T]]: The complete batch for the caller that opened the burst,
+                or None for messages that were folded into an existing burst.
+        """
+        batch, opened = self.join(thread_id, message_id, payload)
+        if not opened:
+            return None
+        await self.wait(thread_id, batch)
+        return batch
+
+    def join(
+        self, thread_id: str, message_id: Optional[str], payload: T
+    ) -> Tuple[CoalescedBatch[T], bool]:
+        """Add a message to the current burst of its conversation, opening one if there is none.
+
+        Returns:
+            Tuple[CoalescedBatch[T], bool]: The burst's batch, and whether this message opened it.
+                Only the opener waits for the batch to close, see ``wait``.
+        """
+        batch = self._batches.get(thread_id)
+        if batch is not None:
+            batch.payloads.append(payload)
+            if message_id:
+                batch.message_ids.append(message_id)
+            batch.last_arrival = time.monotonic()
+            if len(batch.payloads) >= self.max_messages:
+                batch.full.set()
+            return batch, False
+
+        batch = CoalescedBatch(payloads=[payload], message_ids=[message_id] if message_id else [])
+        self._batches[thread_id] = batch
+        return batch, True
+
+    async def wait(self, thread_id: str, batch: CoalescedBatch[T]) -> None:
+        """Wait until the burst opened with ``join`` is complete.
+
+        Messages keep joining ``batch`` until then, so its ``message_ids`` are the IDs of every
+        message of the burst even if the wait is cancelled.
+        """
+        try:
+            while len(batch.payloads) < self.max_messages:
+                deadline = min(
+                    batch.last_arrival + self.window_seconds,
+                    batch.first_arrival + self.max_wait_seconds,
+                )
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(batch.full.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            del self._batches[thread_id]
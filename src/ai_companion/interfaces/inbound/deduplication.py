@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+
+from ai_companion.interfaces.inbound.coalescing import MessageCoalescer
+from ai_companion.settings import settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MessageDeduplicator:
+    """Remembers recently seen provider message IDs for a bounded amount of time.
+
+    Webhook providers retry deliveries they consider unacknowledged, so the same message
+    can reach us several times. Entries expire after ``ttl_seconds`` and the oldest ones
+    are evicted once ``max_entries`` is reached.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.INBOUND_DEDUP_TTL_SECONDS,
+        max_entries: int = settings.INBOUND_DEDUP_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._seen: OrderedDict[str, float] = OrderedDict()
+
+    def _evict_expired(self, now: float) -> None:
+        """Drop expired entries. The dict is ordered by insertion, so expiry is too."""
+        while self._seen:
+            message_id, expires_at = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[message_id]
+
+    def check_and_mark(self, message_id: str) -> bool:
+        """Record the message ID and report whether it had already been seen.
+
+        Returns:
+            bool: True if the message is a duplicate and should be dropped.
+        """
+        now = time.monotonic()
+        self._evict_expired(now)
+
+        if message_id in self._seen:
+            return True
+
+        self._seen[message_id] = now + self.ttl_seconds
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return False
+
+    def forget(self, message_id: str) -> None:
+        """Forget a message ID so that a provider retry is processed again."""
+        self._seen.pop(message_id, None)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+class ConversationLocks:
+    """Per-conversation asyncio locks.
+
+    Messages for one thread are processed one at a time in arrival order (asyncio locks are
+    fair), while different threads run in parallel. Locks are dropped once nobody holds or
+    waits for them, so the registry does not grow with the number of users.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waiters: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def acquire(self, thread_id: str) -> AsyncIterator[None]:
+        lock = self._locks.setdefault(thread_id, asyncio.Lock())
+        self._waiters[thread_id] = self._waiters.get(thread_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[thread_id] -= 1
+            if not self._waiters[thread_id]:
+                del self._waiters[thread_id]
+                del self._locks[thread_id]
+
+    def is_busy(self, thread_id: str) -> bool:
+        """Check whether a message for the thread is being processed or queued."""
+        return thread_id in self._locks
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class InboundMessageProcessor(Generic[T, R]):
+    """Idempotent, per-conversation serialized entry point in front of the graph.
+
+    Args:
+        handler: Coroutine function called with ``(thread_id, payload)`` for each new message,
+            typically wrapping ``graph.ainvoke``.
+        deduplicator: Store of recently seen provider message IDs.
+        locks: Registry of per-conversation locks.
+        coalescer: Optional debounce stage merging bursts of messages into one handler call.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, T], Awaitable[R]],
+        deduplicator: Optional[MessageDeduplicator] = None,
+        locks: Optional[ConversationLocks] = None,
+        coalescer: Optional[MessageCoalescer[T]] = None,
+    ):
+        self._handler = handler
+        self.deduplicator = deduplicator or MessageDeduplicator()
+        self.locks = locks or ConversationLocks()
+        self.coalescer = coalescer
+        self.duplicates_dropped = 0
+        self.messages_coalesced = 0
+        self._logger = logging.getLogger(__name__)
+
+    async def process(self, thread_id: str, message_id: Optional[str], payload: T) -> Optional[R]:
+        """Process an inbound message unless it is a duplicate.
+
+        Args:
+            thread_id: The conversation the message belongs to.
+            message_id: The provider message ID. Messages without one are never deduplicated.
+            payload: The message passed on to the handler.
+
+        Returns:
+            Optional[R]: The handler result, or None if the message was a duplicate or was
+                merged into a turn handled by another call.
+        """
+        if message_id and self.deduplicator.check_and_mark(message_id):
+            self.duplicates_dropped += 1
+            self._logger.info(f"Dropping duplicate message {message_id} for thread {thread_id}")
+            return None
+
+        message_ids: List[str] = [message_id] if message_id else []
+        try:
+            if self.coalescer is not None:
+                batch, opened = self.coalescer.join(thread_id, message_id, payload)
+                if not opened:
+                    self.messages_coalesced += 1
+                    return None
+                # The batch's IDs include the messages folded in while it is gathering, they are
+                # all forgotten if this call fails before or during the turn
+                message_ids = batch.message_ids
+                await self.coalescer.wait(thread_id, batch)
+                payload = self.coalescer.merge(batch.payloads)
+
+            async with self.locks.acquire(thread_id):
+                return await self._handler(thread_id, payload)
+        except BaseException:
+            # Let the provider's retry go through if we failed to process the message
+            for failed_id in message_ids:
+                self.deduplicator.forget(failed_id)
+            raise
@@ -0,0 +1,168 @@
+"""Process warm-up: load everything the first request would otherwise wait for.
+
+Call ``await warm_up()`` from the serving process before it accepts traffic, or set
+WARMUP_ON_STARTUP to warm up in a background thread as soon as the graph is imported. The
+first request then waits at most for the part of the warm-up still in progress.
+
+Running the module warms up once and prints the timing breakdown, e.g. at image build time to
+download the embedding model into the cache:
+
+    uv run python -m ai_companion.lifecycle
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ai_companion.graph.utils import helpers
+from ai_companion.graph.utils.chains import get_router_chain
+from ai_companion.modules.memory.long_term.vector_store import get_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupReport:
+    """Outcome of a warm-up: duration of each step and the error of any failed step."""
+
+    timings: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up finished and every required step succeeded."""
+        return self.finished_at is not None and not (set(self.errors) & set(REQUIRED_STEPS))
+
+    @property
+    def total_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def summary(self) -> str:
+        lines = [f"{'ready' if self.ready else 'not ready'} after {self.total_seconds:.2f}s"]
+        for step, seconds in self.timings.items():
+            status = f"failed: {self.errors[step]}" if step in self.errors else "ok"
+            lines.append(f"  {step:<18} {seconds:7.2f}s  {status}")
+        return "\n".join(lines)
+
+
+async def _load_embedding_model() -> None:
+    await get_vector_store().get_model()
+
+
+async def _encode_dummy_text() -> None:
+    # The first encode initializes the inference graph and thread pools
+    model = await get_vector_store().get_model()
+    await asyncio.to_thread(model.encode, "warm up", normalize_embeddings=True)
+
+
+async def _connect_vector_backend() -> None:
+    await get_vector_store().get_backend()
+
+
+async def _ensure_collection() -> None:
+    await get_vector_store().ensure_collection_async()
+
+
+async def _create_provider_clients() -> None:
+    def create() -> None:
+        get_router_chain()
+        for factory, client in (
+            (helpers.get_speech_to_text_module, "client"),
+            (helpers.get_text_to_speech_module, "client"),
+            (helpers.get_image_to_text_module, "client"),
+            (helpers.get_text_to_image_module, "together_client"),
+        ):
+            # Shared module instances keep their client and its connection pool
+            getattr(factory(), client)
+
+    await asyncio.to_thread(create)
+
+
+Step = Tuple[str, Callable[[], Awaitable[None]]]
+
+STEPS: List[Step] = [
+    ("embedding_model", _load_embedding_model),
+    ("embedding_encode", _encode_dummy_text),
+    ("vector_backend", _connect_vector_backend),
+    ("collection", _ensure_collection),
+    ("provider_clients", _create_provider_clients),
+]
+
+# Steps without which memory recall cannot serve, a failure of another step is only reported
+REQUIRED_STEPS = ("embedding_model", "embedding_encode", "vector_backend", "collection")
+
+_report = WarmupReport()
+_ready = threading.Event()
+# Set when a warm-up ends, successfully or not, so waiters never outlive a failed warm-up
+_finished = threading.Event()
+
+
+async def warm_up(steps: Optional[List[Step]] = None) -> WarmupReport:
+    """Run the warm-up steps in order, timing each and recording failures.
+
+    Args:
+        steps: The steps to run, defaults to STEPS.
+
+    Returns:
+        WarmupReport: The timing breakdown, also available from ``get_warmup_report``.
+    """
+    global _report
+    report = _report = WarmupReport(started_at=time.perf_counter())
+    _finished.clear()
+    try:
+        for name, step in steps or STEPS:
+            started = time.perf_counter()
+            try:
+                await step()
+            except Exception as e:
+                report.errors[name] = f"{type(e).__name__}: {e}"
+                logger.warning(f"Warm-up step {name} failed: {e}")
+            report.timings[name] = time.perf_counter() - started
+
+        report.finished_at = time.perf_counter()
+        logger.info(f"Warm-up {report.summary()}")
+        if report.ready:
+            _ready.set()
+    finally:
+        _finished.set()
+    return report
+
+
+def start_background_warm_up() -> threading.Thread:
+    """Warm up in a daemon thread with its own event loop, for callers without one."""
+    thread = threading.Thread(target=lambda: asyncio.run(warm_up()), name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_warmup_report() -> WarmupReport:
+    """Get the report of the current or last warm-up, e.g. for a readiness endpoint."""
+    return _report
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+async def wait_until_ready(timeout: Optional[float] = None) -> bool:
+    """Wait for a warm-up in progress to finish, returning whether it left the process ready.
+
+    Returns False on timeout, and as soon as a warm-up finishes with a failed required step.
+    """
+    finished = await asyncio.to_thread(_finished.wait, timeout)
+    return finished and get_warmup_report().ready
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(warm_up())
+    print(result.summary())
+    sys.exit(0 if result.ready else 1)
@@ -4,6 +4,7 @@ import os
 from typing import Optional, Union
 
 from ai_companion.core.exceptions import ImageToTextError
+from ai_companion.core.provider_gateway import get_provider_gateway
 from ai_companion.settings import settings
 from groq import Groq
 from groq.types.chat import (
@@ -35,9 +36,21 @@ class ImageToText:
     def client(self) -> Groq:
         """Lazy load the Groq client."""
         if not self._client:
-            self._client = Groq(api_key=settings.GROQ_API_KEY)
+            # Retries are handled by the provider gateway
+            self._client = Groq(api_key=settings.GROQ_API_KEY, max_retries=0)
         return self._client
 
+    def _create_completion_sync(self, messages: list[ChatCompletionUserMessageParam]):
+        """Synchronous helper method to call the Groq API and report its rate limit headers.
+        This will be called in a separate thread by the provider gateway."""
+        raw_response = self.client.chat.completions.with_raw_response.create(
+            model=settings.ITT_MODEL_NAME,
+            messages=messages,
+            max_tokens=1000,
+        )
+        get_provider_gateway("groq").update_from_headers(raw_response.headers)
+        return raw_response.parse()
+
     async def analyse_image(self, image_data: Union[str, bytes], prompt: str = "") -> str:
         """Analyze the provided image data and return the extracted text.
 
@@ -77,11 +90,9 @@ class ImageToText:
 
             messages = [ChatCompletionUserMessageParam(role="user", content=content)]
 
-            # Make the API call
-            response = self.client.chat.completions.create(
-                model=settings.ITT_MODEL_NAME,
-                messages=messages,
-                max_tokens=1000,
+            # Make the API call through the shared Groq gateway
+            response = await get_provider_gateway("groq").call(
+                self._create_completion_sync, messages
             )
 
             if not response:
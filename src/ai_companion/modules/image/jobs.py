@@ -0,0 +1,229 @@
+"""Image generation in the background, so an image turn does not wait for the image.
+
+With IMAGE_JOBS_ENABLED, ``image_node`` submits the generation to the process-wide
+``ImageJobQueue`` and replies right away with the job's id in ``image_job_id``. The interface
+delivers the image when the job finishes, from a callback or by polling:
+
+    queue = get_image_job_queue()
+    queue.add_done_callback(send_image_to_user)  # called with every finished ImageJob
+    job = await queue.wait(state["image_job_id"], timeout=60)  # or poll queue.get(job_id)
+
+At most IMAGE_JOB_WORKERS images are generated at a time and IMAGE_JOB_QUEUE_MAX_DEPTH wait
+their turn. Past that, ``submit`` raises ImageQueueFullError and the turn gets a text-only reply.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Union
+from uuid import uuid4
+
+from ai_companion.core.exceptions import ImageQueueFullError
+from ai_companion.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DoneCallback = Callable[["ImageJob"], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class ImageJob:
+    """An image being generated in the background."""
+
+    prompt: str
+    output_path: str
+    thread_id: Optional[str] = None
+    id: str = field(default_factory=lambda: str(uuid4()))
+    status: str = "queued"  # "queued", "running", "done" or "failed"
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    on_done: Optional[DoneCallback] = field(default=None, repr=False)
+    _finished: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+async def _generate_with_text_to_image(prompt: str, output_path: str) -> Any:
+    from ai_companion.graph.utils.helpers import get_text_to_image_module
+
+    return await get_text_to_image_module().generate_image(prompt, output_path)
+
+
+class ImageJobQueue:
+    """A bounded queue of image jobs, worked off by a fixed number of asyncio workers.
+
+    The workers run on the event loop of the first ``submit``. Jobs still queued when that loop
+    closes without a ``shutdown`` are lost, a later ``submit`` on another loop starts new
+    workers.
+
+    Args:
+        generate: Coroutine function generating the image of a prompt at a path.
+        workers: Images generated at the same time.
+        max_depth: Jobs that may wait for a worker before submissions are rejected.
+        timeout_seconds: A job still running after this long fails.
+        max_retained: Finished jobs kept for polling, the oldest are forgotten first.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str, str], Awaitable[Any]] = _generate_with_text_to_image,
+        workers: int = settings.IMAGE_JOB_WORKERS,
+        max_depth: int = settings.IMAGE_JOB_QUEUE_MAX_DEPTH,
+        timeout_seconds: float = settings.IMAGE_JOB_TIMEOUT_SECONDS,
+        max_retained: int = settings.IMAGE_JOB_MAX_RETAINED,
+    ):
+        self.generate = generate
+        self.workers = workers
+        self.max_depth = max_depth
+        self.timeout_seconds = timeout_seconds
+        self.max_retained = max_retained
+        self.rejected = 0
+        self._jobs: "OrderedDict[str, ImageJob]" = OrderedDict()
+        self._finished: Deque[str] = deque()
+        self._callbacks: List[DoneCallback] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[ImageJob]"] = None
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_workers(self) -> "asyncio.Queue[ImageJob]":
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._queue is None:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_depth)
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+        return self._queue
+
+    def submit(
+        self,
+        prompt: str,
+        output_path: str,
+        thread_id: Optional[str] = None,
+        on_done: Optional[DoneCallback] = None,
+    ) -> ImageJob:
+        """Queue an image for generation without waiting for it.
+
+        Args:
+            prompt: The image prompt.
+            output_path: Where the image is saved.
+            thread_id: Conversation the image belongs to, for the done callbacks.
+            on_done: Called with the job once it finished, after the queue-wide callbacks.
+
+        Returns:
+            ImageJob: The handle to poll or wait on.
+
+        Raises:
+            ImageQueueFullError: If IMAGE_JOB_QUEUE_MAX_DEPTH jobs are already waiting.
+        """
+        queue = self._ensure_workers()
+        job = ImageJob(prompt=prompt, output_path=output_path, thread_id=thread_id, on_done=on_done)
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ImageQueueFullError(f"{queue.qsize()} image jobs are already waiting")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ImageJob]:
+        """Look up a job, None once it has been forgotten."""
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> ImageJob:
+        """Wait for a job to finish.
+
+        Raises:
+            KeyError: If the job is unknown.
+            asyncio.TimeoutError: If it is still unfinished after ``timeout`` seconds.
+        """
+        job = self._jobs[job_id]
+        await asyncio.wait_for(job._finished.wait(), timeout)
+        return job
+
+    def add_done_callback(self, callback: DoneCallback) -> None:
+        """Call ``callback`` with every job once it finished, successfully or not."""
+        self._callbacks.append(callback)
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            job.status = "running"
+            try:
+                await asyncio.wait_for(
+                    self.generate(job.prompt, job.output_path), self.timeout_seconds
+                )
+                job.status = "done"
+            except asyncio.CancelledError:
+                job.status, job.error = "failed", "cancelled"
+                self._finish(job)
+                raise
+            except Exception as e:
+                job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+                logger.warning(f"Image job {job.id} failed: {job.error}")
+            self._finish(job)
+            await self._notify(job)
+            queue.task_done()
+
+    def _finish(self, job: ImageJob) -> None:
+        job.finished_at = time.monotonic()
+        job._finished.set()
+        self._finished.append(job.id)
+        while len(self._finished) > self.max_retained:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    async def _notify(self, job: ImageJob) -> None:
+        for callback in [*self._callbacks, *([job.on_done] if job.on_done else [])]:
+            try:
+                result = callback(job)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception(f"Done callback of image job {job.id} failed")
+
+    async def shutdown(self) -> None:
+        """Stop the workers, failing the jobs they are running and the jobs still queued.
+
+        The failed jobs have the error "cancelled" and go to the done callbacks like any other.
+        """
+        cancelled = [job for job in self._jobs.values() if job.status == "running"]
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status, job.error = "failed", "cancelled"
+            self._finish(job)
+            cancelled.append(job)
+        self._tasks, self._queue, self._loop = [], None, None
+        for job in cancelled:
+            if job.error == "cancelled":
+                await self._notify(job)
+
+    def snapshot(self) -> Dict[str, int]:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "done": statuses.count("done"),
+            "failed": statuses.count("failed"),
+            "rejected": self.rejected,
+        }
+
+
+@lru_cache
+def get_image_job_queue() -> ImageJobQueue:
+    """Get the process-wide image job queue."""
+    return ImageJobQueue()
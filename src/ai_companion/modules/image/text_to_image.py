@@ -5,6 +5,7 @@ import os
 from typing import Optional
 
 from ai_companion.core.exceptions import TextToImageError
+from ai_companion.core.provider_gateway import get_provider_gateway
 from ai_companion.core.prompts import IMAGE_ENHANCEMENT_PROMPT, IMAGE_SCENARIO_PROMPT
 from ai_companion.settings import settings
 
@@ -78,7 +79,7 @@ class TextToImage:
         response_format: str,
     ):
         """Synchronous helper method to generate an image using the Together API.
-        This will be called in a separate thread via asyncio.to_thread."""
+        This will be called in a separate thread by the provider gateway."""
         return self.together_client.images.generate(
             prompt=prompt,
             model=model,
@@ -101,8 +102,8 @@ class TextToImage:
             raise ValueError("Prompt is empty or invalid.")
 
         try:
-            # Generate the image using the Together API in a separate thread
-            response = await asyncio.to_thread(
+            # Generate the image using the Together API through the shared gateway
+            response = await get_provider_gateway("together").call(
                 self._generate_image_sync,
                 prompt=prompt,
                 model=settings.TTI_MODEL_NAME,
@@ -154,7 +155,7 @@ class TextToImage:
                 model=settings.TEXT_MODEL_NAME,
                 api_key=SecretStr(settings.GROQ_API_KEY) if settings.GROQ_API_KEY else None,
                 temperature=0.4,
-                max_retries=2,
+                max_retries=0,
             )
 
             structured_llm = llm.with_structured_output(ScenarioPrompt)
@@ -167,7 +168,9 @@ class TextToImage:
                 | structured_llm
             )
 
-            scenario = await chain.ainvoke({"chat_history": formatted_history})
+            scenario = await get_provider_gateway("groq").call(
+                chain.ainvoke, {"chat_history": formatted_history}
+            )
             self._logger.info(f"Generated scenario: {scenario}")
 
             # Ensure we return a proper ScenarioPrompt instance
@@ -192,7 +195,7 @@ class TextToImage:
                 model=settings.TEXT_MODEL_NAME,
                 api_key=SecretStr(settings.GROQ_API_KEY) if settings.GROQ_API_KEY else None,
                 temperature=0.25,
-                max_retries=2,
+                max_retries=0,
             )
 
             structured_llm = llm.with_structured_output(EnhancedPrompt)
@@ -205,7 +208,9 @@ class TextToImage:
                 | structured_llm
             )
 
-            enhanced_prompt = await chain.ainvoke({"prompt": prompt})
+            enhanced_prompt = await get_provider_gateway("groq").call(
+                chain.ainvoke, {"prompt": prompt}
+            )
             self._logger.info(f"Enhanced prompt: {enhanced_prompt}")
 
             # Extract the content field from the EnhancedPrompt object
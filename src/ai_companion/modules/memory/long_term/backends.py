@@ -0,0 +1,370 @@
+import itertools
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ai_companion.settings import settings
+
+if TYPE_CHECKING:
+    from ai_companion.modules.memory.long_term.qdrant_backend import QdrantBackend, QdrantSchema
+
+__all__ = [
+    "LocalBackend",
+    "QdrantBackend",
+    "QdrantSchema",
+    "ScrollOffset",
+    "VectorBackend",
+    "VectorRecord",
+    "create_vector_backend",
+]
+
+# Position in a scroll: a point ID for Qdrant, a row number for the local backend
+ScrollOffset = Optional[Union[str, int]]
+
+
+@dataclass
+class VectorRecord:
+    """A point returned by a vector backend."""
+
+    id: str
+    payload: dict
+    score: Optional[float] = None
+    vector: Optional[np.ndarray] = None
+
+
+class VectorBackend(ABC):
+    """Storage and similarity search for memory vectors.
+
+    Backend methods are blocking. VectorStore runs them in worker threads from async code.
+    """
+
+    collection_name: str
+
+    @abstractmethod
+    def collection_exists(self) -> bool:
+        """Check if the collection exists."""
+
+    @abstractmethod
+    def create_collection(self, dimension: int) -> None:
+        """Create the collection for vectors of the given dimension."""
+
+    @abstractmethod
+    def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[dict]) -> None:
+        """Insert points, replacing existing points with the same ID."""
+
+    @abstractmethod
+    def search(self, vector: np.ndarray, k: int, with_vectors: bool = False) -> List[VectorRecord]:
+        """Find the ``k`` points most similar to the vector by cosine similarity."""
+
+    def search_batch(
+        self, vectors: np.ndarray, k: int, with_vectors: bool = False
+    ) -> List[List[VectorRecord]]:
+        """Run several searches at once."""
+        return [self.search(vector, k, with_vectors) for vector in vectors]
+
+    @abstractmethod
+    def scroll(
+        self,
+        limit: int,
+        offset: ScrollOffset = None,
+        with_vectors: bool = True,
+        payload_filter: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[VectorRecord], ScrollOffset]:
+        """Page through all points, or those whose payload has the ``payload_filter`` values.
+
+        Returns:
+            The next page of points and the offset of the following page, or None at the end.
+        """
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Delete points by ID."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Count the points in the collection."""
+
+
+class LocalBackend(VectorBackend):
+    """In-process vector backend using a NumPy matrix of normalized embeddings.
+
+    Search is a single matrix-vector product followed by a partial sort, with no network hop.
+    When ``path`` is set the collection is persisted in a directory holding the raw float32
+    vectors, memory-mapped for reads and appended to on insert, and an append-only JSON lines
+    log of IDs, payloads and deletions. Without a path the collection lives in memory only.
+
+    Args:
+        collection_name: The collection to use.
+        path: Directory holding the persisted collections, or None to keep them in memory.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    RECORDS_FILE = "records.jsonl"
+    META_FILE = "meta.json"
+
+    def __init__(self, collection_name: str, path: Optional[str] = None):
+        self.collection_name = collection_name
+        self._directory = os.path.join(path, collection_name) if path else None
+        self._lock = threading.RLock()
+        self._dimension: Optional[int] = None
+        self._size = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: List[str] = []
+        self._payloads: List[dict] = []
+        self._rows: Dict[str, int] = {}
+        self._load()
+
+    def _file(self, name: str) -> str:
+        assert self._directory is not None
+        return os.path.join(self._directory, name)
+
+    def _load(self) -> None:
+        """Load a persisted collection: map the vectors and replay the records log."""
+        if self._directory is None or not os.path.exists(self._file(self.META_FILE)):
+            return
+
+        with open(self._file(self.META_FILE)) as meta_file:
+            self._dimension = int(json.load(meta_file)["dimension"])
+
+        row_bytes = 4 * self._dimension
+        rows = os.path.getsize(self._file(self.VECTORS_FILE)) // row_bytes
+        # Drop a partially written trailing row so later appends stay aligned
+        os.truncate(self._file(self.VECTORS_FILE), rows * row_bytes)
+        self._alive = np.zeros(rows, dtype=bool)
+        self._ids = [""] * rows
+        self._payloads = [{}] * rows
+
+        with open(self._file(self.RECORDS_FILE)) as records_file:
+            for line in records_file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("deleted"):
+                    row = self._rows.pop(record["id"], None)
+                    if row is not None:
+                        self._alive[row] = False
+                    continue
+                row = record["row"]
+                if row >= rows:
+                    # The vector write did not complete, ignore the record
+                    continue
+                self._ids[row] = record["id"]
+                self._payloads[row] = record["payload"]
+                self._rows[record["id"]] = row
+                self._alive[row] = True
+
+        self._size = rows
+        self._map_vectors()
+
+    def _map_vectors(self) -> None:
+        assert self._dimension is not None
+        if self._directory is None or not self._size:
+            return
+        self._matrix = np.memmap(
+            self._file(self.VECTORS_FILE),
+            dtype=np.float32,
+            mode="r+",
+            shape=(self._size, self._dimension),
+        )
+
+    def _append_log(self, records: List[dict]) -> None:
+        if self._directory is None:
+            return
+        with open(self._file(self.RECORDS_FILE), "a") as records_file:
+            for record in records:
+                records_file.write(json.dumps(record) + "\n")
+
+    def _append_vectors(self, vectors: np.ndarray) -> None:
+        """Add rows to the matrix, growing the in-memory buffer or the mapped file."""
+        assert self._dimension is not None
+        new_size = self._size + len(vectors)
+
+        if self._directory is not None:
+            with open(self._file(self.VECTORS_FILE), "ab") as vectors_file:
+                vectors_file.write(vectors.tobytes())
+            self._size = new_size
+            self._map_vectors()
+        else:
+            capacity = 0 if self._matrix is None else len(self._matrix)
+            if new_size > capacity:
+                grown = np.zeros((max(new_size, 2 * capacity, 64), self._dimension), np.float32)
+                if self._matrix is not None:
+                    grown[: self._size] = self._matrix[: self._size]
+                self._matrix = grown
+            assert self._matrix is not None
+            self._matrix[self._size : new_size] = vectors
+            self._size = new_size
+
+        self._alive = np.concatenate([self._alive, np.zeros(len(vectors), dtype=bool)])
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def collection_exists(self) -> bool:
+        return self._dimension is not None
+
+    def create_collection(self, dimension: int) -> None:
+        with self._lock:
+            self._dimension = dimension
+            if self._directory is None:
+                return
+            os.makedirs(self._directory, exist_ok=True)
+            open(self._file(self.VECTORS_FILE), "wb").close()
+            open(self._file(self.RECORDS_FILE), "w").close()
+            with open(self._file(self.META_FILE), "w") as meta_file:
+                json.dump({"dimension": dimension}, meta_file)
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[dict]) -> None:
+        vectors = self._normalize(vectors)
+        with self._lock:
+            new_vectors: List[np.ndarray] = []
+            # Rows of the IDs new in this batch, a repeated ID overwrites its pending row
+            # instead of adding another one: the last write wins, as in Qdrant
+            pending_rows: Dict[str, int] = {}
+            records: Dict[str, dict] = {}
+            for point_id, vector, payload in zip(ids, vectors, payloads):
+                point_id = str(point_id)
+                row = self._rows.get(point_id)
+                if row is not None:
+                    assert self._matrix is not None
+                    self._matrix[row] = vector
+                elif point_id in pending_rows:
+                    row = pending_rows[point_id]
+                    new_vectors[row - self._size] = vector
+                else:
+                    row = pending_rows[point_id] = self._size + len(new_vectors)
+                    new_vectors.append(vector)
+                records[point_id] = {"row": row, "id": point_id, "payload": payload}
+
+            if new_vectors:
+                self._append_vectors(np.stack(new_vectors))
+            if isinstance(self._matrix, np.memmap):
+                self._matrix.flush()
+
+            for record in sorted(records.values(), key=lambda record: record["row"]):
+                row = record["row"]
+                if row >= len(self._ids):
+                    self._ids.append(record["id"])
+                    self._payloads.append(record["payload"])
+                else:
+                    self._ids[row] = record["id"]
+                    self._payloads[row] = record["payload"]
+                self._rows[record["id"]] = row
+                self._alive[row] = True
+            self._append_log(list(records.values()))
+
+    def _top_k(self, scores: np.ndarray, k: int, with_vectors: bool) -> List[VectorRecord]:
+        assert self._matrix is not None
+        scores = np.where(self._alive[: self._size], scores, -np.inf)
+        k = min(k, int(np.count_nonzero(self._alive[: self._size])))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            VectorRecord(
+                id=self._ids[row],
+                payload=self._payloads[row],
+                score=float(scores[row]),
+                vector=np.array(self._matrix[row]) if with_vectors else None,
+            )
+            for row in top
+        ]
+
+    def search(self, vector: np.ndarray, k: int, with_vectors: bool = False) -> List[VectorRecord]:
+        return self.search_batch(self._normalize(vector), k, with_vectors)[0]
+
+    def search_batch(
+        self, vectors: np.ndarray, k: int, with_vectors: bool = False
+    ) -> List[List[VectorRecord]]:
+        queries = self._normalize(vectors)
+        with self._lock:
+            if self._matrix is None or not self._size:
+                return [[] for _ in queries]
+            scores = self._matrix[: self._size] @ queries.T
+            return [self._top_k(scores[:, i], k, with_vectors) for i in range(len(queries))]
+
+    def scroll(
+        self,
+        limit: int,
+        offset: ScrollOffset = None,
+        with_vectors: bool = True,
+        payload_filter: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[VectorRecord], ScrollOffset]:
+        with self._lock:
+            rows = np.flatnonzero(self._alive[: self._size])
+            start = int(offset) if offset is not None else 0
+            rows = rows[rows >= start]
+            if payload_filter:
+                conditions = payload_filter.items()
+                matches = (
+                    int(row)
+                    for row in rows
+                    if all(self._payloads[row].get(k) == v for k, v in conditions)
+                )
+                # Stop at the first row of the next page instead of filtering every row
+                page = np.fromiter(itertools.islice(matches, limit + 1), dtype=np.int64)
+            else:
+                page = rows[: limit + 1]
+            records = [
+                VectorRecord(
+                    id=self._ids[row],
+                    payload=self._payloads[row],
+                    vector=np.array(self._matrix[row])
+                    if with_vectors and self._matrix is not None
+                    else None,
+                )
+                for row in page[:limit]
+            ]
+            next_offset = int(page[limit]) if len(page) > limit else None
+            return records, next_offset
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            records = []
+            for point_id in map(str, ids):
+                row = self._rows.pop(point_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    records.append({"id": point_id, "deleted": True})
+            self._append_log(records)
+
+    def count(self) -> int:
+        return len(self._rows)
+
+
+def create_vector_backend(collection_name: str) -> VectorBackend:
+    """Create the vector backend selected by the VECTOR_BACKEND setting."""
+    if settings.VECTOR_BACKEND == "local":
+        return LocalBackend(collection_name, path=settings.LOCAL_VECTOR_INDEX_PATH)
+    if settings.VECTOR_BACKEND == "qdrant":
+        from ai_companion.modules.memory.long_term.qdrant_backend import (
+            QdrantBackend,
+            QdrantSchema,
+        )
+
+        return QdrantBackend(
+            collection_name,
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY,
+            schema=QdrantSchema.from_settings(),
+        )
+    raise ValueError(f"Unknown vector backend: {settings.VECTOR_BACKEND}")
+
+
+def __getattr__(name: str) -> Any:
+    # The Qdrant backend lives in its own module so the local backend does not load qdrant_client
+    if name in ("QdrantBackend", "QdrantSchema"):
+        from ai_companion.modules.memory.long_term import qdrant_backend
+
+        return getattr(qdrant_backend, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
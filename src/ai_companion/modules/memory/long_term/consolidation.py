@@ -0,0 +1,338 @@
+"""Offline consolidation of the long-term memory collection.
+
+Run it periodically, e.g. from cron, to collapse paraphrased and outdated memories. It only
+reports what it would change unless --apply is given:
+
+    uv run python -m ai_companion.modules.memory.long_term.consolidation
+    uv run python -m ai_companion.modules.memory.long_term.consolidation --strategy merge --apply
+    uv run python -m ai_companion.modules.memory.long_term.consolidation --group-by user_id --apply
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_groq import ChatGroq
+from pydantic import BaseModel, Field, SecretStr
+
+from ai_companion.core.prompts import MEMORY_CONSOLIDATION_PROMPT
+from ai_companion.core.provider_gateway import get_provider_gateway
+from ai_companion.modules.memory.long_term.backends import (
+    ScrollOffset,
+    VectorBackend,
+    VectorRecord,
+)
+from ai_companion.modules.memory.long_term.vector_store import get_vector_store_async
+from ai_companion.settings import settings
+
+BatchEmbedder = Callable[[List[str]], Awaitable[np.ndarray]]
+FactMerger = Callable[[List[str]], Awaitable[str]]
+
+
+@dataclass
+class ConsolidationReport:
+    """Outcome of a consolidation run."""
+
+    points_before: int = 0
+    points_after: int = 0
+    clusters: int = 0
+    merged: int = 0
+    deleted: int = 0
+    duration_seconds: float = 0.0
+    dry_run: bool = False
+
+
+class MergedMemory(BaseModel):
+    """A single memory replacing a cluster of similar memories."""
+
+    memory: str = Field(..., description="The merged memory, as one third-person statement")
+
+
+def cluster_similar(
+    vectors: np.ndarray, threshold: float, block_size: int = 1024
+) -> List[List[int]]:
+    """Group rows that are all pairwise at least ``threshold`` similar (complete linkage).
+
+    Each unassigned row seeds a group and takes its unassigned neighbours, most similar first,
+    as long as a neighbour reaches ``threshold`` against every member already in the group. A
+    chain of paraphrases A~B~C where A and C differ, e.g. the names of two siblings, therefore
+    never ends up in one group. Similarities are computed block by block so memory use stays
+    at ``block_size * n``.
+
+    Returns:
+        List[List[int]]: The row indices of every group with more than one member.
+    """
+    n = len(vectors)
+    if n < 2:
+        return []
+    normalized = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    assigned = np.zeros(n, dtype=bool)
+    groups: List[List[int]] = []
+
+    for start in range(0, n, block_size):
+        similarities = normalized[start : start + block_size] @ normalized.T
+        for offset, row in enumerate(similarities):
+            seed = start + offset
+            if assigned[seed]:
+                continue
+            assigned[seed] = True
+            neighbours = np.flatnonzero((row >= threshold) & ~assigned)
+            if not len(neighbours):
+                continue
+            neighbours = neighbours[np.argsort(-row[neighbours], kind="stable")]
+            pairwise = normalized[neighbours] @ normalized[neighbours].T
+            members: List[int] = []
+            for position, candidate in enumerate(neighbours):
+                if all(pairwise[position, other] >= threshold for other in members):
+                    members.append(position)
+            group = [seed, *(int(neighbours[position]) for position in members)]
+            assigned[group] = True
+            groups.append(sorted(group))
+    return groups
+
+
+class MemoryConsolidator:
+    """Collapses clusters of near-duplicate memories into one memory each.
+
+    Memories are scrolled in batches, clustered by vectorized cosine similarity and every
+    cluster is resolved either by keeping its newest memory ("newest") or by merging its facts
+    with the small model ("merge"). Survivors are written with one bulk upsert and the rest
+    removed with one bulk delete.
+
+    The payload filter is applied by the backend while scrolling. With ``group_by``, the
+    memories of each value of that payload field, e.g. each user, are consolidated on their
+    own, so only one group's vectors are held in memory at a time.
+
+    Args:
+        backend: The vector backend holding the memories.
+        embedder: Coroutine embedding a list of texts, used to re-embed merged memories.
+        merger: Coroutine merging a cluster's facts, ordered oldest first, into one memory.
+            Required by the "merge" strategy.
+        threshold: Minimum cosine similarity for two memories to share a cluster.
+        batch_size: Number of points read per scroll request.
+        payload_filter: Only consolidate points whose payload has these values, e.g. to
+            restrict a run to one user once memories carry a user field.
+        group_by: Payload field whose values are consolidated separately, e.g. "user_id".
+    """
+
+    STRATEGIES = ("newest", "merge")
+
+    def __init__(
+        self,
+        backend: VectorBackend,
+        embedder: Optional[BatchEmbedder] = None,
+        merger: Optional[FactMerger] = None,
+        threshold: float = settings.MEMORY_CONSOLIDATION_THRESHOLD,
+        batch_size: int = settings.MEMORY_CONSOLIDATION_BATCH_SIZE,
+        payload_filter: Optional[Dict[str, Any]] = None,
+        group_by: Optional[str] = None,
+    ):
+        self.backend = backend
+        self.embedder = embedder
+        self.merger = merger
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.payload_filter = payload_filter or {}
+        self.group_by = group_by
+        self.logger = logging.getLogger(__name__)
+
+    async def _scroll(
+        self, payload_filter: Dict[str, Any], with_vectors: bool
+    ) -> AsyncIterator[List[VectorRecord]]:
+        offset: ScrollOffset = None
+        while True:
+            page, offset = await asyncio.to_thread(
+                self.backend.scroll, self.batch_size, offset, with_vectors, payload_filter
+            )
+            yield page
+            if offset is None:
+                return
+
+    async def _groups(self) -> List[Dict[str, Any]]:
+        """The payload filter of every group to consolidate on its own."""
+        if self.group_by is None:
+            return [self.payload_filter]
+        values: Dict[Any, None] = {}
+        # Payloads only, the vectors are read group by group
+        async for page in self._scroll(self.payload_filter, with_vectors=False):
+            # Memories without the field belong to no group and are left alone
+            values.update(
+                (record.payload[self.group_by], None)
+                for record in page
+                if record.payload.get(self.group_by) is not None
+            )
+        return [{**self.payload_filter, self.group_by: value} for value in values]
+
+    async def _load(self, payload_filter: Dict[str, Any]) -> List[Tuple[VectorRecord, np.ndarray]]:
+        records = []
+        async for page in self._scroll(payload_filter, with_vectors=True):
+            records.extend((record, record.vector) for record in page if record.vector is not None)
+        return records
+
+    async def _merge_clusters(self, clusters: List[List[VectorRecord]]) -> List[str]:
+        if self.merger is None or self.embedder is None:
+            raise ValueError("The merge strategy needs a merger and an embedder")
+        return list(
+            await asyncio.gather(
+                *(self.merger([record.payload.get("text", "") for record in c]) for c in clusters)
+            )
+        )
+
+    async def run(self, strategy: str = "newest", dry_run: bool = True) -> ConsolidationReport:
+        """Consolidate the collection.
+
+        Args:
+            strategy: "newest" keeps the newest memory of each cluster, "merge" replaces the
+                cluster with a merged memory written by the small model.
+            dry_run: Report what would change without writing anything, pass False to apply.
+
+        Returns:
+            ConsolidationReport: Collection size before and after and the changes made.
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {self.STRATEGIES}")
+
+        started = time.perf_counter()
+        report = ConsolidationReport(dry_run=dry_run)
+        report.points_before = await asyncio.to_thread(self.backend.count)
+
+        for payload_filter in await self._groups():
+            await self._consolidate(payload_filter, strategy, dry_run, report)
+
+        report.points_after = (
+            report.points_before - report.deleted
+            if dry_run
+            else await asyncio.to_thread(self.backend.count)
+        )
+        report.duration_seconds = time.perf_counter() - started
+        return report
+
+    async def _consolidate(
+        self,
+        payload_filter: Dict[str, Any],
+        strategy: str,
+        dry_run: bool,
+        report: ConsolidationReport,
+    ) -> None:
+        loaded = await self._load(payload_filter)
+        if len(loaded) < 2:
+            return
+        vectors = np.stack([vector for _, vector in loaded])
+        clusters = [
+            # Oldest first, so the newest memory is last
+            sorted((loaded[i][0] for i in members), key=lambda r: r.payload.get("timestamp") or "")
+            for members in cluster_similar(vectors, self.threshold)
+        ]
+        if not clusters:
+            return
+        report.clusters += len(clusters)
+
+        survivors = [cluster[-1] for cluster in clusters]
+        delete_ids = [record.id for cluster in clusters for record in cluster[:-1]]
+        report.deleted += len(delete_ids)
+
+        embeddings: Optional[np.ndarray] = None
+        if strategy == "merge":
+            texts = await self._merge_clusters(clusters)
+            assert self.embedder is not None
+            embeddings = await self.embedder(texts)
+            survivors = [
+                VectorRecord(id=survivor.id, payload={**survivor.payload, "text": text})
+                for survivor, text in zip(survivors, texts)
+            ]
+            report.merged += len(survivors)
+
+        for cluster, survivor in zip(clusters, survivors):
+            self.logger.info(
+                f"Consolidating {[r.payload.get('text') for r in cluster]} "
+                f"into '{survivor.payload.get('text')}'"
+            )
+
+        if not dry_run:
+            # Write survivors before deleting, an interrupted run leaves duplicates, not gaps
+            if embeddings is not None:
+                await asyncio.to_thread(
+                    self.backend.upsert,
+                    [s.id for s in survivors],
+                    np.asarray(embeddings),
+                    [s.payload for s in survivors],
+                )
+            await asyncio.to_thread(self.backend.delete, delete_ids)
+
+
+@lru_cache
+def _merge_chain():
+    return ChatGroq(
+        model=settings.SMALL_TEXT_MODEL_NAME,
+        api_key=SecretStr(settings.GROQ_API_KEY) if settings.GROQ_API_KEY else None,
+        temperature=0.1,
+        max_retries=0,
+    ).with_structured_output(MergedMemory)
+
+
+async def merge_facts(facts: List[str]) -> str:
+    """Merge similar facts, ordered oldest first, into one memory with the small model."""
+    numbered = "\n".join(f'{i}. "{fact}"' for i, fact in enumerate(facts, start=1))
+    prompt = MEMORY_CONSOLIDATION_PROMPT.format(facts=numbered)
+    result = await get_provider_gateway("groq").call(_merge_chain().ainvoke, prompt)
+    merged = result if isinstance(result, MergedMemory) else MergedMemory.model_validate(result)
+    return merged.memory.strip() or facts[-1]
+
+
+async def get_memory_consolidator(**kwargs: Any) -> MemoryConsolidator:
+    """Create a consolidator for the long-term memory collection."""
+    vector_store = await get_vector_store_async()
+    model = await vector_store.get_model()
+
+    async def embed(texts: List[str]) -> np.ndarray:
+        return await asyncio.to_thread(model.encode, texts, normalize_embeddings=True)
+
+    return MemoryConsolidator(
+        backend=await vector_store.get_backend(), embedder=embed, merger=merge_facts, **kwargs
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Consolidate the long-term memory collection.")
+    parser.add_argument("--strategy", choices=MemoryConsolidator.STRATEGIES, default="newest")
+    parser.add_argument("--threshold", type=float, default=settings.MEMORY_CONSOLIDATION_THRESHOLD)
+    parser.add_argument("--batch-size", type=int, default=settings.MEMORY_CONSOLIDATION_BATCH_SIZE)
+    parser.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Only consolidate memories whose payload has this value, can be repeated",
+    )
+    parser.add_argument(
+        "--group-by",
+        metavar="KEY",
+        help="Consolidate the memories of each value of this payload field separately",
+    )
+    parser.add_argument(
+        "--apply", action="store_true", help="Write the changes, the default is a dry run"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    consolidator = await get_memory_consolidator(
+        threshold=args.threshold,
+        batch_size=args.batch_size,
+        payload_filter=dict(condition.split("=", 1) for condition in args.where),
+        group_by=args.group_by,
+    )
+    report = await consolidator.run(strategy=args.strategy, dry_run=not args.apply)
+    print(
+        f"{'Would consolidate' if report.dry_run else 'Consolidated'} {report.clusters} clusters: "
+        f"{report.points_before} -> {report.points_after} memories "
+        f"({report.deleted} deleted, {report.merged} merged) in {report.duration_seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,283 @@
+"""Shared embedding service for several graph worker processes.
+
+One process loads the embedding model and serves encode requests over a Unix socket, so
+that N graph workers do not hold N copies of the model. Requests from all connections are
+gathered into batches of up to EMBEDDING_SERVICE_MAX_BATCH texts, waiting at most
+EMBEDDING_SERVICE_BATCH_WAIT_MS for a batch to fill.
+
+    # Start the service, then the graph workers with EMBEDDING_SERVICE_SOCKET set
+    uv run python -m ai_companion.modules.memory.long_term.embedding_service \\
+        --socket /tmp/sabi-mate-embeddings.sock
+    EMBEDDING_SERVICE_SOCKET=/tmp/sabi-mate-embeddings.sock uv run uvicorn ... --workers 4
+
+Each message is a 4-byte big-endian length followed by that many bytes. A request is one
+JSON message. A response is a JSON header message, followed by a message with the raw float32
+vectors for encode requests. The client wraps the received buffer with ``np.frombuffer``
+instead of copying or parsing it.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import Any, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ai_companion.modules.memory.long_term.embeddings import load_embedding_model
+from ai_companion.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+
+
+class EmbeddingServiceError(RuntimeError):
+    """The embedding service rejected a request or could not be reached."""
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise EmbeddingServiceError("The embedding service closed the connection")
+        received += count
+    return buffer
+
+
+def _recv_message(sock: socket.socket) -> bytearray:
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return _recv_exactly(sock, size)
+
+
+def _send_message(sock: socket.socket, payload: bytes) -> None:
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+class RemoteEmbeddingModel:
+    """Client of the embedding service with the part of the SentenceTransformer API we use.
+
+    Thread-safe: each thread keeps its own connection, reconnecting after errors.
+
+    Args:
+        socket_path: Path of the service's Unix socket.
+        timeout: Seconds to wait for a response.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._dimension: Optional[int] = None
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "socket", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise EmbeddingServiceError(
+                    f"Cannot reach the embedding service at {self.socket_path}: {e}"
+                ) from e
+            self._local.socket = sock
+        return sock
+
+    def _request(self, request: dict, with_vectors: bool) -> Tuple[dict, Optional[bytearray]]:
+        sock = self._connection()
+        try:
+            _send_message(sock, json.dumps(request).encode())
+            header = json.loads(_recv_message(sock))
+            if "error" in header:
+                raise EmbeddingServiceError(header["error"])
+            return header, _recv_message(sock) if with_vectors else None
+        except (OSError, EmbeddingServiceError, ValueError):
+            # The stream may be out of sync, start over on the next request
+            sock.close()
+            self._local.socket = None
+            raise
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            header, _ = self._request({"op": "info"}, with_vectors=False)
+            self._dimension = int(header["dimension"])
+        return self._dimension
+
+    def encode(
+        self, sentences: Union[str, List[str]], normalize_embeddings: bool = False, **kwargs: Any
+    ) -> np.ndarray:
+        """Encode one text to a 1-D vector, or a list of texts to a 2-D array."""
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        header, payload = self._request(
+            {"op": "encode", "texts": texts, "normalize": normalize_embeddings},
+            with_vectors=True,
+        )
+        assert payload is not None
+        vectors = np.frombuffer(payload, dtype=np.float32).reshape(header["shape"])
+        return vectors[0] if isinstance(sentences, str) else vectors
+
+
+class EmbeddingServer:
+    """Serves a model's embeddings over a Unix socket, batching concurrent requests.
+
+    Args:
+        model: A SentenceTransformer, or anything with the same ``encode`` and
+            ``get_sentence_embedding_dimension``.
+        max_batch: Most texts encoded in one call.
+        batch_wait_seconds: How long the first request of a batch waits for more.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        max_batch: int = settings.EMBEDDING_SERVICE_MAX_BATCH,
+        batch_wait_seconds: float = settings.EMBEDDING_SERVICE_BATCH_WAIT_MS / 1000,
+    ):
+        self.model = model
+        self.max_batch = max_batch
+        self.batch_wait_seconds = batch_wait_seconds
+        self.batches = 0
+        self._queue: "asyncio.Queue[Tuple[List[str], bool, asyncio.Future]]" = asyncio.Queue()
+
+    async def encode(self, texts: List[str], normalize: bool) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, normalize, future))
+        return await future
+
+    async def _next_batch(self) -> List[Tuple[List[str], bool, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = asyncio.get_running_loop().time() + self.batch_wait_seconds
+        while size < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def run_batches(self) -> None:
+        """Encode queued requests batch by batch, forever."""
+        while True:
+            batch = await self._next_batch()
+            texts = [text for request_texts, _, _ in batch for text in request_texts]
+            try:
+                vectors = await asyncio.to_thread(
+                    self.model.encode, texts, normalize_embeddings=False
+                )
+                vectors = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+
+            start = 0
+            for request_texts, normalize, future in batch:
+                rows = vectors[start : start + len(request_texts)]
+                start += len(request_texts)
+                if normalize:
+                    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+                    rows = rows / np.where(norms == 0, 1.0, norms)
+                if not future.done():
+                    future.set_result(rows)
+
+    async def _respond(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        op = request.get("op")
+        if op == "info":
+            self._write(writer, {"dimension": self.model.get_sentence_embedding_dimension()})
+            return
+        if op != "encode" or not isinstance(request.get("texts"), list):
+            self._write(writer, {"error": f"Bad request: {op}"})
+            return
+
+        vectors = await self.encode(request["texts"], bool(request.get("normalize")))
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._write(writer, {"shape": list(vectors.shape)})
+        # The vectors go out as raw bytes, straight from the array's buffer
+        payload = memoryview(vectors).cast("B")
+        writer.write(_LENGTH.pack(payload.nbytes))
+        writer.write(payload)
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, header: dict) -> None:
+        payload = json.dumps(header).encode()
+        writer.write(_LENGTH.pack(len(payload)) + payload)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                    request = json.loads(await reader.readexactly(size))
+                except asyncio.IncompleteReadError:
+                    return
+                try:
+                    await self._respond(request, writer)
+                except Exception as e:
+                    logger.exception("Embedding request failed")
+                    self._write(writer, {"error": str(e)})
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: str, ready: Optional[threading.Event] = None) -> None:
+        """Listen on ``socket_path`` until cancelled."""
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=socket_path)
+        batcher = asyncio.create_task(self.run_batches())
+        logger.info(f"Embedding service listening on {socket_path}")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve memory embeddings over a Unix socket.")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SERVICE_SOCKET)
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--max-batch", type=int, default=settings.EMBEDDING_SERVICE_MAX_BATCH)
+    parser.add_argument(
+        "--batch-wait-ms", type=float, default=settings.EMBEDDING_SERVICE_BATCH_WAIT_MS
+    )
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("--socket is required when EMBEDDING_SERVICE_SOCKET is not set")
+
+    logging.basicConfig(level=logging.INFO)
+    server = EmbeddingServer(
+        load_embedding_model(args.model),
+        max_batch=args.max_batch,
+        batch_wait_seconds=args.batch_wait_ms / 1000,
+    )
+    try:
+        asyncio.run(server.serve(args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
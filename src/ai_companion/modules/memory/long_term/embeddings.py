@@ -0,0 +1,53 @@
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ai_companion.settings import settings
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+EMBEDDING_ENGINES = ("torch", "onnx", "onnx-int8")
+
+
+def load_embedding_model(
+    model_name: str,
+    engine: str = settings.EMBEDDING_ENGINE,
+    dimensions: Optional[int] = settings.EMBEDDING_DIMENSIONS,
+) -> "SentenceTransformer":
+    """Load a SentenceTransformer with the configured inference engine.
+
+    Args:
+        model_name: The model to load, e.g. "all-MiniLM-L6-v2".
+        engine: "torch" for the fp32 PyTorch model, "onnx" for ONNX Runtime, or "onnx-int8"
+            for the int8-quantized ONNX export shipped with the model.
+        dimensions: Truncate embeddings to this many dimensions (Matryoshka-style), or None
+            to keep the full size.
+
+    Returns:
+        SentenceTransformer: The loaded model.
+
+    Raises:
+        ValueError: If the engine is unknown.
+        ImportError: If an ONNX engine is requested without ONNX Runtime installed.
+    """
+    # Imported here, loading torch takes seconds and is only needed once a model is used
+    from sentence_transformers import SentenceTransformer
+
+    if engine not in EMBEDDING_ENGINES:
+        raise ValueError(
+            f"Unknown embedding engine '{engine}', expected one of {EMBEDDING_ENGINES}"
+        )
+
+    kwargs: Dict[str, Any] = {"truncate_dim": dimensions}
+    if engine != "torch":
+        try:
+            import onnxruntime  # noqa: F401  # pyright: ignore[reportMissingImports]
+        except ImportError as e:
+            raise ImportError(
+                f"The '{engine}' embedding engine needs ONNX Runtime. "
+                "Install it with: pip install 'sentence-transformers[onnx]'"
+            ) from e
+        kwargs["backend"] = "onnx"
+        if engine == "onnx-int8":
+            kwargs["model_kwargs"] = {"file_name": settings.EMBEDDING_ONNX_INT8_FILE}
+
+    return SentenceTransformer(model_name, **kwargs)
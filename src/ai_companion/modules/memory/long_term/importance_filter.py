@@ -0,0 +1,195 @@
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from ai_companion.core.response_cache import Embedder, normalize_cache_key
+from ai_companion.modules.memory.long_term.vector_store import embed_text_async
+from ai_companion.settings import settings
+
+# Messages that never carry a personal fact on their own
+SMALL_TALK = {
+    "hi",
+    "hey",
+    "hello",
+    "yo",
+    "ok",
+    "okay",
+    "k",
+    "kk",
+    "lol",
+    "lmao",
+    "haha",
+    "hahaha",
+    "thanks",
+    "thank you",
+    "thx",
+    "yes",
+    "no",
+    "yeah",
+    "nope",
+    "sure",
+    "cool",
+    "nice",
+    "wow",
+    "good morning",
+    "good night",
+    "how far",
+    "how you dey",
+    "i dey",
+    "na so",
+    "oya",
+    "abeg",
+    "wetin dey",
+}
+
+_FIRST_PERSON = re.compile(
+    r"\b(i|i'm|im|i've|i'd|i'll|my|mine|me|myself|we|our|ours|i\s+dey|i\s+be|na\s+me)\b",
+    re.IGNORECASE,
+)
+_REMEMBER = re.compile(r"\b(remember|note|don't forget|no forget)\b", re.IGNORECASE)
+_NUMBER = re.compile(r"\d")
+# A capitalized word that does not start a sentence, e.g. "I work at Groq"
+_NAMED_ENTITY = re.compile(r"(?<![.!?]\s)(?<!^)\b[A-Z][a-z]+")
+# Only capitalized words, e.g. the short answer "Port Harcourt"
+_PROPER_NAME = re.compile(r"^(?:[A-Z][\w'-]*\s*)+$")
+_HAS_WORD = re.compile(r"\w")
+
+FACT_EXAMPLES = [
+    "My name is Tobi",
+    "I work as a nurse in Ibadan",
+    "I just moved to Berlin for school",
+    "My sister is getting married next month",
+    "I love jollof rice and afrobeats",
+    "I'm studying computer science",
+]
+
+SMALL_TALK_EXAMPLES = [
+    "How are you doing today",
+    "That's so funny",
+    "What are you up to",
+    "Tell me something interesting",
+    "Can you send me a picture",
+    "Okay sounds good",
+]
+
+
+@dataclass
+class FilterStats:
+    """Counters of messages checked by the importance filter."""
+
+    checked: int = 0
+    passed: int = 0
+    skipped: int = 0
+
+    @property
+    def pass_through_rate(self) -> float:
+        return self.passed / self.checked if self.checked else 0.0
+
+
+def heuristic_verdict(
+    text: str,
+    min_words: int = settings.MEMORY_FILTER_MIN_WORDS,
+    previous: Optional[str] = None,
+) -> Optional[bool]:
+    """Classify a message with cheap local heuristics.
+
+    Args:
+        text: The user's message.
+        min_words: Messages shorter than this rarely carry a fact on their own.
+        previous: SabiMate's message before it. A short reply to a question, such as "nurse"
+            after "What do you do for work?", is kept.
+
+    Returns:
+        Optional[bool]: True if the message plausibly carries a fact, False if it almost
+            certainly does not, None if the heuristics cannot tell.
+    """
+    stripped = text.strip()
+    if not _HAS_WORD.search(stripped):
+        # Empty, emoji or punctuation only
+        return False
+    if normalize_cache_key(stripped) in SMALL_TALK:
+        return False
+    if _FIRST_PERSON.search(stripped) or _REMEMBER.search(stripped):
+        return True
+    # Short answers such as "23", "born 1999" or "Lagos" are facts, check them before the length
+    if _NUMBER.search(stripped) or _NAMED_ENTITY.search(stripped):
+        return True
+    if len(stripped.split()) < min_words:
+        return bool(_PROPER_NAME.match(stripped)) or bool(previous and "?" in previous)
+    return None
+
+
+class ImportanceFilter:
+    """Local gate in front of the memory analysis LLM call.
+
+    Heuristics (first-person statements, numbers, named entities, message length, whether
+    SabiMate just asked a question) decide most messages. Messages they cannot decide are passed to the LLM, or, when an embedder is
+    given, classified by their similarity to fact-bearing and small-talk example sentences.
+
+    Args:
+        embedder: Optional coroutine returning normalized embeddings for the classifier.
+        margin: How much closer to the fact examples than to the small-talk examples an
+            undecided message must be to pass the classifier.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        margin: float = settings.MEMORY_FILTER_CLASSIFIER_MARGIN,
+    ):
+        self._embedder = embedder
+        self.margin = margin
+        self._centroids: Optional[np.ndarray] = None
+        self.stats = FilterStats()
+        self._logger = logging.getLogger(__name__)
+
+    async def _embed_centroid(self, examples: List[str]) -> np.ndarray:
+        assert self._embedder is not None
+        vectors = np.stack([await self._embedder(example) for example in examples])
+        centroid = vectors.mean(axis=0)
+        return centroid / np.linalg.norm(centroid)
+
+    async def _classify(self, text: str) -> bool:
+        assert self._embedder is not None
+        if self._centroids is None:
+            self._centroids = np.stack(
+                [
+                    await self._embed_centroid(FACT_EXAMPLES),
+                    await self._embed_centroid(SMALL_TALK_EXAMPLES),
+                ]
+            )
+        fact_similarity, small_talk_similarity = self._centroids @ await self._embedder(text)
+        return bool(fact_similarity - small_talk_similarity >= self.margin)
+
+    async def should_analyze(self, text: str, previous: Optional[str] = None) -> bool:
+        """Decide whether a message is worth sending to the memory analysis LLM.
+
+        Args:
+            text: The user's message.
+            previous: SabiMate's message before it, if any.
+        """
+        verdict = heuristic_verdict(text, previous=previous)
+        if verdict is None:
+            verdict = await self._classify(text) if self._embedder is not None else True
+
+        self.stats.checked += 1
+        if verdict:
+            self.stats.passed += 1
+        else:
+            self.stats.skipped += 1
+            self._logger.debug(
+                f"Skipped memory analysis ({self.stats.skipped}/{self.stats.checked} skipped, "
+                f"pass-through rate {self.stats.pass_through_rate:.0%})"
+            )
+        return verdict
+
+
+@lru_cache
+def get_importance_filter() -> ImportanceFilter:
+    """Get the shared ImportanceFilter, so its counters cover the whole process."""
+    embedder = embed_text_async if settings.MEMORY_FILTER_CLASSIFIER_ENABLED else None
+    return ImportanceFilter(embedder=embedder)
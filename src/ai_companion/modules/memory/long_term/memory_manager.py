@@ -1,16 +1,20 @@
 import logging
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Sequence, Union
 
-from ai_companion.core.prompts import MEMORY_ANALYSIS_PROMPT
+from ai_companion.core.prompts import MEMORY_ANALYSIS_PROMPT, MEMORY_BATCH_ANALYSIS_PROMPT
+from ai_companion.core.provider_gateway import get_provider_gateway
+from ai_companion.core.response_cache import cacheable_text, get_response_cache
+from ai_companion.modules.memory.long_term.importance_filter import get_importance_filter
+from ai_companion.modules.memory.long_term.reranking import rerank_memories
 from ai_companion.modules.memory.long_term.vector_store import (
+    embed_text_async,
     get_vector_store,
     get_vector_store_async,
 )
 from ai_companion.settings import settings
 from langchain_core.messages import BaseMessage
-from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field, SecretStr
 
 
@@ -24,43 +28,132 @@ class MemoryAnalysis(BaseModel):
     formatted_memory: Optional[str] = Field(..., description="The formatted memory to be stored")
 
 
+class MemoryBatchAnalysis(BaseModel):
+    """Result of analyzing several messages for memory-worthy content in one call."""
+
+    memories: List[str] = Field(
+        default_factory=list,
+        description="Every important fact found in the messages, each as a formatted memory",
+    )
+
+
 class MemoryManager:
     """Manager class for handling long-term memory operations."""
 
     def __init__(self):
+        # Imported here so that importing the graph does not load the Groq SDK
+        from langchain_groq import ChatGroq
+
         self.vector_store = get_vector_store()
         self.logger = logging.getLogger(__name__)
-        self.llm = ChatGroq(
+        chat_model = ChatGroq(
             model=settings.SMALL_TEXT_MODEL_NAME,
             api_key=SecretStr(settings.GROQ_API_KEY) if settings.GROQ_API_KEY else None,
             temperature=0.1,
-            max_retries=2,
-        ).with_structured_output(MemoryAnalysis)
+            max_retries=0,
+        )
+        self.llm = chat_model.with_structured_output(MemoryAnalysis)
+        self.batch_llm = chat_model.with_structured_output(MemoryBatchAnalysis)
+        self.cache = (
+            get_response_cache("memory_analysis", embed_text_async)
+            if settings.LLM_CACHE_ENABLED
+            else None
+        )
 
     async def _analyze_memory(self, message: str) -> MemoryAnalysis:
         """Analyze a message to determine importance and format if needed."""
+        cache_key = cacheable_text(message) if self.cache is not None else None
+        if self.cache is not None and cache_key is not None:
+            cached = await self.cache.aget(cache_key)
+            if cached is not None:
+                return cached
+
         prompt = MEMORY_ANALYSIS_PROMPT.format(message=message)
-        result = await self.llm.ainvoke(prompt)
+        result = await get_provider_gateway("groq").call(self.llm.ainvoke, prompt)
         if isinstance(result, dict):
-            return MemoryAnalysis(**result)
-        if not isinstance(result, MemoryAnalysis):
+            analysis = MemoryAnalysis(**result)
+        elif not isinstance(result, MemoryAnalysis):
             # Convert BaseModel to MemoryAnalysis if needed
-            return MemoryAnalysis(**result.dict())
-        return result
+            analysis = MemoryAnalysis(**result.dict())
+        else:
+            analysis = result
 
-    async def extract_and_store_memories(self, message: BaseMessage) -> None:
-        """Extract important information from a message and store in vector store."""
-        if message.type != "human":
-            return
+        if self.cache is not None and cache_key is not None:
+            await self.cache.aput(cache_key, analysis)
+        return analysis
 
-        # Ensure we have a string content to analyze
+    async def _analyze_memories_batch(self, messages: List[str]) -> MemoryBatchAnalysis:
+        """Analyze several messages in one call and collect every memory they contain."""
+        numbered = "\n".join(f'{i}. "{message}"' for i, message in enumerate(messages, start=1))
+        prompt = MEMORY_BATCH_ANALYSIS_PROMPT.format(messages=numbered)
+        result = await get_provider_gateway("groq").call(self.batch_llm.ainvoke, prompt)
+        if isinstance(result, dict):
+            return MemoryBatchAnalysis(**result)
+        if not isinstance(result, MemoryBatchAnalysis):
+            return MemoryBatchAnalysis(**result.dict())
+        return result
+
+    @staticmethod
+    def _message_text(message: BaseMessage) -> str:
+        """Get the text content of a message."""
         content = message.content
         if isinstance(content, list):
             # Convert list content to string by taking text parts
-            content = " ".join([item for item in content if isinstance(item, str)])
-        elif not isinstance(content, str):
+            return " ".join([item for item in content if isinstance(item, str)])
+        if not isinstance(content, str):
             # If not a string or list, try to convert to string
-            content = str(content)
+            return str(content)
+        return content
+
+    @classmethod
+    def build_memory_queries(
+        cls,
+        messages: Sequence[BaseMessage],
+        max_turns: int = settings.MEMORY_QUERY_MAX_TURNS,
+        max_chars: int = settings.MEMORY_QUERY_MAX_CHARS,
+    ) -> List[str]:
+        """Build recall queries from the most recent user messages, newest first.
+
+        AI replies are left out so long answers do not dominate the query embedding, and each
+        message is cut to ``max_chars`` to keep the embedding time bounded.
+        """
+        queries: List[str] = []
+        for message in reversed(messages):
+            if len(queries) >= max_turns:
+                break
+            if message.type != "human":
+                continue
+            text = cls._message_text(message).strip()
+            if len(text) > max_chars:
+                text = text[:max_chars].rsplit(" ", 1)[0]
+            if text:
+                queries.append(text)
+        return queries
+
+    async def extract_and_store_memories(
+        self, message: BaseMessage, previous: Optional[BaseMessage] = None
+    ) -> None:
+        """Extract important information from a message and store in vector store.
+
+        Args:
+            message: The message to analyze, only human messages are.
+            previous: The message before it. When SabiMate asked a question there, short
+                answers are analyzed too.
+        """
+        if message.type != "human":
+            return
+
+        # Ensure we have a string content to analyze
+        content = self._message_text(message)
+        question = (
+            self._message_text(previous) if previous is not None and previous.type == "ai" else None
+        )
+
+        # Skip the LLM call for greetings, emojis and other messages without facts
+        if settings.MEMORY_FILTER_ENABLED and not await get_importance_filter().should_analyze(
+            content, question
+        ):
+            return
 
         # Analyze the message for importance and formatting
         analysis = await self._analyze_memory(content)
@@ -85,10 +178,66 @@ class MemoryManager:
                 },
             )
 
-    async def get_relevant_memories_async(self, context: str) -> List[str]:
-        """Retrieve relevant memories based on the current context asynchronously."""
+    async def extract_and_store_memories_batch(self, messages: List[BaseMessage]) -> List[str]:
+        """Extract the memories of several messages with one LLM call and store them in one batch.
+
+        Args:
+            messages: The messages to analyze. Only human messages are, the AI messages between
+                them show the filter which replies answer a question.
+
+        Returns:
+            List[str]: The memories that were stored.
+        """
+        importance_filter = get_importance_filter() if settings.MEMORY_FILTER_ENABLED else None
+        contents: List[str] = []
+        question: Optional[str] = None
+        for message in messages:
+            if message.type == "ai":
+                question = self._message_text(message)
+                continue
+            if message.type != "human":
+                continue
+            content = self._message_text(message)
+            if importance_filter is None or await importance_filter.should_analyze(
+                content, question
+            ):
+                contents.append(content)
+            question = None
+        if not contents:
+            return []
+
+        analysis = await self._analyze_memories_batch(contents)
+
+        # Drop empty and repeated memories before touching the vector store
+        memories = list(dict.fromkeys(m.strip() for m in analysis.memories if m and m.strip()))
+        if not memories:
+            return []
+
         vector_store = await get_vector_store_async()
-        memories = await vector_store.search_memories_async(context, k=settings.MEMORY_TOP_K)
+        stored = await vector_store.store_memories_async(memories)
+        self.logger.info(f"Stored {len(stored)} of {len(memories)} extracted memories: {stored}")
+        return stored
+
+    async def get_relevant_memories_async(self, context: Union[str, List[str]]) -> List[str]:
+        """Retrieve relevant memories based on the current context asynchronously.
+
+        Args:
+            context: A query text, or several queries (see ``build_memory_queries``) that are
+                searched in one batch and merged by score.
+        """
+        vector_store = await get_vector_store_async()
+        queries = [context] if isinstance(context, str) else context
+        if settings.MEMORY_RERANK_ENABLED:
+            # Over-fetch, then keep the most relevant, current and distinct memories
+            candidates = await vector_store.search_memories_batch_async(
+                queries, k=settings.MEMORY_CANDIDATE_POOL, with_vectors=True
+            )
+            memories = rerank_memories(candidates, k=settings.MEMORY_TOP_K)
+        else:
+            memories = await vector_store.search_memories_batch_async(
+                queries, k=settings.MEMORY_TOP_K
+            )
+            memories = memories[: settings.MEMORY_TOP_K]
         if memories:
             for memory in memories:
                 self.logger.debug(f"Memory: '{memory.text}' (score: {memory.score:.2f})")
@@ -99,13 +248,20 @@ class MemoryManager:
         Note: This method is blocking and should not be used in async contexts.
         Use get_relevant_memories_async instead when in an async context.
         """
-        memories = self.vector_store.search_memories(context, k=settings.MEMORY_TOP_K)
+        if settings.MEMORY_RERANK_ENABLED:
+            candidates = self.vector_store.search_memories(
+                context, k=settings.MEMORY_CANDIDATE_POOL, with_vectors=True
+            )
+            memories = rerank_memories(candidates, k=settings.MEMORY_TOP_K)
+        else:
+            memories = self.vector_store.search_memories(context, k=settings.MEMORY_TOP_K)
         if memories:
             for memory in memories:
                 self.logger.debug(f"Memory: '{memory.text}' (score: {memory.score:.2f})")
         return [memory.text for memory in memories]
 
-    def format_memories_for_prompt(self, memories: List[str]) -> str:
+    @staticmethod
+    def format_memories_for_prompt(memories: List[str]) -> str:
         """Format retrieved memories as bullet points."""
         if not memories:
             return ""
@@ -0,0 +1,395 @@
+"""Bulk export, import and re-embedding of the long-term memory collection.
+
+    # Stream the collection to a file, optionally with the stored vectors
+    uv run python -m ai_companion.modules.memory.long_term.migration export memories.jsonl
+    uv run python -m ai_companion.modules.memory.long_term.migration export memories.parquet
+
+    # Load a file into a collection, re-embedding points stored without vectors
+    uv run python -m ai_companion.modules.memory.long_term.migration import memories.jsonl
+
+    # Re-embed into a new versioned collection with another model, then switch the alias
+    uv run python -m ai_companion.modules.memory.long_term.migration reembed \\
+        --model all-mpnet-base-v2 --target long_term_memory_v2
+
+Re-embedding reads the live collection page by page and encodes in worker processes, so the
+service keeps answering from the old collection until the alias switch, which is atomic in
+Qdrant. Memories stored or updated during the copy are copied in a catch-up pass right before
+the switch. Set EMBEDDING_MODEL_NAME to the new model when deploying the switch.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Deque, Iterator, List, Optional, Protocol, Set, Tuple
+
+import numpy as np
+
+from ai_companion.modules.memory.long_term.backends import (
+    VectorBackend,
+    VectorRecord,
+    create_vector_backend,
+)
+from ai_companion.modules.memory.long_term.embeddings import load_embedding_model
+from ai_companion.modules.memory.long_term.vector_store import Memory, VectorStore
+from ai_companion.settings import settings
+
+if TYPE_CHECKING:
+    from ai_companion.modules.memory.long_term.qdrant_backend import QdrantBackend
+
+DEFAULT_BATCH_SIZE = 256
+
+_worker_model: Any = None
+
+
+def _init_worker(model_name: str, engine: str, dimensions: Optional[int]) -> None:
+    global _worker_model
+    _worker_model = load_embedding_model(model_name, engine=engine, dimensions=dimensions)
+
+
+def _encode(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(texts, normalize_embeddings=True)
+
+
+class EncoderPool:
+    """Encodes batches of texts in worker processes, each holding its own model.
+
+    Args:
+        model_name: The embedding model to load in every worker.
+        workers: Number of worker processes. Keep it below the number of cores left idle by
+            the live service.
+        engine: Embedding engine of the workers, see EMBEDDING_ENGINE.
+        dimensions: Truncated embedding dimension, see EMBEDDING_DIMENSIONS.
+    """
+
+    def __init__(
+        self,
+        model_name: str = settings.EMBEDDING_MODEL_NAME,
+        workers: int = 1,
+        engine: str = settings.EMBEDDING_ENGINE,
+        dimensions: Optional[int] = settings.EMBEDDING_DIMENSIONS,
+    ):
+        self.workers = workers
+        # Spawn, forking a process that may hold torch threads can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, engine, dimensions),
+        )
+
+    def submit(self, texts: List[str]) -> "Future[np.ndarray]":
+        return self._executor.submit(_encode, texts)
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    def __enter__(self) -> "EncoderPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class Encoder(Protocol):
+    """What ``copy_with_embeddings`` needs from an encoder, an EncoderPool in production."""
+
+    workers: int
+
+    def submit(self, texts: List[str]) -> "Future[np.ndarray]": ...
+
+
+def iter_records(
+    backend: VectorBackend, batch_size: int = DEFAULT_BATCH_SIZE, with_vectors: bool = True
+) -> Iterator[List[VectorRecord]]:
+    """Page through every point of a collection."""
+    offset = None
+    while True:
+        records, offset = backend.scroll(batch_size, offset, with_vectors)
+        if records:
+            yield records
+        if offset is None:
+            return
+
+
+def _is_parquet(path: str) -> bool:
+    return path.endswith((".parquet", ".pq"))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet files need pyarrow. Install it with: pip install pyarrow") from e
+    return pyarrow, pyarrow.parquet
+
+
+def _to_row(record: VectorRecord) -> dict:
+    return {
+        "id": record.id,
+        "payload": record.payload,
+        "vector": record.vector.tolist() if record.vector is not None else None,
+    }
+
+
+def _from_row(row: dict) -> VectorRecord:
+    payload = row["payload"]
+    vector = row.get("vector")
+    return VectorRecord(
+        id=str(row["id"]),
+        payload=json.loads(payload) if isinstance(payload, str) else payload,
+        vector=np.asarray(vector, dtype=np.float32) if vector is not None else None,
+    )
+
+
+def export_memories(
+    backend: VectorBackend,
+    path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    with_vectors: bool = False,
+) -> int:
+    """Stream a collection to a JSONL or Parquet file, one page at a time.
+
+    Returns:
+        int: The number of exported points.
+    """
+    exported = 0
+    if _is_parquet(path):
+        pa, pq = _require_pyarrow()
+        schema = pa.schema(
+            [("id", pa.string()), ("payload", pa.string()), ("vector", pa.list_(pa.float32()))]
+        )
+        with pq.ParquetWriter(path, schema) as writer:
+            for records in iter_records(backend, batch_size, with_vectors):
+                rows = [_to_row(record) for record in records]
+                for row in rows:
+                    row["payload"] = json.dumps(row["payload"])
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                exported += len(records)
+        return exported
+
+    with open(path, "w") as f:
+        for records in iter_records(backend, batch_size, with_vectors):
+            f.writelines(json.dumps(_to_row(record)) + "\n" for record in records)
+            exported += len(records)
+    return exported
+
+
+def read_memories(path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[VectorRecord]]:
+    """Stream records from a JSONL or Parquet export in batches."""
+    if _is_parquet(path):
+        _, pq = _require_pyarrow()
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield [_from_row(row) for row in record_batch.to_pylist()]
+        return
+
+    with open(path) as f:
+        batch: List[VectorRecord] = []
+        for line in f:
+            if line.strip():
+                batch.append(_from_row(json.loads(line)))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _write_batch(target: VectorBackend, records: List[VectorRecord], vectors: np.ndarray) -> int:
+    if not target.collection_exists():
+        target.create_collection(int(vectors.shape[1]))
+    target.upsert(
+        [record.id for record in records], vectors, [record.payload for record in records]
+    )
+    return len(records)
+
+
+def copy_with_embeddings(
+    batches: Iterator[List[VectorRecord]],
+    target: VectorBackend,
+    encoder: Encoder,
+    reembed: bool = True,
+    pause_seconds: float = 0.0,
+) -> int:
+    """Write batches of records to a collection, encoding their text where needed.
+
+    Up to two batches per worker are encoded ahead while earlier batches are written, and at
+    most that many batches are held in memory.
+
+    Args:
+        batches: The records to write.
+        target: The collection to write to, created on the first batch if missing.
+        encoder: Workers encoding the text payloads.
+        reembed: Encode every record, not only those without a vector.
+        pause_seconds: Sleep between batches to leave the backend room for live traffic.
+
+    Returns:
+        int: The number of written points.
+    """
+    pending: Deque[Tuple[List[VectorRecord], Optional["Future[np.ndarray]"]]] = deque()
+    written = 0
+
+    def flush_one() -> int:
+        records, future = pending.popleft()
+        if future is not None:
+            vectors = future.result()
+        else:
+            vectors = np.stack([record.vector for record in records])  # type: ignore[misc]
+        count = _write_batch(target, records, vectors)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+        return count
+
+    for records in batches:
+        if reembed or any(record.vector is None for record in records):
+            future = encoder.submit([record.payload.get("text", "") for record in records])
+        else:
+            future = None
+        pending.append((records, future))
+        if len(pending) >= 2 * encoder.workers:
+            written += flush_one()
+
+    while pending:
+        written += flush_one()
+    return written
+
+
+def track_ids(batches: Iterator[List[VectorRecord]], ids: Set[str]) -> Iterator[List[VectorRecord]]:
+    """Pass batches through, adding the ID of every record to ``ids``."""
+    for records in batches:
+        ids.update(record.id for record in records)
+        yield records
+
+
+def iter_changed_records(
+    source: VectorBackend,
+    copied_ids: Set[str],
+    since: datetime,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[List[VectorRecord]]:
+    """Page through the points created or updated after a copy of the collection started.
+
+    Args:
+        source: The live collection.
+        copied_ids: IDs of the points the copy already wrote, see ``track_ids``.
+        since: When the copy started, timezone-aware.
+        batch_size: Points per page.
+    """
+    for records in iter_records(source, batch_size, with_vectors=False):
+        changed = []
+        for record in records:
+            timestamp = Memory.from_record(record).timestamp
+            if record.id not in copied_ids or (timestamp is not None and timestamp >= since):
+                changed.append(record)
+        if changed:
+            yield changed
+
+
+def _require_aliases(target: VectorBackend) -> "QdrantBackend":
+    from ai_companion.modules.memory.long_term.qdrant_backend import QdrantBackend
+
+    if not isinstance(target, QdrantBackend):
+        raise ValueError("Collection aliases need the qdrant vector backend")
+    return target
+
+
+def switch_alias(target: VectorBackend, alias: str, replace_collection: bool = False) -> None:
+    """Point the live collection name at the target collection.
+
+    Args:
+        target: The freshly written collection.
+        alias: The name the service reads from, VectorStore.COLLECTION_NAME.
+        replace_collection: Delete a concrete collection that still holds the alias name. It
+            is gone for a moment before the alias is created, so run it in a quiet period.
+
+    Raises:
+        ValueError: If the backend has no aliases, or the name is taken by a collection and
+            ``replace_collection`` is not set.
+    """
+    target = _require_aliases(target)
+    collections = {col.name for col in target.client.get_collections().collections}
+    if alias in collections:
+        if not replace_collection:
+            raise ValueError(
+                f"'{alias}' is a collection, not an alias. Export it first, then rerun with "
+                "--replace-collection to delete it and create the alias in its place"
+            )
+        target.client.delete_collection(alias)
+    target.switch_alias(alias)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Move memories in and out of the vector store.")
+    parser.add_argument("--collection", default=None, help="Defaults to the live collection")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Write the collection to a JSONL or Parquet file")
+    export.add_argument("path")
+    export.add_argument("--with-vectors", action="store_true")
+
+    load = commands.add_parser("import", help="Load a JSONL or Parquet export")
+    load.add_argument("path")
+    load.add_argument("--reembed", action="store_true", help="Ignore vectors stored in the file")
+    load.add_argument("--workers", type=int, default=1)
+
+    reembed = commands.add_parser("reembed", help="Re-embed into a new collection")
+    reembed.add_argument("--target", required=True, help="New versioned collection name")
+    reembed.add_argument("--model", default=settings.EMBEDDING_MODEL_NAME)
+    reembed.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    reembed.add_argument("--pause-seconds", type=float, default=0.0)
+    reembed.add_argument("--no-alias", action="store_true", help="Leave the alias unchanged")
+    reembed.add_argument("--replace-collection", action="store_true")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    live_name = args.collection or VectorStore.COLLECTION_NAME
+    source = create_vector_backend(live_name)
+    started = time.perf_counter()
+
+    if args.command == "export":
+        count = export_memories(source, args.path, args.batch_size, args.with_vectors)
+        print(f"Exported {count} memories from '{live_name}' to {args.path}")
+    elif args.command == "import":
+        with EncoderPool(workers=args.workers) as encoder:
+            count = copy_with_embeddings(
+                read_memories(args.path, args.batch_size), source, encoder, reembed=args.reembed
+            )
+        print(f"Imported {count} memories from {args.path} into '{live_name}'")
+    else:
+        target = create_vector_backend(args.target)
+        if not args.no_alias:
+            # Fail before the copy, not after it
+            _require_aliases(target)
+        copied_ids: Set[str] = set()
+        copy_started = datetime.now().astimezone()
+        with EncoderPool(model_name=args.model, workers=args.workers) as encoder:
+            count = copy_with_embeddings(
+                track_ids(iter_records(source, args.batch_size, with_vectors=False), copied_ids),
+                target,
+                encoder,
+                pause_seconds=args.pause_seconds,
+            )
+            print(f"Re-embedded {count} memories from '{live_name}' into '{args.target}'")
+            caught_up = copy_with_embeddings(
+                iter_changed_records(source, copied_ids, copy_started, args.batch_size),
+                target,
+                encoder,
+            )
+        print(f"Caught up on {caught_up} memories stored or updated during the copy")
+        if not args.no_alias:
+            switch_alias(target, live_name, args.replace_collection)
+            print(f"'{live_name}' now points to '{args.target}'")
+
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    HnswConfigDiff,
+    MatchValue,
+    PointStruct,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SearchRequest,
+    VectorParams,
+)
+
+from ai_companion.modules.memory.long_term.backends import ScrollOffset, VectorBackend, VectorRecord
+from ai_companion.settings import settings
+
+
+@dataclass
+class QdrantSchema:
+    """Storage and index settings of a Qdrant collection.
+
+    Quantized vectors are kept in RAM for the HNSW traversal while the full float32 vectors
+    can live on disk; with ``rescore`` the top ``oversampling * k`` candidates are re-ranked
+    against the full vectors, so recall stays close to an unquantized search.
+
+    Args:
+        quantization: "scalar" (int8) or "binary" quantization, or None for plain float32.
+        rescore: Re-rank quantized search candidates with the full vectors.
+        oversampling: How many more candidates than requested to fetch for rescoring.
+        quantized_always_ram: Keep the quantized vectors in RAM even with on-disk vectors.
+        hnsw_m: Edges per node of the HNSW graph, or None for the Qdrant default.
+        hnsw_ef_construct: Candidates considered while building the graph, or None for the
+            Qdrant default.
+        search_hnsw_ef: Candidates considered at search time, or None for the Qdrant default.
+        on_disk: Store the full vectors on disk (memory-mapped) instead of in RAM.
+    """
+
+    quantization: Optional[str] = None
+    rescore: bool = True
+    oversampling: float = 2.0
+    quantized_always_ram: bool = True
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+    search_hnsw_ef: Optional[int] = None
+    on_disk: bool = False
+
+    @classmethod
+    def from_settings(cls) -> "QdrantSchema":
+        return cls(
+            quantization=settings.QDRANT_QUANTIZATION,
+            rescore=settings.QDRANT_QUANTIZATION_RESCORE,
+            oversampling=settings.QDRANT_QUANTIZATION_OVERSAMPLING,
+            quantized_always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM,
+            hnsw_m=settings.QDRANT_HNSW_M,
+            hnsw_ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+            search_hnsw_ef=settings.QDRANT_SEARCH_HNSW_EF,
+            on_disk=settings.QDRANT_ON_DISK,
+        )
+
+    def collection_config(self, dimension: int) -> Dict[str, Any]:
+        """Keyword arguments of ``QdrantClient.create_collection`` for this schema."""
+        config: Dict[str, Any] = {
+            "vectors_config": VectorParams(
+                size=dimension, distance=Distance.COSINE, on_disk=self.on_disk or None
+            )
+        }
+        if self.hnsw_m is not None or self.hnsw_ef_construct is not None:
+            config["hnsw_config"] = HnswConfigDiff(
+                m=self.hnsw_m, ef_construct=self.hnsw_ef_construct
+            )
+        if self.quantization == "scalar":
+            config["quantization_config"] = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8, quantile=0.99, always_ram=self.quantized_always_ram
+                )
+            )
+        elif self.quantization == "binary":
+            config["quantization_config"] = BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=self.quantized_always_ram)
+            )
+        elif self.quantization is not None:
+            raise ValueError(f"Unknown quantization: {self.quantization}")
+        return config
+
+    def search_params(self) -> Optional[SearchParams]:
+        """Search-time parameters for this schema, or None to use the Qdrant defaults."""
+        quantization = (
+            QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+            if self.quantization is not None
+            else None
+        )
+        if quantization is None and self.search_hnsw_ef is None:
+            return None
+        return SearchParams(hnsw_ef=self.search_hnsw_ef, quantization=quantization)
+
+
+class QdrantBackend(VectorBackend):
+    """Vector backend storing memories in a Qdrant collection.
+
+    Args:
+        collection_name: The collection to use.
+        url: URL of a remote Qdrant instance.
+        api_key: API key of the remote Qdrant instance.
+        location: Alternative to ``url``, e.g. ``":memory:"`` for an in-process Qdrant.
+        schema: Quantization and index settings used to create and search the collection,
+            defaults to plain float32 vectors with the Qdrant default index.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        location: Optional[str] = None,
+        schema: Optional[QdrantSchema] = None,
+    ):
+        self.collection_name = collection_name
+        self.schema = schema or QdrantSchema()
+        self._search_params = self.schema.search_params()
+        self.client = (
+            QdrantClient(location=location) if location else QdrantClient(url=url, api_key=api_key)
+        )
+
+    @staticmethod
+    def _to_record(point) -> VectorRecord:
+        vector = getattr(point, "vector", None)
+        return VectorRecord(
+            id=str(point.id),
+            payload=point.payload or {},
+            score=getattr(point, "score", None),
+            vector=np.asarray(vector, dtype=np.float32) if vector is not None else None,
+        )
+
+    def collection_exists(self) -> bool:
+        collections = self.client.get_collections().collections
+        if any(col.name == self.collection_name for col in collections):
+            return True
+        # The collection name may be an alias of a versioned collection, see migration.py
+        return self.alias_target(self.collection_name) is not None
+
+    def alias_target(self, alias: str) -> Optional[str]:
+        """Get the collection an alias points to, or None if the alias does not exist."""
+        for description in self.client.get_aliases().aliases:
+            if description.alias_name == alias:
+                return description.collection_name
+        return None
+
+    def switch_alias(self, alias: str) -> None:
+        """Point an alias at this collection, moving it off its current collection atomically."""
+        operations: List[Union[DeleteAliasOperation, CreateAliasOperation]] = []
+        if self.alias_target(alias) is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+        operations.append(
+            CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=self.collection_name, alias_name=alias)
+            )
+        )
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+
+    def create_collection(self, dimension: int) -> None:
+        self.client.create_collection(
+            collection_name=self.collection_name, **self.schema.collection_config(dimension)
+        )
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[dict]) -> None:
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                PointStruct(id=point_id, vector=vector.tolist(), payload=payload)
+                for point_id, vector, payload in zip(ids, vectors, payloads)
+            ],
+        )
+
+    def search(self, vector: np.ndarray, k: int, with_vectors: bool = False) -> List[VectorRecord]:
+        hits = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=cast(List[float], vector.tolist()),
+            limit=k,
+            with_vectors=with_vectors,
+            search_params=self._search_params,
+        )
+        return [self._to_record(hit) for hit in hits]
+
+    def search_batch(
+        self, vectors: np.ndarray, k: int, with_vectors: bool = False
+    ) -> List[List[VectorRecord]]:
+        results = self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                SearchRequest(
+                    vector=vector.tolist(),
+                    limit=k,
+                    with_payload=True,
+                    with_vector=with_vectors,
+                    params=self._search_params,
+                )
+                for vector in vectors
+            ],
+        )
+        return [[self._to_record(hit) for hit in hits] for hits in results]
+
+    def scroll(
+        self,
+        limit: int,
+        offset: ScrollOffset = None,
+        with_vectors: bool = True,
+        payload_filter: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[VectorRecord], ScrollOffset]:
+        scroll_filter = (
+            Filter(
+                must=[
+                    FieldCondition(key=key, match=MatchValue(value=value))
+                    for key, value in payload_filter.items()
+                ]
+            )
+            if payload_filter
+            else None
+        )
+        points, next_offset = self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=scroll_filter,
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+        # Point IDs are UUID strings or integers, the same as ScrollOffset
+        return [self._to_record(point) for point in points], cast(ScrollOffset, next_offset)
+
+    def delete(self, ids: List[str]) -> None:
+        self.client.delete(collection_name=self.collection_name, points_selector=list(ids))
+
+    def count(self) -> int:
+        return self.client.count(collection_name=self.collection_name, exact=True).count
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from ai_companion.modules.memory.long_term.vector_store import Memory
+from ai_companion.settings import settings
+
+
+def recency_weights(
+    memories: List[Memory],
+    half_life_days: float,
+    recency_weight: float,
+    now: Optional[datetime] = None,
+) -> np.ndarray:
+    """Weight each memory by its age, halving the recency part every ``half_life_days``.
+
+    Only ``recency_weight`` of the relevance decays, so old but relevant facts (a name, a home
+    town) are demoted rather than forgotten. Memories without a timestamp are not demoted.
+    Ages are computed in UTC, a naive ``now`` is read as local time like stored timestamps.
+    """
+    now = (now or datetime.now()).astimezone(timezone.utc)
+    timestamps = [memory.timestamp for memory in memories]
+    ages = np.array(
+        [(now - ts).total_seconds() / 86400 if ts is not None else 0.0 for ts in timestamps]
+    )
+    decay = np.power(0.5, np.maximum(ages, 0.0) / half_life_days)
+    return 1.0 - recency_weight + recency_weight * decay
+
+
+def rerank_memories(
+    candidates: List[Memory],
+    k: int,
+    mmr_lambda: float = settings.MEMORY_MMR_LAMBDA,
+    half_life_days: float = settings.MEMORY_RECENCY_HALF_LIFE_DAYS,
+    recency_weight: float = settings.MEMORY_RECENCY_WEIGHT,
+    now: Optional[datetime] = None,
+) -> List[Memory]:
+    """Pick ``k`` relevant, current and mutually distinct memories from a candidate pool.
+
+    Relevance is the search score scaled by recency. Memories are then selected greedily by
+    maximal marginal relevance: ``mmr_lambda * relevance - (1 - mmr_lambda) * redundancy``,
+    where redundancy is the highest cosine similarity to an already selected memory.
+
+    Args:
+        candidates: Search hits with scores and vectors, e.g. from
+            ``search_memories_async(..., with_vectors=True)``.
+        k: Number of memories to return.
+        mmr_lambda: Trade-off between relevance (1.0) and diversity (0.0).
+        half_life_days: Age at which the recency part of the relevance halves.
+        recency_weight: Share of the relevance that decays with age, from 0.0 to 1.0.
+        now: Reference time of the decay, defaults to the current time.
+
+    Returns:
+        List[Memory]: The selected memories, best first, with their re-ranked score.
+    """
+    if k <= 0 or not candidates:
+        return []
+
+    scores = np.array([memory.score or 0.0 for memory in candidates])
+    relevance = scores * recency_weights(candidates, half_life_days, recency_weight, now)
+
+    candidate_vectors = [memory.vector for memory in candidates if memory.vector is not None]
+    if len(candidate_vectors) < len(candidates):
+        # Without vectors there is nothing to diversify on, rank by relevance only
+        order = np.argsort(-relevance)[:k]
+        return [_with_score(candidates[int(i)], float(relevance[i])) for i in order]
+
+    vectors = np.stack(candidate_vectors).astype(np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarities = vectors @ vectors.T
+
+    selected: List[int] = []
+    redundancy = np.zeros(len(candidates))
+    available = np.ones(len(candidates), dtype=bool)
+    for _ in range(min(k, len(candidates))):
+        mmr = mmr_lambda * relevance - (1.0 - mmr_lambda) * redundancy
+        best = int(np.argmax(np.where(available, mmr, -np.inf)))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarities[best])
+
+    return [_with_score(candidates[i], float(relevance[i])) for i in selected]
+
+
+def _with_score(memory: Memory, score: float) -> Memory:
+    return Memory(text=memory.text, metadata=memory.metadata, score=float(score))
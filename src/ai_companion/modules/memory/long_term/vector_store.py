@@ -1,14 +1,21 @@
 import os
+import threading
+import uuid
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from functools import lru_cache
-from typing import List, Optional
+from typing import Dict, List, Optional
 import asyncio
 
+import numpy as np
+from ai_companion.core.instrumentation import get_instrumentation
+from ai_companion.modules.memory.long_term.backends import (
+    VectorBackend,
+    VectorRecord,
+    create_vector_backend,
+)
+from ai_companion.modules.memory.long_term.embeddings import load_embedding_model
 from ai_companion.settings import settings
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
-from sentence_transformers import SentenceTransformer
 
 
 @dataclass
@@ -18,6 +25,7 @@ class Memory:
     text: str
     metadata: dict
     score: Optional[float] = None
+    vector: Optional[np.ndarray] = None
 
     @property
     def id(self) -> Optional[str]:
@@ -25,15 +33,33 @@ class Memory:
 
     @property
     def timestamp(self) -> Optional[datetime]:
+        """When the memory was stored, in UTC.
+
+        Memories store the naive local time, imported ones may carry an offset such as "Z".
+        """
         ts = self.metadata.get("timestamp")
-        return datetime.fromisoformat(ts) if ts else None
+        # astimezone reads a naive time as local time
+        return datetime.fromisoformat(ts).astimezone(timezone.utc) if ts else None
+
+    @classmethod
+    def from_record(cls, record: VectorRecord) -> "Memory":
+        return cls(
+            text=record.payload.get("text", ""),
+            metadata={k: v for k, v in record.payload.items() if k != "text"},
+            score=record.score,
+            vector=record.vector,
+        )
 
 
 class VectorStore:
-    """A class to handle vector storage operations using Qdrant."""
+    """A class to handle vector storage operations on a pluggable vector backend.
+
+    The backend is Qdrant by default. Set VECTOR_BACKEND to "local" to use the in-process
+    NumPy index instead, which needs no Qdrant credentials.
+    """
 
     REQUIRED_ENV_VARS = ["QDRANT_URL", "QDRANT_API_KEY"]
-    EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+    EMBEDDING_MODEL = settings.EMBEDDING_MODEL_NAME
     COLLECTION_NAME = "long_term_memory"
     SIMILARITY_THRESHOLD = 0.9  # Threshold for considering memories as similar
 
@@ -48,11 +74,33 @@ class VectorStore:
     def __init__(self) -> None:
         if not self._initialized:
             self._validate_env_vars()
-            # Defer loading the model and client until needed to avoid blocking on initialization
+            # Defer loading the model and backend until needed to avoid blocking on initialization
             self._model = None
-            self._client = None
+            self._backend: Optional[VectorBackend] = None
+            # Loads may race between a warm-up thread and the first request, load only once
+            self._model_lock = threading.Lock()
+            self._backend_lock = threading.Lock()
             self._initialized = True
 
+    def _load_model(self):
+        with self._model_lock:
+            if self._model is None and settings.EMBEDDING_SERVICE_SOCKET:
+                # Shared by every worker process instead of a model copy per process
+                from ai_companion.modules.memory.long_term.embedding_service import (
+                    RemoteEmbeddingModel,
+                )
+
+                self._model = RemoteEmbeddingModel(settings.EMBEDDING_SERVICE_SOCKET)
+            elif self._model is None:
+                self._model = load_embedding_model(self.EMBEDDING_MODEL)
+        return self._model
+
+    def _load_backend(self) -> VectorBackend:
+        with self._backend_lock:
+            if self._backend is None:
+                self._backend = create_vector_backend(self.COLLECTION_NAME)
+        return self._backend
+
     @property
     def model(self):
         """Get the embedding model synchronously. Will raise an error if used in an async context."""
@@ -68,83 +116,90 @@ class VectorStore:
                 # No running event loop, safe to continue synchronously
                 pass
 
-            self._model = SentenceTransformer(self.EMBEDDING_MODEL)
+            self._load_model()
+        assert self._model is not None
         return self._model
 
     async def get_model(self):
         """Get the embedding model asynchronously."""
         if self._model is None:
-            self._model = await asyncio.to_thread(SentenceTransformer, self.EMBEDDING_MODEL)
+            await asyncio.to_thread(self._load_model)
+        assert self._model is not None
         return self._model
 
     @property
-    def client(self):
-        """Get the Qdrant client synchronously. Will raise an error if used in an async context."""
-        if self._client is None:
+    def backend(self) -> VectorBackend:
+        """Get the vector backend synchronously. Will raise an error if used in an async context."""
+        if self._backend is None:
             # Check if we're in an async context
             try:
                 loop = asyncio.get_running_loop()
                 if loop.is_running():
                     raise RuntimeError(
-                        "Cannot access client synchronously in async context. Use 'await get_client()' instead."
+                        "Cannot access backend synchronously in async context. Use 'await get_backend()' instead."
                     )
             except RuntimeError:
                 # No running event loop, safe to continue synchronously
                 pass
 
-            self._client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
-        return self._client
+            self._load_backend()
+        assert self._backend is not None
+        return self._backend
 
-    async def get_client(self):
-        """Get the Qdrant client asynchronously."""
-        if self._client is None:
-            self._client = await asyncio.to_thread(
-                QdrantClient, url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY
-            )
-        return self._client
+    async def get_backend(self) -> VectorBackend:
+        """Get the vector backend asynchronously."""
+        if self._backend is None:
+            await asyncio.to_thread(self._load_backend)
+        assert self._backend is not None
+        return self._backend
+
+    async def _encode_async(self, texts, **kwargs) -> np.ndarray:
+        """Encode texts in a worker thread, timed as an embedding span."""
+        model = await self.get_model()
+        with get_instrumentation().span("embedding", "encode"):
+            return await asyncio.to_thread(model.encode, texts, **kwargs)
+
+    async def _backend_call(self, method: str, *args):
+        """Run a backend method in a worker thread, timed as a vector store span."""
+        backend = await self.get_backend()
+        with get_instrumentation().span("vector_store", method):
+            return await asyncio.to_thread(getattr(backend, method), *args)
 
     def _validate_env_vars(self) -> None:
         """Validate that all required environment variables are set."""
+        if settings.VECTOR_BACKEND != "qdrant":
+            return
         missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
     def _collection_exists(self) -> bool:
         """Check if the memory collection exists synchronously."""
-        collections = self.client.get_collections().collections
-        return any(col.name == self.COLLECTION_NAME for col in collections)
+        return self.backend.collection_exists()
 
     async def _collection_exists_async(self) -> bool:
         """Check if the memory collection exists asynchronously."""
-        client = await self.get_client()
-        collections = await asyncio.to_thread(client.get_collections)
-        return any(col.name == self.COLLECTION_NAME for col in collections.collections)
+        backend = await self.get_backend()
+        return await asyncio.to_thread(backend.collection_exists)
+
+    @staticmethod
+    def _embedding_dimension(model) -> int:
+        """Dimension of the stored vectors, taking EMBEDDING_DIMENSIONS truncation into account."""
+        return settings.EMBEDDING_DIMENSIONS or model.get_sentence_embedding_dimension()
 
     def _create_collection(self) -> None:
         """Create a new collection for storing memories synchronously."""
-        sample_embedding = self.model.encode("sample text")
-        self.client.create_collection(
-            collection_name=self.COLLECTION_NAME,
-            vectors_config=VectorParams(
-                size=len(sample_embedding),
-                distance=Distance.COSINE,
-            ),
-        )
+        self.backend.create_collection(self._embedding_dimension(self.model))
 
     async def _create_collection_async(self) -> None:
         """Create a new collection for storing memories asynchronously."""
         model = await self.get_model()
-        sample_embedding = await asyncio.to_thread(model.encode, "sample text")
-        client = await self.get_client()
-
-        await asyncio.to_thread(
-            client.create_collection,
-            collection_name=self.COLLECTION_NAME,
-            vectors_config=VectorParams(
-                size=len(sample_embedding),
-                distance=Distance.COSINE,
-            ),
-        )
+        await self._backend_call("create_collection", self._embedding_dimension(model))
+
+    async def ensure_collection_async(self) -> None:
+        """Create the memory collection if it does not exist yet."""
+        if not await self._collection_exists_async():
+            await self._create_collection_async()
 
     def find_similar_memory(self, text: str) -> Optional[Memory]:
         """Find if a similar memory already exists synchronously.
@@ -198,19 +253,8 @@ class VectorStore:
             metadata["id"] = similar_memory.id  # Keep same ID for update
 
         embedding = self.model.encode(text)
-        point = PointStruct(
-            id=metadata.get("id", hash(text)),
-            vector=embedding.tolist(),
-            payload={
-                "text": text,
-                **metadata,
-            },
-        )
-
-        self.client.upsert(
-            collection_name=self.COLLECTION_NAME,
-            points=[point],
-        )
+        memory_id = metadata.setdefault("id", str(uuid.uuid5(uuid.NAMESPACE_OID, text)))
+        self.backend.upsert([memory_id], embedding[np.newaxis], [{"text": text, **metadata}])
 
     async def store_memory_async(self, text: str, metadata: dict) -> None:
         """Store a new memory in the vector store or update if similar exists asynchronously.
@@ -227,31 +271,65 @@ class VectorStore:
         if similar_memory and similar_memory.id:
             metadata["id"] = similar_memory.id  # Keep same ID for update
 
-        model = await self.get_model()
-        embedding = await asyncio.to_thread(model.encode, text)
-
-        point = PointStruct(
-            id=metadata.get("id", hash(text)),
-            vector=embedding.tolist(),
-            payload={
-                "text": text,
-                **metadata,
-            },
-        )
+        embedding = await self._encode_async(text)
 
-        client = await self.get_client()
-        await asyncio.to_thread(
-            client.upsert,
-            collection_name=self.COLLECTION_NAME,
-            points=[point],
+        memory_id = metadata.setdefault("id", str(uuid.uuid5(uuid.NAMESPACE_OID, text)))
+        await self._backend_call(
+            "upsert", [memory_id], embedding[np.newaxis], [{"text": text, **metadata}]
         )
 
-    def search_memories(self, query: str, k: int = 5) -> List[Memory]:
+    async def store_memories_async(self, texts: List[str]) -> List[str]:
+        """Store several new memories with one batched encode, search and upsert.
+
+        Memories that are near-duplicates of each other or of an existing memory are skipped.
+
+        Args:
+            texts: The text content of the memories
+
+        Returns:
+            List of the texts that were stored
+        """
+        if not texts:
+            return []
+
+        if not await self._collection_exists_async():
+            await self._create_collection_async()
+
+        embeddings = await self._encode_async(texts, normalize_embeddings=True)
+
+        # Drop near-duplicates within the batch, keeping the first occurrence
+        similarities = embeddings @ embeddings.T
+        keep: List[int] = []
+        for i in range(len(texts)):
+            if not keep or similarities[i, keep].max() < self.SIMILARITY_THRESHOLD:
+                keep.append(i)
+
+        # Drop memories that already exist, with one batched search
+        results = await self._backend_call("search_batch", embeddings[keep], 1)
+        new = [
+            i
+            for i, hits in zip(keep, results)
+            if not hits or (hits[0].score or 0.0) < self.SIMILARITY_THRESHOLD
+        ]
+        if not new:
+            return []
+
+        timestamp = datetime.now().isoformat()
+        ids = [str(uuid.uuid4()) for _ in new]
+        payloads = [
+            {"text": texts[i], "id": memory_id, "timestamp": timestamp}
+            for i, memory_id in zip(new, ids)
+        ]
+        await self._backend_call("upsert", ids, embeddings[new], payloads)
+        return [texts[i] for i in new]
+
+    def search_memories(self, query: str, k: int = 5, with_vectors: bool = False) -> List[Memory]:
         """Search for similar memories in the vector store synchronously.
 
         Args:
             query: Text to search for
             k: Number of results to return
+            with_vectors: Also return the stored embedding of each memory
 
         Returns:
             List of Memory objects
@@ -260,29 +338,19 @@ class VectorStore:
             return []
 
         query_embedding = self.model.encode(query)
-        results = self.client.search(
-            collection_name=self.COLLECTION_NAME,
-            query_vector=query_embedding.tolist(),
-            limit=k,
-        )
+        results = self.backend.search(query_embedding, k, with_vectors)
 
-        return [
-            Memory(
-                text=hit.payload.get("text", "") if hit.payload else "",
-                metadata={k: v for k, v in hit.payload.items() if k != "text"}
-                if hit.payload
-                else {},
-                score=hit.score,
-            )
-            for hit in results
-        ]
+        return [Memory.from_record(record) for record in results]
 
-    async def search_memories_async(self, query: str, k: int = 5) -> List[Memory]:
+    async def search_memories_async(
+        self, query: str, k: int = 5, with_vectors: bool = False
+    ) -> List[Memory]:
         """Search for similar memories in the vector store asynchronously.
 
         Args:
             query: Text to search for
             k: Number of results to return
+            with_vectors: Also return the stored embedding of each memory
 
         Returns:
             List of Memory objects
@@ -290,27 +358,44 @@ class VectorStore:
         if not await self._collection_exists_async():
             return []
 
-        model = await self.get_model()
-        query_embedding = await asyncio.to_thread(model.encode, query)
-
-        client = await self.get_client()
-        results = await asyncio.to_thread(
-            client.search,
-            collection_name=self.COLLECTION_NAME,
-            query_vector=query_embedding.tolist(),
-            limit=k,
-        )
+        query_embedding = await self._encode_async(query)
 
-        return [
-            Memory(
-                text=hit.payload.get("text", "") if hit.payload else "",
-                metadata={k: v for k, v in hit.payload.items() if k != "text"}
-                if hit.payload
-                else {},
-                score=hit.score,
-            )
-            for hit in results
-        ]
+        results = await self._backend_call("search", query_embedding, k, with_vectors)
+
+        return [Memory.from_record(record) for record in results]
+
+    async def search_memories_batch_async(
+        self, queries: List[str], k: int = 5, with_vectors: bool = False
+    ) -> List[Memory]:
+        """Search for memories similar to any of several queries with one batched request.
+
+        The queries are encoded in one batch and searched in one request. A memory found by
+        several queries is kept once, with its best score.
+
+        Args:
+            queries: Texts to search for
+            k: Number of results to return per query
+            with_vectors: Also return the stored embedding of each memory
+
+        Returns:
+            List of Memory objects, best score first
+        """
+        if not queries or not await self._collection_exists_async():
+            return []
+
+        query_embeddings = await self._encode_async(queries)
+
+        results = await self._backend_call("search_batch", query_embeddings, k, with_vectors)
+
+        best: Dict[str, VectorRecord] = {}
+        for hits in results:
+            for record in hits:
+                current = best.get(record.id)
+                if current is None or (record.score or 0.0) > (current.score or 0.0):
+                    best[record.id] = record
+
+        ranked = sorted(best.values(), key=lambda record: record.score or 0.0, reverse=True)
+        return [Memory.from_record(record) for record in ranked]
 
 
 @lru_cache
@@ -322,7 +407,12 @@ def get_vector_store() -> VectorStore:
 async def get_vector_store_async() -> VectorStore:
     """Get or create the VectorStore singleton instance asynchronously."""
     store = get_vector_store()
-    # Initialize the model and client asynchronously
+    # Initialize the model and backend asynchronously
     await store.get_model()
-    await store.get_client()
+    await store.get_backend()
     return store
+
+
+async def embed_text_async(text: str) -> np.ndarray:
+    """Embed a text with the memory embedding model, normalized for cosine similarity."""
+    return await get_vector_store()._encode_async(text, normalize_embeddings=True)
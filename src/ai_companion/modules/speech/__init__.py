@@ -1,7 +1,23 @@
-from .speech_to_text import SpeechToText
-from .text_to_speech import TextToSpeech
+from typing import TYPE_CHECKING, Any
+
+# Loaded on first access, importing the package should not import the groq and elevenlabs SDKs
+if TYPE_CHECKING:
+    from .speech_to_text import SpeechToText
+    from .text_to_speech import TextToSpeech
 
 __all__ = [
     "SpeechToText",
     "TextToSpeech",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name == "SpeechToText":
+        from .speech_to_text import SpeechToText
+
+        return SpeechToText
+    if name == "TextToSpeech":
+        from .text_to_speech import TextToSpeech
+
+        return TextToSpeech
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
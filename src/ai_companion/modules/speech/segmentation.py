@@ -0,0 +1,88 @@
+import io
+import wave
+from typing import List, Tuple
+
+import numpy as np
+
+_FULL_SCALE = 32768.0
+
+
+def frame_levels(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """Loudness of each ``frame_size`` window of 16-bit samples, in dBFS."""
+    count = -(-len(samples) // frame_size)
+    padded = np.zeros(count * frame_size, dtype=np.float32)
+    padded[: len(samples)] = samples
+    power = np.mean((padded.reshape(count, frame_size) / _FULL_SCALE) ** 2, axis=1)
+    return 10 * np.log10(np.maximum(power, 1e-10))
+
+
+def split_on_silence(
+    samples: np.ndarray,
+    sample_rate: int,
+    max_seconds: float,
+    min_seconds: float,
+    silence_threshold_db: float = -40.0,
+    silence_seconds: float = 0.3,
+    frame_seconds: float = 0.02,
+) -> List[Tuple[int, int]]:
+    """Cut audio into chunks of at most ``max_seconds``, at pauses where possible.
+
+    Each cut goes in the last pause between ``min_seconds`` and ``max_seconds`` into the chunk,
+    a pause being ``silence_seconds`` quieter than ``silence_threshold_db`` on average. Without
+    a pause in that range, the cut goes at its quietest point so no word is split mid-way if it
+    can be helped. Chunks that are silent throughout are dropped, Whisper tends to make up
+    text for them.
+
+    Args:
+        samples: Mono 16-bit samples.
+        sample_rate: Samples per second.
+        max_seconds: Longest chunk.
+        min_seconds: Shortest chunk, except for the last one.
+        silence_threshold_db: Level below which audio counts as silence, in dBFS.
+        silence_seconds: How long a pause has to be.
+        frame_seconds: Resolution of the level analysis.
+
+    Returns:
+        (start, end) sample ranges, in order.
+    """
+    if min_seconds >= max_seconds:
+        raise ValueError("min_seconds must be below max_seconds")
+    if len(samples) == 0:
+        return []
+
+    frame_size = max(1, int(sample_rate * frame_seconds))
+    levels = frame_levels(samples, frame_size)
+    window = max(1, round(silence_seconds / frame_seconds))
+    power = np.convolve(10 ** (levels / 10), np.ones(window) / window, mode="same")
+    smoothed = 10 * np.log10(np.maximum(power, 1e-10))
+
+    max_frames = max(1, int(max_seconds / frame_seconds))
+    min_frames = max(1, int(min_seconds / frame_seconds))
+    bounds = []
+    start = 0
+    while len(levels) - start > max_frames:
+        low, high = start + min_frames, start + max_frames
+        candidates = smoothed[low:high]
+        pauses = np.flatnonzero(candidates < silence_threshold_db)
+        # The latest pause, or else the latest of the quietest frames, keeps chunks long
+        offset = pauses[-1] if len(pauses) else len(candidates) - 1 - np.argmin(candidates[::-1])
+        bounds.append((start, low + offset))
+        start = low + offset
+    bounds.append((start, len(levels)))
+
+    return [
+        (first * frame_size, min(last * frame_size, len(samples)))
+        for first, last in bounds
+        if levels[first:last].max() >= silence_threshold_db
+    ]
+
+
+def to_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Wrap mono 16-bit samples in a WAV container."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.asarray(samples, dtype="<i2").tobytes())
+    return buffer.getvalue()
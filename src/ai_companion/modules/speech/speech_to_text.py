@@ -1,10 +1,18 @@
+import asyncio
+import logging
 import os
-import tempfile
-from typing import Optional
-
-from ai_companion.core.exceptions import SpeechToTextError
+from typing import List, Optional
+
+from ai_companion.core.exceptions import SpeechToTextError, TranscodingError
+from ai_companion.core.provider_gateway import get_provider_gateway
+from ai_companion.modules.speech.segmentation import split_on_silence, to_wav
+from ai_companion.modules.speech.transcoding import (
+    decode_to_pcm,
+    ffmpeg_available,
+    probe_duration,
+)
 from ai_companion.settings import settings
-from groq import Groq
+from groq import NOT_GIVEN, Groq
 
 
 class SpeechToText:
@@ -13,10 +21,14 @@ class SpeechToText:
     # Required environment variables
     REQUIRED_ENV_VARS = ["GROQ_API_KEY"]
 
+    # Whisper works on 16 kHz mono audio, long notes are decoded and split at this rate
+    SAMPLE_RATE = 16000
+
     def __init__(self):
         """Initialize the SpeechToText class and validate environment variables."""
         self._validate_env_vars()
         self._client: Optional[Groq] = None
+        self._logger = logging.getLogger(__name__)
 
     def _validate_env_vars(self) -> None:
         """Check if required environment variables are set."""
@@ -28,12 +40,77 @@ class SpeechToText:
     def client(self) -> Groq:
         """Lazy load the Groq client."""
         if not self._client:
-            self._client = Groq(api_key=settings.GROQ_API_KEY)
+            # Retries are handled by the provider gateway
+            self._client = Groq(api_key=settings.GROQ_API_KEY, max_retries=0)
         return self._client
 
+    def _transcribe_sync(self, audio_data: bytes, filename: str = "audio.wav"):
+        """Synchronous helper method to transcribe audio and report rate limit headers.
+        This will be called in a separate thread by the provider gateway."""
+        raw_response = self.client.audio.transcriptions.with_raw_response.create(
+            file=(filename, audio_data),
+            model=settings.STT_MODEL_NAME,
+            response_format="text",
+            # Without a language Whisper detects it, which copes with Pidgin and code-switching
+            language=settings.STT_LANGUAGE or NOT_GIVEN,
+        )
+        get_provider_gateway("groq").update_from_headers(raw_response.headers)
+        return raw_response.parse()
+
+    async def _split_long_audio(self, audio_data: bytes) -> Optional[List[bytes]]:
+        """Split a voice note longer than STT_LONG_AUDIO_THRESHOLD_SECONDS at its pauses.
+
+        Returns:
+            The chunks as WAV files, or None when the note should be sent in one request.
+        """
+        threshold = settings.STT_LONG_AUDIO_THRESHOLD_SECONDS
+        if threshold is None or not ffmpeg_available():
+            return None
+        # Most voice notes are short, the container's duration spares decoding them
+        duration = await asyncio.to_thread(probe_duration, audio_data)
+        if duration is not None and duration <= threshold:
+            return None
+        try:
+            samples = await asyncio.to_thread(decode_to_pcm, audio_data, self.SAMPLE_RATE)
+        except TranscodingError as e:
+            self._logger.warning(f"Could not decode the voice note, sending it as is: {e}")
+            return None
+        if len(samples) <= threshold * self.SAMPLE_RATE:
+            return None
+
+        bounds = split_on_silence(
+            samples,
+            self.SAMPLE_RATE,
+            max_seconds=settings.STT_CHUNK_MAX_SECONDS,
+            min_seconds=settings.STT_CHUNK_MIN_SECONDS,
+            silence_threshold_db=settings.STT_SILENCE_THRESHOLD_DB,
+        )
+        self._logger.debug(
+            f"Split {len(samples) / self.SAMPLE_RATE:.0f}s of audio into {len(bounds)} chunks"
+        )
+        return [to_wav(samples[start:end], self.SAMPLE_RATE) for start, end in bounds]
+
+    async def _transcribe_chunks(self, chunks: List[bytes]) -> str:
+        """Transcribe chunks concurrently, at most STT_CHUNK_CONCURRENCY at a time, in order."""
+        semaphore = asyncio.Semaphore(settings.STT_CHUNK_CONCURRENCY)
+
+        async def transcribe_chunk(index: int, chunk: bytes) -> str:
+            async with semaphore:
+                transcription = await get_provider_gateway("groq").call(
+                    self._transcribe_sync, chunk, f"chunk_{index}.wav"
+                )
+            return transcription.text.strip() if transcription else ""
+
+        texts = await asyncio.gather(*(transcribe_chunk(i, c) for i, c in enumerate(chunks)))
+        return " ".join(text for text in texts if text)
+
     async def transcribe(self, audio_data: bytes) -> str:
         """Transcribe the given audio file to text.
 
+        Voice notes longer than STT_LONG_AUDIO_THRESHOLD_SECONDS are split at pauses into
+        chunks of at most STT_CHUNK_MAX_SECONDS, transcribed concurrently and joined in order,
+        so the wait grows with the duration divided by STT_CHUNK_CONCURRENCY.
+
         Args:
             audio_data (bytes): The audio data to transcribe.
 
@@ -48,29 +125,22 @@ class SpeechToText:
             raise ValueError("Audio data is empty or invalid.")
 
         try:
-            # Create a temporary file to store the audio data
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_audio_file:
-                temp_audio_file.write(audio_data)
-                temp_file_path = temp_audio_file.name
-
-                try:
-                    # Open the temporary file for reading
-                    with open(temp_file_path, "rb") as audio_file:
-                        # Transcribe the audio file using the Groq client
-                        transcription = self.client.audio.transcriptions.create(
-                            file=audio_file,
-                            model=settings.STT_MODEL_NAME,
-                            language="en",
-                            response_format="text",
-                        )
-
-                    if not transcription:
-                        raise SpeechToTextError("Transcription failed. No text returned.")
-
-                    return transcription.text
-                finally:
-                    # Clean up the temporary file
-                    os.unlink(temp_file_path)
+            chunks = await self._split_long_audio(audio_data)
+            if chunks is not None:
+                text = await self._transcribe_chunks(chunks)
+                if not text:
+                    raise SpeechToTextError("Transcription failed. No text returned.")
+                return text
+
+            # Transcribe the audio through the shared Groq gateway
+            transcription = await get_provider_gateway("groq").call(
+                self._transcribe_sync, audio_data
+            )
+
+            if not transcription:
+                raise SpeechToTextError("Transcription failed. No text returned.")
+
+            return transcription.text
 
         except SpeechToTextError as e:
             raise e
@@ -1,14 +1,24 @@
-import asyncio
 import os
 from typing import Optional
 
 from ai_companion.core.exceptions import TextToSpeechError
+from ai_companion.core.provider_gateway import get_provider_gateway
+from ai_companion.modules.speech.transcoding import (
+    audio_mime_type,
+    ffmpeg_available,
+    needs_transcode,
+    transcode,
+)
 from ai_companion.settings import settings
 from elevenlabs import ElevenLabs, Voice, VoiceSettings
 
 
 class TextToSpeech:
-    """Handles text-to-speech conversion using the ElevenLabs API."""
+    """Handles text-to-speech conversion using the ElevenLabs API.
+
+    Audio comes in TTS_OUTPUT_FORMAT. When TTS_TRANSCODE_TO asks for another format, the
+    response is converted with ffmpeg chunk by chunk while it downloads.
+    """
 
     # Required environment variables
     REQUIRED_ENV_VARS = ["ELEVENLABS_API_KEY", "ELEVENLABS_VOICE_ID"]
@@ -17,6 +27,13 @@ class TextToSpeech:
         """Initialize the TextToSpeech class and validate environment variables."""
         self._validate_env_vars()
         self._client: Optional[ElevenLabs] = None
+        self.transcode_to = (
+            settings.TTS_TRANSCODE_TO
+            if needs_transcode(settings.TTS_OUTPUT_FORMAT, settings.TTS_TRANSCODE_TO)
+            else None
+        )
+        if self.transcode_to and not ffmpeg_available():
+            raise ValueError(f"TTS_TRANSCODE_TO={self.transcode_to} needs ffmpeg on PATH")
 
     def _validate_env_vars(self) -> None:
         """Check if required environment variables are set."""
@@ -27,6 +44,11 @@ class TextToSpeech:
         if settings.ELEVENLABS_VOICE_ID is None:
             raise ValueError("ELEVENLABS_VOICE_ID cannot be None")
 
+    @property
+    def mime_type(self) -> str:
+        """MIME type of the audio returned by ``synthesize``."""
+        return audio_mime_type(settings.TTS_OUTPUT_FORMAT, self.transcode_to)
+
     @property
     def client(self) -> ElevenLabs:
         """Lazy load the ElevenLabs client."""
@@ -36,7 +58,7 @@ class TextToSpeech:
 
     def _synthesize_sync(self, text: str) -> bytes:
         """Synchronous helper method to generate audio using the ElevenLabs API.
-        This will be called in a separate thread via asyncio.to_thread."""
+        This will be called in a separate thread by the provider gateway."""
         voice_id = settings.ELEVENLABS_VOICE_ID
         if voice_id is None:
             raise TextToSpeechError("ELEVENLABS_VOICE_ID is not set")
@@ -48,10 +70,19 @@ class TextToSpeech:
                 settings=VoiceSettings(stability=0.75, similarity_boost=0.75),
             ),
             model=settings.TTS_MODEL_NAME,
+            output_format=settings.TTS_OUTPUT_FORMAT,
         )
 
-        # Convert the audio generator to bytes
-        audio_data = b"".join(audio_generator)
+        if self.transcode_to:
+            audio_data = transcode(
+                audio_generator,
+                self.transcode_to,
+                provider_format=settings.TTS_OUTPUT_FORMAT,
+                bitrate=settings.TTS_TRANSCODE_BITRATE,
+            )
+        else:
+            # Convert the audio generator to bytes
+            audio_data = b"".join(audio_generator)
         if not audio_data:
             raise TextToSpeechError("Failed to synthesize speech.")
 
@@ -64,7 +95,7 @@ class TextToSpeech:
             text (str): The text to convert to speech.
 
         Returns:
-            bytes: The audio data of the synthesized speech.
+            bytes: The audio data of the synthesized speech, of type ``mime_type``.
 
         Raises:
             ValueError: If the text is empty or invalid.
@@ -74,8 +105,8 @@ class TextToSpeech:
             raise ValueError("Text is empty or invalid.")
 
         try:
-            # Use asyncio.to_thread to run the blocking ElevenLabs API call in a separate thread
-            audio_data = await asyncio.to_thread(self._synthesize_sync, text)
+            # Run the blocking ElevenLabs API call through the shared gateway
+            audio_data = await get_provider_gateway("elevenlabs").call(self._synthesize_sync, text)
             return audio_data
 
         except Exception as e:
@@ -0,0 +1,182 @@
+import shutil
+import subprocess
+import threading
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from ai_companion.core.exceptions import TranscodingError
+
+# Output arguments of ffmpeg per target format
+TARGET_FORMATS = {
+    # WhatsApp-native voice note: mono Opus in an Ogg container
+    "ogg_opus": ["-c:a", "libopus", "-ac", "1", "-application", "voip", "-f", "ogg"],
+    "mp3": ["-c:a", "libmp3lame", "-ac", "1", "-f", "mp3"],
+}
+
+MIME_TYPES = {"ogg_opus": "audio/ogg", "opus": "audio/ogg", "mp3": "audio/mpeg"}
+
+_READ_SIZE = 64 * 1024
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def input_args(provider_format: str) -> List[str]:
+    """ffmpeg input arguments for an ElevenLabs output format such as "pcm_16000".
+
+    Raw PCM and u-law have no header, so their sample format and rate are passed explicitly.
+    Containers like MP3 and Opus are detected by ffmpeg.
+    """
+    codec, _, rate = provider_format.partition("_")
+    if codec == "pcm":
+        return ["-f", "s16le", "-ar", rate, "-ac", "1"]
+    if codec == "ulaw":
+        return ["-f", "mulaw", "-ar", rate, "-ac", "1"]
+    return []
+
+
+def audio_mime_type(provider_format: str, transcode_to: Optional[str] = None) -> str:
+    """MIME type of the synthesized audio, to send it with the right content type."""
+    if transcode_to:
+        return MIME_TYPES[transcode_to]
+    codec, _, rate = provider_format.partition("_")
+    if codec == "pcm":
+        return f"audio/L16;rate={rate}"
+    if codec == "ulaw":
+        return "audio/basic"
+    return MIME_TYPES.get(codec, "application/octet-stream")
+
+
+def needs_transcode(provider_format: str, target: Optional[str]) -> bool:
+    """Whether the provider's output has to be converted to reach ``target``."""
+    if not target:
+        return False
+    codec = provider_format.partition("_")[0]
+    return not (target == "ogg_opus" and codec == "opus") and not (
+        target == "mp3" and codec == "mp3"
+    )
+
+
+class StreamingTranscoder:
+    """Converts audio with an ffmpeg process, fed chunk by chunk as the audio arrives.
+
+    Encoding starts with the first chunk instead of after the whole reply has been
+    downloaded, and the output is read concurrently so neither pipe fills up.
+
+    Args:
+        target: One of TARGET_FORMATS.
+        source_args: ffmpeg input arguments, see ``input_args``.
+        bitrate: Target bitrate, e.g. "24k". Voice notes sound fine at 16-32k with Opus.
+    """
+
+    def __init__(self, target: str, source_args: Optional[List[str]] = None, bitrate: str = "24k"):
+        if target not in TARGET_FORMATS:
+            raise ValueError(
+                f"Unknown target format '{target}', expected one of {list(TARGET_FORMATS)}"
+            )
+        if not ffmpeg_available():
+            raise TranscodingError("ffmpeg is not installed or not on PATH")
+
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        command += [*(source_args or []), "-i", "pipe:0"]
+        command += [*TARGET_FORMATS[target], "-b:a", bitrate, "pipe:1"]
+        self._process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        self._output: List[bytes] = []
+        self._errors = b""
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self) -> None:
+        assert self._process.stdout is not None and self._process.stderr is not None
+        while chunk := self._process.stdout.read(_READ_SIZE):
+            self._output.append(chunk)
+        self._errors = self._process.stderr.read()
+
+    def write(self, chunk: bytes) -> None:
+        assert self._process.stdin is not None
+        try:
+            self._process.stdin.write(chunk)
+        except BrokenPipeError as e:
+            self.close()
+            raise TranscodingError(f"ffmpeg stopped reading: {self._errors.decode()}") from e
+
+    def finish(self) -> bytes:
+        """Flush the input and return the converted audio."""
+        assert self._process.stdin is not None
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._reader.join()
+        if self._process.wait() != 0:
+            raise TranscodingError(f"ffmpeg failed: {self._errors.decode().strip()}")
+        return b"".join(self._output)
+
+    def close(self) -> None:
+        """Stop ffmpeg without waiting for its output."""
+        self._process.kill()
+        self._process.wait()
+        self._reader.join()
+
+
+def transcode(
+    chunks: Iterable[bytes], target: str, provider_format: str = "mp3", bitrate: str = "24k"
+) -> bytes:
+    """Convert a stream of audio chunks, encoding while the chunks are still arriving.
+
+    Args:
+        chunks: The source audio, e.g. the ElevenLabs response iterator.
+        target: One of TARGET_FORMATS, e.g. "ogg_opus".
+        provider_format: Format of the chunks, as an ElevenLabs output format name.
+        bitrate: Target bitrate.
+
+    Raises:
+        TranscodingError: If ffmpeg is missing or fails.
+    """
+    transcoder = StreamingTranscoder(target, input_args(provider_format), bitrate)
+    try:
+        for chunk in chunks:
+            if chunk:
+                transcoder.write(chunk)
+    except BaseException:
+        transcoder.close()
+        raise
+    return transcoder.finish()
+
+
+def decode_to_pcm(audio: bytes, sample_rate: int = 16000) -> np.ndarray:
+    """Decode any audio ffmpeg understands to mono 16-bit samples at ``sample_rate``.
+
+    Raises:
+        TranscodingError: If ffmpeg is missing or cannot decode the audio.
+    """
+    if not ffmpeg_available():
+        raise TranscodingError("ffmpeg is not installed or not on PATH")
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0"]
+    command += ["-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"]
+    result = subprocess.run(command, input=audio, capture_output=True)
+    if result.returncode != 0:
+        raise TranscodingError(f"ffmpeg failed: {result.stderr.decode().strip()}")
+    return np.frombuffer(result.stdout, dtype="<i2")
+
+
+def probe_duration(audio: bytes) -> Optional[float]:
+    """Duration of the audio in seconds, read by ffprobe from the container without decoding.
+
+    Returns:
+        The duration, or None if ffprobe is missing or the container does not state it, as
+        some streamed formats do not.
+    """
+    if shutil.which("ffprobe") is None:
+        return None
+    command = ["ffprobe", "-hide_banner", "-loglevel", "error", "-i", "pipe:0"]
+    command += ["-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1"]
+    result = subprocess.run(command, input=audio, capture_output=True)
+    try:
+        return float(result.stdout.decode().strip()) if result.returncode == 0 else None
+    except ValueError:
+        return None
@@ -13,20 +13,112 @@ class Settings(BaseSettings):
     QDRANT_URL: str | None = None
     QDRANT_PORT: str = "6333"
     QDRANT_HOST: str | None = None
+    QDRANT_QUANTIZATION: str | None = None  # "scalar", "binary" or None for float32 vectors
+    QDRANT_QUANTIZATION_RESCORE: bool = True
+    QDRANT_QUANTIZATION_OVERSAMPLING: float = 2.0
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_HNSW_M: int | None = None  # None keeps the Qdrant defaults
+    QDRANT_HNSW_EF_CONSTRUCT: int | None = None
+    QDRANT_SEARCH_HNSW_EF: int | None = None
+    QDRANT_ON_DISK: bool = False  # Keep full vectors on disk, quantized vectors stay in RAM
+
+    VECTOR_BACKEND: str = "qdrant"  # "qdrant" or "local"
+    LOCAL_VECTOR_INDEX_PATH: str | None = "/app/data/vector_index"  # None keeps it in memory
+
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"  # Changing it needs a re-embed migration
+    EMBEDDING_ENGINE: str = "torch"  # "torch", "onnx" or "onnx-int8"
+    EMBEDDING_ONNX_INT8_FILE: str = "onnx/model_quint8_avx2.onnx"
+    EMBEDDING_DIMENSIONS: int | None = None  # Truncate embeddings, changing it needs a re-embed
+    # Unix socket of a shared embedding service (see embedding_service.py), None to load locally
+    EMBEDDING_SERVICE_SOCKET: str | None = None
+    EMBEDDING_SERVICE_MAX_BATCH: int = 64
+    EMBEDDING_SERVICE_BATCH_WAIT_MS: float = 2.0
 
     TEXT_MODEL_NAME: str = "llama-3.3-70b-versatile"
     SMALL_TEXT_MODEL_NAME: str = "gemma2-9b-it"
+    # Fallbacks for TEXT_MODEL_NAME, e.g. ["llama-3.1-8b-instant"], enables the model pool
+    TEXT_MODEL_FALLBACKS: list[str] = []
+    MODEL_POOL_WINDOW_SECONDS: float = 300.0  # Calls older than this no longer count
+    MODEL_POOL_MIN_SAMPLES: int = 5
+    MODEL_POOL_MAX_ERROR_RATE: float = 0.5
+    MODEL_POOL_LATENCY_TOLERANCE: float = 1.5  # Prefer the primary unless it is this much slower
+    MODEL_POOL_HEDGE_ENABLED: bool = True  # Race the next model once a call passes its p95
     STT_MODEL_NAME: str = "whisper-large-v3-turbo"  # Speech to text model
+    STT_LANGUAGE: str | None = None  # e.g. "en", None lets Whisper detect it per chunk
+    # Longer voice notes are split at pauses and the chunks transcribed in parallel, needs ffmpeg
+    STT_LONG_AUDIO_THRESHOLD_SECONDS: float | None = 60.0  # None sends every note as is
+    STT_CHUNK_MAX_SECONDS: float = 30.0
+    STT_CHUNK_MIN_SECONDS: float = 10.0
+    STT_CHUNK_CONCURRENCY: int = 4
+    STT_SILENCE_THRESHOLD_DB: float = -40.0
     TTS_MODEL_NAME: str = "eleven_flash_v2_5"  # Text to speech model
+    # ElevenLabs output format, e.g. "opus_48000_32" for voice notes or "mp3_22050_32"
+    TTS_OUTPUT_FORMAT: str = "mp3_44100_128"
+    # Convert replies to "ogg_opus" or "mp3" with ffmpeg when the output format is not already
+    TTS_TRANSCODE_TO: str | None = None
+    TTS_TRANSCODE_BITRATE: str = "24k"
     TTI_MODEL_NAME: str = "black-forest-labs/FLUX.1-schnell-Free"  # Text to image model
+    IMAGE_JOBS_ENABLED: bool = False  # Reply right away, deliver the image when it is ready
+    IMAGE_JOB_WORKERS: int = 2
+    IMAGE_JOB_QUEUE_MAX_DEPTH: int = 16  # Image turns past this get a text-only reply
+    IMAGE_JOB_TIMEOUT_SECONDS: float = 120.0
+    IMAGE_JOB_MAX_RETAINED: int = 256  # Finished jobs kept for polling
     ITT_MODEL_NAME: str = "llama-3.2-90b-vision-preview"  # Image to text model
 
     MEMORY_TOP_K: int = 3
+    MEMORY_QUERY_MAX_TURNS: int = 3  # Recent user messages embedded as separate recall queries
+    MEMORY_QUERY_MAX_CHARS: int = 500  # Longer messages are cut before embedding
+    MEMORY_RERANK_ENABLED: bool = True
+    MEMORY_CANDIDATE_POOL: int = 20  # Candidates fetched for re-ranking down to MEMORY_TOP_K
+    MEMORY_MMR_LAMBDA: float = 0.7  # 1.0 ranks by relevance only, lower favours diversity
+    MEMORY_RECENCY_HALF_LIFE_DAYS: float = 30.0
+    MEMORY_RECENCY_WEIGHT: float = 0.3  # Share of the relevance that decays with age
+    MEMORY_FILTER_ENABLED: bool = True
+    MEMORY_FILTER_MIN_WORDS: int = 3
+    MEMORY_FILTER_CLASSIFIER_ENABLED: bool = False
+    MEMORY_FILTER_CLASSIFIER_MARGIN: float = 0.0
+    MEMORY_CONSOLIDATION_THRESHOLD: float = 0.85  # Similarity of memories merged by consolidation
+    MEMORY_CONSOLIDATION_BATCH_SIZE: int = 256
+    MEMORY_EXTRACTION_MODE: str = "single"  # "single" or "batch"
+    MEMORY_BATCH_SIZE: int = 4  # Unprocessed user messages that trigger a batch extraction
     ROUTER_MESSAGES_TO_ANALYZE: int = 3
+    # Static character card first, date, memories and activity in a trailing message
+    PROMPT_CACHE_FRIENDLY_LAYOUT: bool = False
+    SPECULATIVE_ROUTING_ENABLED: bool = False  # Generate the reply while the router decides
     TOTAL_MESSAGES_SUMMARY_TRIGGER: int = 20
     TOTAL_MESSAGES_AFTER_SUMMARY: int = 5
 
     SHORT_TERM_MEMORY_DB_PATH: str = "/app/data/memory.db"
 
+    INSTRUMENTATION_ENABLED: bool = False
+    INSTRUMENTATION_PROMETHEUS_PORT: int | None = None  # e.g. 9464, needs prometheus_client
+    INSTRUMENTATION_TRACING_ENABLED: bool = True  # OpenTelemetry spans, needs opentelemetry-api
+
+    WARMUP_ON_STARTUP: bool = False  # Warm up in the background when the graph is imported
+
+    INBOUND_DEDUP_TTL_SECONDS: int = 3600
+    INBOUND_DEDUP_MAX_ENTRIES: int = 10_000
+    INBOUND_COALESCE_WINDOW_SECONDS: float = 1.5
+    INBOUND_COALESCE_MAX_WAIT_SECONDS: float = 5.0
+    INBOUND_COALESCE_MAX_MESSAGES: int = 8
+
+    PROVIDER_MAX_CONCURRENCY: dict[str, int] = {"groq": 16, "together": 4, "elevenlabs": 4}
+    PROVIDER_RATE_LIMIT_PER_SECOND: dict[str, float] = {
+        "groq": 5.0,
+        "together": 1.0,
+        "elevenlabs": 2.0,
+    }
+    PROVIDER_MAX_RETRIES: int = 3
+    PROVIDER_BACKOFF_BASE_SECONDS: float = 0.5
+    PROVIDER_BACKOFF_MAX_SECONDS: float = 10.0
+    PROVIDER_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    PROVIDER_CIRCUIT_RECOVERY_SECONDS: float = 30.0
+
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 2048
+    LLM_CACHE_TTL_SECONDS: float = 24 * 3600
+    LLM_CACHE_MAX_KEY_CHARS: int = 64
+    LLM_CACHE_SEMANTIC_THRESHOLD: float | None = None  # e.g. 0.95 to enable the semantic tier
+
 
 settings = Settings()
@@ -0,0 +1,87 @@
+import asyncio
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from ai_companion.core.instrumentation import Instrumentation, SpanStats, current_thread_id
+
+
+def test_disabled_instrumentation_is_a_no_op():
+    instrumentation = Instrumentation(enabled=False)
+
+    async def node(state):
+        return {}
+
+    assert instrumentation.instrument_node("node", node) is node
+    assert instrumentation.span("provider", "groq") is instrumentation.span("node", "x")
+    instrumentation.record_tokens("model", 10, 5)
+    assert instrumentation.snapshot()["tokens"] == {}
+
+
+def test_instrumented_node_records_span_thread_and_token_usage():
+    instrumentation = Instrumentation(enabled=True, prometheus=False, tracing=False)
+    model = GenericFakeChatModel(
+        messages=iter(
+            [
+                AIMessage(
+                    content="Hello!",
+                    usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15},
+                )
+            ]
+        )
+    )
+    seen_threads = []
+
+    async def conversation_node(state):
+        seen_threads.append(current_thread_id.get())
+        # No config passed, the callback reaches the model through the configure hook
+        await model.ainvoke("hi")
+        with instrumentation.span("provider", "groq"):
+            pass
+        return {"messages": []}
+
+    node = instrumentation.instrument_node("conversation_node", conversation_node)
+    asyncio.run(node({}, {"configurable": {"thread_id": "thread-1"}}))
+    instrumentation.record_cache_lookup("router", "exact")
+    instrumentation.record_cache_lookup("router", "miss")
+
+    snapshot = instrumentation.snapshot()
+    assert seen_threads == ["thread-1"]
+    assert snapshot["spans"]["node.conversation_node"]["count"] == 1
+    assert snapshot["spans"]["provider.groq"]["count"] == 1
+    assert sum(t["prompt"] for t in snapshot["tokens"].values()) == 12
+    assert sum(t["completion"] for t in snapshot["tokens"].values()) == 3
+    assert snapshot["cache_hit_rates"] == {"router": 0.5}
+
+
+def test_instrumented_nodes_run_inside_a_graph():
+    from typing import TypedDict
+
+    from langgraph.graph import END, START, StateGraph
+
+    class State(TypedDict):
+        count: int
+
+    instrumentation = Instrumentation(enabled=True, prometheus=False, tracing=False)
+
+    def increment(state: State):
+        return {"count": state["count"] + 1}
+
+    builder = StateGraph(State)
+    builder.add_node("increment", instrumentation.instrument_node("increment", increment))
+    builder.add_edge(START, "increment")
+    builder.add_edge("increment", END)
+
+    result = asyncio.run(builder.compile().ainvoke({"count": 1}))
+
+    assert result == {"count": 2}
+    assert instrumentation.snapshot()["spans"]["node.increment"]["count"] == 1
+
+
+def test_span_percentiles_use_recent_samples():
+    stats = SpanStats()
+    assert stats.percentile(95) == 0.0
+    stats.samples.extend(i / 1000 for i in range(1, 101))
+
+    assert abs(stats.percentile(50) - 0.0505) < 1e-9
+    assert abs(stats.percentile(99) - 0.09901) < 1e-9
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from ai_companion.core.model_pool import ModelPool, ModelStats
+
+
+class StubModel(RunnableLambda):
+    """A model answering with its name after a delay, or failing."""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.calls = 0
+        self.cancelled = 0
+
+        async def respond(input):
+            self.calls += 1
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            if fail:
+                raise RuntimeError(f"{name} is overloaded")
+            return name
+
+        def respond_sync(input):
+            if fail:
+                raise RuntimeError(f"{name} is overloaded")
+            return name
+
+        super().__init__(respond_sync, afunc=respond)
+
+
+def _pool(models, **kwargs):
+    stats = {name: ModelStats(window_seconds=60) for name, _ in models}
+    return ModelPool(models, min_samples=3, stats=stats, **kwargs)
+
+
+def _observe(pool, name, seconds, count=5, failed=False):
+    for _ in range(count):
+        pool.stats[name].observe(seconds, failed=failed)
+
+
+def test_failing_model_falls_back_to_the_next_one():
+    primary, fallback = StubModel("primary", fail=True), StubModel("fallback")
+    pool = _pool([("primary", primary), ("fallback", fallback)], hedge=False)
+
+    assert asyncio.run(pool.ainvoke("hi")) == "fallback"
+    assert pool.stats["primary"].error_rate == 1.0
+    assert pool.stats["fallback"].count == 1
+
+
+def test_every_model_failing_raises_the_last_error():
+    pool = _pool([("a", StubModel("a", fail=True)), ("b", StubModel("b", fail=True))])
+
+    with pytest.raises(RuntimeError, match="b is overloaded"):
+        asyncio.run(pool.ainvoke("hi"))
+
+
+def test_slow_call_is_hedged_after_its_p95():
+    primary, fallback = StubModel("primary", delay=1.0), StubModel("fallback", delay=0.01)
+    pool = _pool([("primary", primary), ("fallback", fallback)])
+    _observe(pool, "primary", 0.02)
+
+    started = time.perf_counter()
+    assert asyncio.run(pool.ainvoke("hi")) == "fallback"
+
+    assert time.perf_counter() - started < 0.5
+    assert primary.cancelled == 1
+    # The cancelled call is not a sample of the primary's latency
+    assert pool.stats["primary"].count == 5
+    assert pool.stats["fallback"].count == 1
+
+
+def test_ranking_prefers_the_primary_unless_much_slower_or_unhealthy():
+    models = [("primary", StubModel("primary")), ("fallback", StubModel("fallback"))]
+
+    pool = _pool(models, latency_tolerance=1.5)
+    _observe(pool, "primary", 0.12)
+    _observe(pool, "fallback", 0.10)
+    assert [name for name, _ in pool.ranked()] == ["primary", "fallback"]
+
+    _observe(pool, "primary", 0.5, count=20)
+    assert [name for name, _ in pool.ranked()] == ["fallback", "primary"]
+
+    pool = _pool(models)
+    _observe(pool, "primary", 0.01, failed=True)
+    assert [name for name, _ in pool.ranked()] == ["fallback", "primary"]
+
+
+def test_pool_works_inside_a_chain_and_sync():
+    pool = _pool([("a", StubModel("a", fail=True)), ("b", StubModel("b"))])
+    chain = ChatPromptTemplate.from_messages([("human", "{text}")]) | pool
+
+    assert asyncio.run(chain.ainvoke({"text": "hi"})) == "b"
+    assert pool.invoke("hi") == "b"
@@ -0,0 +1,177 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+from ai_companion.core.exceptions import ProviderUnavailableError
+from ai_companion.core.provider_gateway import ProviderGateway, TokenBucket, parse_duration
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def make_gateway(**kwargs) -> ProviderGateway:
+    options: Dict[str, Any] = dict(
+        provider="test",
+        max_concurrency=2,
+        rate_per_second=1000.0,
+        max_retries=2,
+        backoff_base_seconds=0.001,
+        backoff_max_seconds=0.001,
+        failure_threshold=3,
+        recovery_seconds=60.0,
+    )
+    options.update(kwargs)
+    return ProviderGateway(**options)
+
+
+def test_transient_errors_are_retried():
+    attempts = []
+
+    async def flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError()
+        return "ok"
+
+    gateway = make_gateway()
+    assert asyncio.run(gateway.call(flaky)) == "ok"
+    assert gateway.metrics.retries == 2
+    assert gateway.metrics.circuit_state == "closed"
+
+
+def test_client_errors_are_not_retried():
+    def broken() -> str:
+        raise ValueError("bad request")
+
+    gateway = make_gateway()
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.call(broken))
+    assert gateway.metrics.retries == 0
+
+
+def test_circuit_opens_after_repeated_failures():
+    async def down() -> str:
+        raise ConnectionError("provider down")
+
+    gateway = make_gateway(max_retries=0)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            asyncio.run(gateway.call(down))
+
+    with pytest.raises(ProviderUnavailableError):
+        asyncio.run(gateway.call(down))
+    assert gateway.metrics.circuit_state == "open"
+    assert gateway.metrics.rejected == 1
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+def _half_open_gateway() -> ProviderGateway:
+    async def down() -> str:
+        raise ConnectionError("provider down")
+
+    gateway = make_gateway(max_retries=0, failure_threshold=1, recovery_seconds=0.0)
+    with pytest.raises(ConnectionError):
+        asyncio.run(gateway.call(down))
+    assert gateway.metrics.circuit_state == "half_open"
+    return gateway
+
+
+def test_half_open_trial_with_a_client_error_closes_the_circuit():
+    async def bad_request() -> str:
+        raise BadRequestError()
+
+    async def ok() -> str:
+        return "ok"
+
+    gateway = _half_open_gateway()
+    with pytest.raises(BadRequestError):
+        asyncio.run(gateway.call(bad_request))
+
+    assert gateway.metrics.circuit_state == "closed"
+    assert asyncio.run(gateway.call(ok)) == "ok"
+
+
+def test_cancelled_half_open_trial_frees_the_trial_slot():
+    async def hang() -> str:
+        await asyncio.sleep(60)
+        return "late"
+
+    async def cancel_trial(gateway: ProviderGateway) -> None:
+        trial = asyncio.ensure_future(gateway.call(hang))
+        await asyncio.sleep(0.01)
+        assert not gateway.circuit_breaker.allow_request()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    gateway = _half_open_gateway()
+    asyncio.run(cancel_trial(gateway))
+
+    assert gateway.metrics.circuit_state == "half_open"
+    assert gateway.circuit_breaker.allow_request()
+
+
+def test_a_call_from_before_the_circuit_opened_keeps_the_trial_exclusive():
+    async def slow_down() -> str:
+        await asyncio.sleep(0.05)
+        raise ConnectionError("provider down")
+
+    async def down() -> str:
+        raise ConnectionError("provider down")
+
+    async def hang() -> str:
+        await asyncio.sleep(60)
+        return "late"
+
+    async def scenario() -> None:
+        gateway = make_gateway(max_retries=0, failure_threshold=1, recovery_seconds=0.0)
+        early = asyncio.ensure_future(gateway.call(slow_down))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ConnectionError):
+            await gateway.call(down)
+        trial = asyncio.ensure_future(gateway.call(hang))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ConnectionError):
+            await early
+        # The early call ended while the trial is still running, no second trial gets through
+        assert gateway.metrics.circuit_state == "half_open"
+        assert not gateway.circuit_breaker.allow_request()
+        trial.cancel()
+        await asyncio.gather(trial, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_is_bounded():
+    in_flight = []
+    peak = []
+
+    async def slow() -> None:
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+
+    async def run():
+        gateway = make_gateway(max_concurrency=2)
+        await asyncio.gather(*(gateway.call(slow) for _ in range(6)))
+
+    asyncio.run(run())
+    assert max(peak) == 2
+
+
+def test_rate_limit_headers_pause_the_bucket():
+    assert parse_duration("2m59.56s") == pytest.approx(179.56)
+    assert parse_duration("150ms") == pytest.approx(0.15)
+    assert parse_duration("garbage") is None
+
+    bucket = TokenBucket(rate=10.0, capacity=10.0)
+    bucket.update_from_headers(
+        {"x-ratelimit-remaining-tokens": "0", "x-ratelimit-reset-tokens": "7.66s"}
+    )
+    assert bucket._paused_until > 0
@@ -0,0 +1,75 @@
+import asyncio
+
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+
+from ai_companion.core.response_cache import ResponseCache, with_response_cache
+
+
+def test_exact_tier_matches_normalized_input():
+    cache = ResponseCache(name="test", semantic_threshold=None)
+
+    async def run():
+        await cache.aput("Ok!!", "conversation")
+        return await cache.aget(" ok "), await cache.aget("okay")
+
+    assert asyncio.run(run()) == ("conversation", None)
+    assert cache.stats.exact_hits == 1
+    assert cache.stats.misses == 1
+
+
+def test_entries_expire_and_are_bounded():
+    cache = ResponseCache(name="test", max_entries=2, ttl_seconds=60, semantic_threshold=None)
+
+    async def run():
+        for text in ("lol", "thanks", "ok"):
+            await cache.aput(text, text)
+        return await cache.aget("lol")
+
+    assert asyncio.run(run()) is None
+    assert len(cache) == 2
+
+    expired = ResponseCache(name="test", ttl_seconds=0, semantic_threshold=None)
+    asyncio.run(expired.aput("lol", "conversation"))
+    assert asyncio.run(expired.aget("lol")) is None
+
+
+def test_semantic_tier_uses_embedding_similarity():
+    vectors = {
+        "ok": np.array([1.0, 0.0]),
+        "okay": np.array([0.99, 0.141]),
+        "send me a picture": np.array([0.0, 1.0]),
+    }
+
+    async def embed(text: str) -> np.ndarray:
+        vector = vectors[text]
+        return vector / np.linalg.norm(vector)
+
+    cache = ResponseCache(name="test", semantic_threshold=0.95, embedder=embed)
+
+    async def run():
+        await cache.aput("ok", "conversation")
+        return await cache.aget("okay"), await cache.aget("send me a picture")
+
+    assert asyncio.run(run()) == ("conversation", None)
+    assert cache.stats.semantic_hits == 1
+
+
+def test_cached_chain_skips_repeat_calls():
+    calls = []
+
+    async def classify(text: str) -> str:
+        calls.append(text)
+        return "conversation"
+
+    chain = with_response_cache(
+        RunnableLambda(lambda text: "conversation", afunc=classify),
+        ResponseCache(name="test", semantic_threshold=None),
+        key=lambda text: text,
+    )
+
+    async def run():
+        return [await chain.ainvoke(text) for text in ("lol", "LOL", "lol!")]
+
+    assert asyncio.run(run()) == ["conversation"] * 3
+    assert calls == ["lol"]
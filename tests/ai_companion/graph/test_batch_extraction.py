@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, cast
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+
+from ai_companion.graph import nodes
+from ai_companion.graph.state import AICompanionState
+from ai_companion.modules.memory.long_term.backends import LocalBackend
+from ai_companion.modules.memory.long_term.vector_store import VectorStore
+from ai_companion.settings import settings
+
+VOCABULARY = ["lagos", "nurse", "football"]
+
+
+class KeywordModel:
+    """Embeds a text as counts of a few keywords."""
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        batch = [texts] if isinstance(texts, str) else texts
+        vectors = np.array(
+            [[text.lower().count(word) + 0.01 for word in VOCABULARY] for text in batch],
+            dtype=np.float32,
+        )
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors[0] if isinstance(texts, str) else vectors
+
+
+class RecordingMemoryManager:
+    def __init__(self):
+        self.batches = []
+
+    async def extract_and_store_memories_batch(self, messages):
+        self.batches.append([message.content for message in messages if message.type == "human"])
+        return []
+
+
+def _conversation(*turns):
+    return [
+        HumanMessage(content=text, id=f"h{i}")
+        if i % 2 == 0
+        else AIMessage(content=text, id=f"a{i}")
+        for i, text in enumerate(turns)
+    ]
+
+
+def _state(**values: Any) -> AICompanionState:
+    return cast(AICompanionState, values)
+
+
+def _use_manager(monkeypatch) -> RecordingMemoryManager:
+    manager = RecordingMemoryManager()
+
+    async def get_manager():
+        return manager
+
+    monkeypatch.setattr(nodes, "get_memory_manager_async", get_manager)
+    return manager
+
+
+def test_high_water_mark_advances_past_processed_messages(monkeypatch):
+    manager = _use_manager(monkeypatch)
+    messages = _conversation("I live in Lagos", "Nice!", "I'm a nurse", "Respect")
+
+    update = asyncio.run(nodes._extract_memories_batch(_state(messages=messages), min_messages=2))
+
+    assert update == {"memory_high_water_mark": "a3"}
+    assert manager.batches == [["I live in Lagos", "I'm a nurse"]]
+
+    later = [*messages, HumanMessage(content="I play football", id="h4")]
+    state = _state(messages=later, memory_high_water_mark="a3")
+    assert nodes._unprocessed_messages(state) == later[4:]
+    assert asyncio.run(nodes._extract_memories_batch(state, min_messages=2)) == {}
+
+
+def test_a_trimmed_high_water_mark_treats_the_remaining_messages_as_unprocessed():
+    # Summarization dropped the marked message, everything left is newer than it
+    messages = _conversation("old", "old reply", "I'm a nurse", "Respect", "I play football")[2:]
+
+    pending = nodes._unprocessed_messages(_state(messages=messages, memory_high_water_mark="a1"))
+
+    assert [message.content for message in pending] == ["I'm a nurse", "Respect", "I play football"]
+
+
+def test_summarization_flushes_pending_messages_before_trimming(monkeypatch):
+    manager = _use_manager(monkeypatch)
+    monkeypatch.setattr(settings, "MEMORY_EXTRACTION_MODE", "batch")
+    monkeypatch.setattr(settings, "TOTAL_MESSAGES_SUMMARY_TRIGGER", 4)
+    monkeypatch.setattr(settings, "TOTAL_MESSAGES_AFTER_SUMMARY", 2)
+
+    class SummaryModel:
+        async def ainvoke(self, prompt):
+            return "They talked about work"
+
+    monkeypatch.setattr(nodes, "get_chat_model", lambda: SummaryModel())
+    messages = _conversation("hi", "hello", "I'm a nurse", "Respect", "I play football")
+
+    update = asyncio.run(
+        nodes.summarize_conversation_node(_state(messages=messages, memory_high_water_mark="a1"))
+    )
+
+    assert manager.batches == [["I'm a nurse", "I play football"]]
+    assert update["memory_high_water_mark"] == "h4"
+    assert update["messages"] == messages[-2:]
+
+
+def test_batched_store_skips_duplicates_within_the_batch_and_the_collection(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(VectorStore, "_instance", None)
+    monkeypatch.setattr(VectorStore, "_initialized", False)
+    store = VectorStore()
+    store._model = KeywordModel()
+    store._backend = LocalBackend("memories")
+    store._backend.create_collection(len(VOCABULARY))
+    existing = store._model.encode(["User lives in Lagos"], normalize_embeddings=True)
+    store._backend.upsert(["a"], existing, [{"text": "User lives in Lagos"}])
+
+    stored = asyncio.run(
+        store.store_memories_async(
+            [
+                "User lives in Lagos now",
+                "User is a nurse",
+                "User works as a nurse",
+                "User plays football",
+            ]
+        )
+    )
+
+    assert stored == ["User is a nurse", "User plays football"]
+    assert store._backend.count() == 3
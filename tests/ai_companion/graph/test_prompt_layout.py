@@ -0,0 +1,51 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from ai_companion.graph.utils import chains
+from ai_companion.settings import settings
+
+
+def _format(monkeypatch, now, messages, memory_context, activity, summary=""):
+    monkeypatch.setattr(chains, "get_current_datetime", lambda timezone: now)
+    prompt = chains.get_character_prompt(summary)
+    return prompt.format_messages(
+        messages=messages, memory_context=memory_context, current_activity=activity
+    )
+
+
+def test_cache_friendly_layout_keeps_a_stable_prefix(monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_CACHE_FRIENDLY_LAYOUT", True)
+    history = [HumanMessage(content="How far?"), AIMessage(content="I dey o! Wetin be your name?")]
+
+    first = _format(monkeypatch, "Monday at 09:00 AM", history[:1], "", "Coding")
+    second = _format(
+        monkeypatch,
+        "Monday at 09:01 AM",
+        history + [HumanMessage(content="Na Ada, {I} dey Lagos")],
+        "- Name is Ada",
+        "Eating jollof",
+        summary="User said {hello}",
+    )
+
+    # Everything but the trailing context message is an unchanged prefix of the next turn
+    prefix = first[:-1]
+    assert [(m.type, m.content) for m in second[: len(prefix)]] == [
+        (m.type, m.content) for m in prefix
+    ]
+    assert "{current_datetime}" not in second[0].content
+    assert "09:00" not in first[0].content
+
+    context = second[-1]
+    assert context.type == "system"
+    for volatile in ("09:01", "- Name is Ada", "Eating jollof", "User said {hello}"):
+        assert volatile in context.content
+
+
+def test_inline_layout_puts_the_context_in_the_system_message(monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_CACHE_FRIENDLY_LAYOUT", False)
+
+    messages = _format(
+        monkeypatch, "Monday at 09:00 AM", [HumanMessage(content="hi")], "", "Coding"
+    )
+
+    assert [m.type for m in messages] == ["system", "human"]
+    assert "09:00" in messages[0].content and "Coding" in messages[0].content
@@ -0,0 +1,39 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from ai_companion.core.response_cache import ResponseCache, with_response_cache
+from ai_companion.graph.utils.chains import _router_cache_key
+
+
+def test_same_reply_is_routed_by_the_messages_before_it():
+    calls = []
+
+    async def route(inputs: dict) -> str:
+        calls.append(inputs)
+        asked_for_picture = "picture" in inputs["messages"][-2].content
+        return "image" if asked_for_picture else "conversation"
+
+    router = with_response_cache(
+        RunnableLambda(lambda inputs: "conversation", afunc=route),
+        ResponseCache(name="test", semantic_threshold=None),
+        key=_router_cache_key,
+    )
+    picture = [AIMessage(content="Make I snap you picture of my jollof?"), HumanMessage("yes")]
+    small_talk = [AIMessage(content="You don chop today?"), HumanMessage("yes")]
+
+    async def run():
+        return [
+            await router.ainvoke({"messages": messages})
+            for messages in (picture, small_talk, picture, small_talk)
+        ]
+
+    assert asyncio.run(run()) == ["image", "conversation", "image", "conversation"]
+    # Repeats of the same window are still answered from the cache
+    assert len(calls) == 2
+
+
+def test_long_latest_messages_are_not_cached():
+    assert _router_cache_key({"messages": [HumanMessage("na " * 100)]}) is None
+    assert _router_cache_key({"messages": [AIMessage(content="How far?")]}) is None
@@ -0,0 +1,64 @@
+import asyncio
+from typing import Any, cast
+
+from ai_companion.graph import nodes
+from ai_companion.graph.state import AICompanionState
+from ai_companion.graph.utils.speculation import SpeculationMetrics
+
+
+def _state(**values: Any) -> AICompanionState:
+    return cast(AICompanionState, values)
+
+
+def _run_speculative_router(monkeypatch, workflow):
+    metrics = SpeculationMetrics()
+    reply_cancelled = asyncio.Event()
+
+    async def router_node(state):
+        await asyncio.sleep(0.01)
+        return {"workflow": workflow}
+
+    async def generate_response(state, config, messages=None):
+        try:
+            await asyncio.sleep(0.02)
+        except asyncio.CancelledError:
+            reply_cancelled.set()
+            raise
+        return "Hello!"
+
+    monkeypatch.setattr(nodes, "get_speculation_metrics", lambda: metrics)
+    monkeypatch.setattr(nodes, "router_node", router_node)
+    monkeypatch.setattr(nodes, "_generate_response", generate_response)
+
+    update = asyncio.run(nodes.speculative_router_node(_state(messages=[]), {}))
+    return update, metrics, reply_cancelled.is_set()
+
+
+def test_speculative_reply_is_kept_for_text_workflows(monkeypatch):
+    update, metrics, cancelled = _run_speculative_router(monkeypatch, "conversation")
+
+    assert update == {"workflow": "conversation", "speculative_response": "Hello!"}
+    assert not cancelled
+    assert (metrics.started, metrics.used, metrics.wasted) == (1, 1, 0)
+
+
+def test_speculative_reply_is_cancelled_for_images(monkeypatch):
+    update, metrics, cancelled = _run_speculative_router(monkeypatch, "image")
+
+    assert update == {"workflow": "image", "speculative_response": None}
+    assert cancelled
+    assert (metrics.started, metrics.cancelled, metrics.waste_rate) == (1, 1, 1.0)
+
+
+def test_conversation_node_uses_the_speculative_reply(monkeypatch):
+    async def generate_response(state, config, messages=None):
+        raise AssertionError("The reply should not be generated again")
+
+    monkeypatch.setattr(nodes, "_generate_response", generate_response)
+
+    update = asyncio.run(
+        nodes.conversation_node(_state(messages=[], speculative_response="Hello!"), {})
+    )
+
+    assert update["messages"].content == "Hello!"
+    assert update["speculative_response"] is None
@@ -0,0 +1,148 @@
+import asyncio
+
+from ai_companion.interfaces.inbound import (
+    InboundMessageProcessor,
+    MessageCoalescer,
+    MessageDeduplicator,
+)
+
+
+def test_duplicate_messages_are_processed_once():
+    calls = []
+
+    async def handler(thread_id: str, payload: str) -> str:
+        calls.append((thread_id, payload))
+        return payload
+
+    async def run():
+        processor = InboundMessageProcessor(handler)
+        first = await processor.process("thread-1", "wamid.1", "hello")
+        second = await processor.process("thread-1", "wamid.1", "hello")
+        return processor, first, second
+
+    processor, first, second = asyncio.run(run())
+
+    assert first == "hello"
+    assert second is None
+    assert calls == [("thread-1", "hello")]
+    assert processor.duplicates_dropped == 1
+
+
+def test_failed_message_can_be_retried():
+    attempts = []
+
+    async def handler(thread_id: str, payload: str) -> str:
+        attempts.append(payload)
+        if len(attempts) == 1:
+            raise RuntimeError("provider down")
+        return payload
+
+    async def run():
+        processor = InboundMessageProcessor(handler)
+        try:
+            await processor.process("thread-1", "wamid.1", "hello")
+        except RuntimeError:
+            pass
+        return await processor.process("thread-1", "wamid.1", "hello")
+
+    assert asyncio.run(run()) == "hello"
+    assert attempts == ["hello", "hello"]
+
+
+def test_messages_are_serialized_per_thread_and_parallel_across_threads():
+    active: dict[str, int] = {}
+    max_active: dict[str, int] = {}
+    order: list[str] = []
+
+    async def handler(thread_id: str, payload: str) -> str:
+        active[thread_id] = active.get(thread_id, 0) + 1
+        max_active[thread_id] = max(max_active.get(thread_id, 0), active[thread_id])
+        max_active["total"] = max(max_active.get("total", 0), sum(active.values()))
+        await asyncio.sleep(0.01)
+        order.append(payload)
+        active[thread_id] -= 1
+        return payload
+
+    async def run():
+        processor = InboundMessageProcessor(handler)
+        await asyncio.gather(
+            processor.process("a", "1", "a1"),
+            processor.process("a", "2", "a2"),
+            processor.process("b", "3", "b1"),
+            processor.process("a", "4", "a3"),
+        )
+        return processor
+
+    processor = asyncio.run(run())
+
+    assert max_active["a"] == 1
+    assert max_active["total"] == 2
+    assert [p for p in order if p.startswith("a")] == ["a1", "a2", "a3"]
+    assert len(processor.locks) == 0
+
+
+def test_deduplicator_bounds_and_expiry():
+    deduplicator = MessageDeduplicator(ttl_seconds=0, max_entries=10)
+    assert not deduplicator.check_and_mark("1")
+    assert not deduplicator.check_and_mark("1")
+
+    deduplicator = MessageDeduplicator(ttl_seconds=60, max_entries=2)
+    for message_id in ("1", "2", "3"):
+        deduplicator.check_and_mark(message_id)
+    assert len(deduplicator) == 2
+    assert not deduplicator.check_and_mark("1")
+
+
+def test_rapid_fire_messages_are_coalesced_into_one_turn():
+    turns = []
+
+    async def handler(thread_id: str, payload: str) -> str:
+        turns.append((thread_id, payload))
+        return payload
+
+    async def send(processor, thread_id, message_id, text, delay):
+        await asyncio.sleep(delay)
+        return await processor.process(thread_id, message_id, text)
+
+    async def run():
+        processor = InboundMessageProcessor(
+            handler, coalescer=MessageCoalescer(window_seconds=0.05, max_wait_seconds=1.0)
+        )
+        results = await asyncio.gather(
+            send(processor, "a", "1", "hey", 0),
+            send(processor, "a", "2", "how far", 0.01),
+            send(processor, "b", "3", "hello", 0.01),
+            send(processor, "a", "4", "you dey?", 0.02),
+        )
+        return processor, results
+
+    processor, results = asyncio.run(run())
+
+    assert sorted(turns) == [("a", "hey\nhow far\nyou dey?"), ("b", "hello")]
+    assert results == ["hey\nhow far\nyou dey?", None, "hello", None]
+    assert processor.messages_coalesced == 2
+
+
+def test_cancelled_burst_lets_every_message_of_it_be_retried():
+    turns = []
+
+    async def handler(thread_id: str, payload: str) -> str:
+        turns.append(payload)
+        return payload
+
+    async def run():
+        processor = InboundMessageProcessor(
+            handler, coalescer=MessageCoalescer(window_seconds=0.5, max_wait_seconds=1.0)
+        )
+        opener = asyncio.ensure_future(processor.process("a", "1", "hey"))
+        await asyncio.sleep(0.01)
+        assert await processor.process("a", "2", "how far") is None
+        opener.cancel()
+        await asyncio.gather(opener, return_exceptions=True)
+        # The provider retries both messages, neither is a duplicate
+        return await asyncio.gather(
+            processor.process("a", "1", "hey"), processor.process("a", "2", "how far")
+        )
+
+    assert asyncio.run(run()) == ["hey\nhow far", None]
+    assert turns == ["hey\nhow far"]
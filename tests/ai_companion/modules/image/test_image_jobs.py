@@ -0,0 +1,177 @@
+import asyncio
+from types import SimpleNamespace
+from typing import cast
+
+import pytest
+from langchain_core.runnables import RunnableConfig
+
+from ai_companion.core.exceptions import ImageQueueFullError
+from ai_companion.graph import nodes
+from ai_companion.graph.state import AICompanionState
+from ai_companion.modules.image.jobs import ImageJobQueue
+from ai_companion.settings import settings
+
+
+class SlowGenerator:
+    def __init__(self, seconds: float = 0.05, fail_on: str = ""):
+        self.seconds = seconds
+        self.fail_on = fail_on
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, prompt: str, output_path: str) -> bytes:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.seconds)
+            if prompt == self.fail_on:
+                raise RuntimeError("provider down")
+            return b"png"
+        finally:
+            self.running -= 1
+
+
+def test_submit_returns_before_the_image_is_generated():
+    async def scenario():
+        queue = ImageJobQueue(SlowGenerator(seconds=0.2), workers=1, max_depth=4)
+        job = queue.submit("a sunset in Lagos", "sunset.png", thread_id="thread")
+        assert job.status == "queued"
+        finished = await queue.wait(job.id, timeout=2)
+        await queue.shutdown()
+        return finished
+
+    job = asyncio.run(scenario())
+    assert job.status == "done"
+    assert job.finished_at is not None
+
+
+def test_workers_bound_the_concurrent_generations():
+    generate = SlowGenerator()
+
+    async def scenario():
+        queue = ImageJobQueue(generate, workers=2, max_depth=8)
+        jobs = [queue.submit(f"image {i}", f"{i}.png") for i in range(6)]
+        await asyncio.gather(*(queue.wait(job.id, timeout=2) for job in jobs))
+        await queue.shutdown()
+        return queue.snapshot()
+
+    assert asyncio.run(scenario())["done"] == 6
+    assert generate.peak == 2
+
+
+def test_submissions_past_the_depth_limit_are_rejected():
+    async def scenario():
+        queue = ImageJobQueue(SlowGenerator(seconds=1), workers=1, max_depth=2)
+        queue.submit("first", "1.png")
+        await asyncio.sleep(0)  # The worker picks up the first job
+        queue.submit("second", "2.png")
+        queue.submit("third", "3.png")
+        with pytest.raises(ImageQueueFullError):
+            queue.submit("fourth", "4.png")
+        snapshot = queue.snapshot()
+        await queue.shutdown()
+        return snapshot
+
+    assert asyncio.run(scenario()) == {
+        "queued": 2,
+        "running": 1,
+        "done": 0,
+        "failed": 0,
+        "rejected": 1,
+    }
+
+
+def test_callbacks_receive_finished_and_failed_jobs():
+    delivered = []
+
+    async def deliver(job):
+        delivered.append((job.prompt, job.status))
+
+    async def scenario():
+        queue = ImageJobQueue(SlowGenerator(fail_on="broken"), workers=2, max_depth=4)
+        queue.add_done_callback(deliver)
+        ok = queue.submit("fine", "fine.png", on_done=lambda job: delivered.append("own"))
+        broken = queue.submit("broken", "broken.png")
+        await queue.wait(ok.id, timeout=2)
+        failed = await queue.wait(broken.id, timeout=2)
+        await asyncio.sleep(0)
+        await queue.shutdown()
+        return failed
+
+    failed = asyncio.run(scenario())
+    assert failed.error == "RuntimeError: provider down"
+    assert set(delivered) == {("fine", "done"), ("broken", "failed"), "own"}
+
+
+def test_slow_jobs_time_out_and_old_jobs_are_forgotten():
+    async def scenario():
+        queue = ImageJobQueue(
+            SlowGenerator(seconds=1), workers=1, max_depth=4, timeout_seconds=0.01, max_retained=1
+        )
+        first = queue.submit("first", "1.png")
+        second = queue.submit("second", "2.png")
+        await queue.wait(second.id, timeout=2)
+        await queue.shutdown()
+        return queue, first, second
+
+    queue, first, second = asyncio.run(scenario())
+    assert second.status == "failed" and (second.error or "").startswith("TimeoutError")
+    assert queue.get(first.id) is None
+    assert queue.get(second.id) is second
+
+
+def test_shutdown_fails_running_and_queued_jobs():
+    delivered = []
+
+    async def scenario():
+        queue = ImageJobQueue(SlowGenerator(seconds=1), workers=1, max_depth=4)
+        queue.add_done_callback(lambda job: delivered.append(job.prompt))
+        jobs = [queue.submit(f"image {i}", f"{i}.png") for i in range(3)]
+        await asyncio.sleep(0)  # The worker picks up the first job
+        await queue.shutdown()
+        return jobs, queue.snapshot()
+
+    jobs, snapshot = asyncio.run(scenario())
+    assert [(job.status, job.error) for job in jobs] == [("failed", "cancelled")] * 3
+    assert all(job._finished.is_set() for job in jobs)
+    assert sorted(delivered) == ["image 0", "image 1", "image 2"]
+    assert snapshot["failed"] == 3 and snapshot["queued"] == 0
+
+
+def test_image_node_replies_before_the_image_in_job_mode(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "IMAGE_JOBS_ENABLED", True)
+    queue = ImageJobQueue(SlowGenerator(seconds=0.2), workers=1, max_depth=1)
+
+    async def create_scenario(messages):
+        return SimpleNamespace(image_prompt="jollof rice at a party")
+
+    async def generate_response(state, config, messages=None):
+        return "See wetin I dey chop!" if messages else "No picture for now o"
+
+    monkeypatch.setattr(
+        nodes,
+        "get_text_to_image_module",
+        lambda: SimpleNamespace(create_scenario=create_scenario),
+    )
+    monkeypatch.setattr(nodes, "get_image_job_queue", lambda: queue)
+    monkeypatch.setattr(nodes, "_generate_response", generate_response)
+    config = cast(RunnableConfig, {"configurable": {"thread_id": "thread"}})
+
+    async def scenario():
+        state = cast(AICompanionState, {"messages": []})
+        replies = [await nodes.image_node(state, config) for _ in range(3)]
+        job = queue.get(replies[0]["image_job_id"])
+        assert job is not None
+        statuses = (job.status, (await queue.wait(job.id, timeout=2)).status)
+        await queue.shutdown()
+        return replies, job, statuses
+
+    replies, job, statuses = asyncio.run(scenario())
+    assert replies[0]["messages"].content == "See wetin I dey chop!"
+    assert statuses == ("running", "done")
+    assert job.thread_id == "thread"
+    # The second image waits for the worker, the third is over the depth limit
+    assert replies[1]["image_job_id"] is not None
+    assert replies[2]["image_job_id"] is None
+    assert replies[2]["messages"].content == "No picture for now o"
@@ -0,0 +1,98 @@
+import asyncio
+
+import numpy as np
+
+from ai_companion.modules.memory.long_term.backends import LocalBackend
+from ai_companion.modules.memory.long_term.consolidation import (
+    MemoryConsolidator,
+    cluster_similar,
+)
+
+
+def make_backend() -> LocalBackend:
+    backend = LocalBackend("memories")
+    backend.create_collection(2)
+    backend.upsert(
+        ["a", "b", "c", "d"],
+        np.array([[1.0, 0.0], [0.99, 0.1], [0.98, 0.15], [0.0, 1.0]], dtype=np.float32),
+        [
+            {"text": "Lives in Ibadan", "timestamp": "2024-01-01T00:00:00"},
+            {"text": "Lives in Lagos", "timestamp": "2024-06-01T00:00:00"},
+            {"text": "Moved to Lagos", "timestamp": "2024-03-01T00:00:00"},
+            {"text": "Works as a nurse", "timestamp": "2024-02-01T00:00:00"},
+        ],
+    )
+    return backend
+
+
+def test_cluster_similar_does_not_chain_distinct_facts():
+    # 0~1 and 1~2 reach the threshold, 0 and 2 do not
+    vectors = np.array([[1.0, 0.0], [0.9, 0.44], [0.6, 0.8], [-1.0, 0.0]])
+
+    assert cluster_similar(vectors, threshold=0.85, block_size=2) == [[0, 1]]
+    assert cluster_similar(vectors[[1, 0, 2]], threshold=0.85) == [[0, 1]]
+
+
+def test_newest_strategy_keeps_newest_memory_of_each_cluster():
+    backend = make_backend()
+
+    consolidator = MemoryConsolidator(backend, batch_size=2, threshold=0.9)
+
+    dry = asyncio.run(consolidator.run())
+    assert dry.dry_run and backend.count() == 4
+
+    report = asyncio.run(consolidator.run(dry_run=False))
+
+    texts = sorted(record.payload["text"] for record in backend.scroll(10)[0])
+    assert texts == ["Lives in Lagos", "Works as a nurse"]
+    assert (report.points_before, report.points_after, report.clusters) == (4, 2, 1)
+
+
+def test_merge_strategy_rewrites_survivor_and_dry_run_writes_nothing():
+    backend = make_backend()
+    merged_facts = []
+
+    async def merger(facts):
+        merged_facts.append(facts)
+        return "Lives in Lagos, moved from Ibadan"
+
+    async def embedder(texts):
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+    consolidator = MemoryConsolidator(backend, embedder=embedder, merger=merger, threshold=0.9)
+
+    dry = asyncio.run(consolidator.run(strategy="merge", dry_run=True))
+    assert backend.count() == 4 and dry.points_after == 2
+
+    asyncio.run(consolidator.run(strategy="merge", dry_run=False))
+    assert merged_facts[-1] == ["Lives in Ibadan", "Moved to Lagos", "Lives in Lagos"]
+    assert sorted(r.payload["text"] for r in backend.scroll(10)[0]) == [
+        "Lives in Lagos, moved from Ibadan",
+        "Works as a nurse",
+    ]
+
+
+def test_groups_are_consolidated_separately_with_the_filter_in_the_scroll():
+    backend = LocalBackend("memories")
+    backend.create_collection(2)
+    vectors = np.array([[1.0, 0.0], [0.99, 0.1], [1.0, 0.01], [0.98, 0.15]], dtype=np.float32)
+    backend.upsert(
+        ["a", "b", "c", "d"],
+        vectors,
+        [
+            {"text": "Lives in Lagos", "user_id": "ada", "timestamp": "2024-01-01"},
+            {"text": "Lives in Lagos now", "user_id": "ada", "timestamp": "2024-02-01"},
+            {"text": "Lives in Lagos", "user_id": "tobi", "timestamp": "2024-01-01"},
+            {"text": "No user", "timestamp": "2024-01-01"},
+        ],
+    )
+
+    page, _ = backend.scroll(10, payload_filter={"user_id": "tobi"})
+    assert [record.id for record in page] == ["c"]
+
+    consolidator = MemoryConsolidator(backend, batch_size=1, threshold=0.9, group_by="user_id")
+    report = asyncio.run(consolidator.run(dry_run=False))
+
+    # Similar memories of different users are not merged into each other
+    assert sorted(record.id for record in backend.scroll(10)[0]) == ["b", "c", "d"]
+    assert (report.clusters, report.deleted) == (1, 1)
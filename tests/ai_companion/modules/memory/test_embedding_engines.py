@@ -0,0 +1,62 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from ai_companion.modules.memory.long_term.embeddings import load_embedding_model
+from ai_companion.settings import settings
+
+
+class FakeSentenceTransformer:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+        self.kwargs = kwargs
+
+
+@pytest.fixture(autouse=True)
+def sentence_transformers(monkeypatch):
+    module = SimpleNamespace(SentenceTransformer=FakeSentenceTransformer)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+
+
+@pytest.fixture
+def onnxruntime(monkeypatch):
+    monkeypatch.setitem(sys.modules, "onnxruntime", SimpleNamespace())
+
+
+def test_torch_engine_loads_the_default_backend():
+    model = load_embedding_model("all-MiniLM-L6-v2", engine="torch", dimensions=None)
+
+    assert model.model_name == "all-MiniLM-L6-v2"
+    assert model.kwargs == {"truncate_dim": None}
+
+
+def test_onnx_engines_select_the_onnx_backend(onnxruntime):
+    onnx = load_embedding_model("all-MiniLM-L6-v2", engine="onnx", dimensions=None)
+    int8 = load_embedding_model("all-MiniLM-L6-v2", engine="onnx-int8", dimensions=None)
+
+    assert onnx.kwargs == {"truncate_dim": None, "backend": "onnx"}
+    assert int8.kwargs == {
+        "truncate_dim": None,
+        "backend": "onnx",
+        "model_kwargs": {"file_name": settings.EMBEDDING_ONNX_INT8_FILE},
+    }
+
+
+def test_dimensions_truncate_the_embeddings():
+    model = load_embedding_model("all-MiniLM-L6-v2", engine="torch", dimensions=128)
+
+    assert model.kwargs["truncate_dim"] == 128
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError, match="Unknown embedding engine 'tensorrt'"):
+        load_embedding_model("all-MiniLM-L6-v2", engine="tensorrt")
+
+
+def test_onnx_engine_without_onnxruntime_explains_the_install(monkeypatch):
+    # A None entry makes the import fail as if the package were missing
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+
+    with pytest.raises(ImportError, match="sentence-transformers\\[onnx\\]"):
+        load_embedding_model("all-MiniLM-L6-v2", engine="onnx-int8")
@@ -0,0 +1,85 @@
+import asyncio
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from ai_companion.modules.memory.long_term.embedding_service import (
+    EmbeddingServer,
+    EmbeddingServiceError,
+    RemoteEmbeddingModel,
+)
+
+
+class LengthModel:
+    """Embeds a text as [len(text), 1, 0, 0], counting encode calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+    def encode(self, texts, normalize_embeddings=False):
+        self.calls += 1
+        return np.array([[len(text), 1.0, 0.0, 0.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def service(tmp_path):
+    model = LengthModel()
+    socket_path = str(tmp_path / "embeddings.sock")
+    server = EmbeddingServer(model, max_batch=64, batch_wait_seconds=0.05)
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(server.serve(socket_path, ready))
+
+    def run():
+        with contextlib.suppress(asyncio.CancelledError):
+            loop.run_until_complete(task)
+        loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(5)
+
+    yield model, server, socket_path
+
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+
+
+def test_remote_model_matches_the_sentence_transformer_api(service):
+    model, _, socket_path = service
+    remote = RemoteEmbeddingModel(socket_path)
+
+    assert remote.get_sentence_embedding_dimension() == 4
+    single = remote.encode("abc")
+    assert single.shape == (4,)
+    np.testing.assert_array_equal(single, [3, 1, 0, 0])
+
+    batch = remote.encode(["a", "abcd"], normalize_embeddings=True)
+    assert batch.shape == (2, 4) and batch.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(batch, axis=1), 1.0, rtol=1e-6)
+
+
+def test_concurrent_requests_are_batched(service):
+    model, server, socket_path = service
+    remote = RemoteEmbeddingModel(socket_path)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: remote.encode(["x" * i, "y"]), range(1, 9)))
+
+    for i, vectors in enumerate(results, start=1):
+        assert vectors[0, 0] == i and vectors[1, 0] == 1
+    assert server.batches < 8
+    assert model.calls == server.batches
+
+
+def test_unreachable_service_raises(tmp_path):
+    remote = RemoteEmbeddingModel(str(tmp_path / "missing.sock"))
+
+    with pytest.raises(EmbeddingServiceError, match="Cannot reach"):
+        remote.encode("hello")
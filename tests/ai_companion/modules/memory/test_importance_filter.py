@@ -0,0 +1,102 @@
+import asyncio
+
+import numpy as np
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from ai_companion.modules.memory.long_term import memory_manager
+from ai_companion.modules.memory.long_term.importance_filter import (
+    FACT_EXAMPLES,
+    ImportanceFilter,
+    heuristic_verdict,
+)
+from ai_companion.modules.memory.long_term.memory_manager import (
+    MemoryBatchAnalysis,
+    MemoryManager,
+)
+from ai_companion.settings import settings
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["I work at Groq", "remember to ask about the wedding", "23", "born 1999", "Lagos", "Tunde"],
+)
+def test_facts_pass_the_heuristics(text):
+    assert heuristic_verdict(text, min_words=3) is True
+
+
+@pytest.mark.parametrize("text", ["", "😂😂", "Ok!!", "how far", "sounds fun", "lol"])
+def test_small_talk_is_skipped(text):
+    assert heuristic_verdict(text, min_words=3) is False
+
+
+@pytest.mark.parametrize(
+    "text", ["nurse", "software engineer", "chemistry teacher", "vegetarian", "lagos"]
+)
+def test_short_answers_to_a_question_pass_the_heuristics(text):
+    assert heuristic_verdict(text, min_words=3) is False
+    assert heuristic_verdict(text, min_words=3, previous="Wetin you dey do for work?") is True
+    assert heuristic_verdict(text, min_words=3, previous="Nice one!") is False
+
+
+def test_small_talk_after_a_question_is_still_skipped():
+    assert heuristic_verdict("lol", min_words=3, previous="You dey ok?") is False
+
+
+def test_undecided_messages_are_left_to_the_llm_or_classifier():
+    assert heuristic_verdict("that sounds like a lot of fun honestly", min_words=3) is None
+
+
+def test_counters_track_kept_and_skipped_messages():
+    importance_filter = ImportanceFilter()
+
+    async def run():
+        return [
+            await importance_filter.should_analyze(text)
+            for text in ("My name is Ada", "lol", "that sounds like a lot of fun honestly")
+        ]
+
+    # Without a classifier, undecided messages go to the LLM
+    assert asyncio.run(run()) == [True, False, True]
+    stats = importance_filter.stats
+    assert (stats.checked, stats.passed, stats.skipped) == (3, 2, 1)
+    assert stats.pass_through_rate == pytest.approx(2 / 3)
+
+
+def test_classifier_decides_undecided_messages():
+    async def embed(text: str) -> np.ndarray:
+        # Fact examples point one way, everything else the other
+        return np.array([1.0, 0.0]) if text in FACT_EXAMPLES else np.array([0.0, 1.0])
+
+    importance_filter = ImportanceFilter(embedder=embed, margin=0.0)
+
+    verdict = asyncio.run(
+        importance_filter.should_analyze("that sounds like a lot of fun honestly")
+    )
+
+    assert verdict is False
+    assert importance_filter.stats.skipped == 1
+
+
+def test_batch_extraction_keeps_answers_to_sabimate_questions(monkeypatch):
+    monkeypatch.setattr(settings, "MEMORY_FILTER_ENABLED", True)
+    monkeypatch.setattr(memory_manager, "get_importance_filter", lambda: ImportanceFilter())
+    analyzed = []
+
+    async def analyze(contents):
+        analyzed.extend(contents)
+        return MemoryBatchAnalysis(memories=[])
+
+    manager = MemoryManager.__new__(MemoryManager)
+    monkeypatch.setattr(manager, "_analyze_memories_batch", analyze)
+    messages = [
+        HumanMessage(content="nurse"),
+        AIMessage(content="Wetin you dey do for work?"),
+        HumanMessage(content="nurse"),
+        AIMessage(content="Respect o"),
+        HumanMessage(content="vegetarian"),
+    ]
+
+    asyncio.run(manager.extract_and_store_memories_batch(messages))
+
+    assert analyzed == ["nurse"]
@@ -0,0 +1,92 @@
+import numpy as np
+
+from ai_companion.modules.memory.long_term.backends import LocalBackend
+
+
+def unit(*values: float) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_search_returns_top_k_by_cosine_similarity():
+    backend = LocalBackend("memories")
+    backend.create_collection(3)
+    backend.upsert(
+        ["a", "b", "c"],
+        np.stack([unit(1, 0, 0), unit(0, 1, 0), unit(1, 1, 0)]),
+        [{"text": "a"}, {"text": "b"}, {"text": "c"}],
+    )
+
+    hits = backend.search(np.array([2.0, 0.1, 0.0]), k=2, with_vectors=True)
+
+    assert [hit.id for hit in hits] == ["a", "c"]
+    assert hits[0].score is not None and hits[0].score > hits[1].score  # type: ignore[operator]
+    assert hits[0].vector is not None and np.allclose(hits[0].vector, unit(1, 0, 0))
+
+
+def test_upsert_replaces_and_delete_removes_points():
+    backend = LocalBackend("memories")
+    backend.create_collection(2)
+    backend.upsert(["a", "b"], np.stack([unit(1, 0), unit(0, 1)]), [{"n": 1}, {"n": 2}])
+    backend.upsert(["a"], unit(0, 1)[np.newaxis], [{"n": 3}])
+    backend.delete(["b"])
+
+    hits = backend.search(unit(0, 1), k=5)
+
+    assert backend.count() == 1
+    assert [(hit.id, hit.payload) for hit in hits] == [("a", {"n": 3})]
+
+
+def test_repeated_id_in_one_batch_keeps_the_last_write(tmp_path):
+    backend = LocalBackend("memories", path=str(tmp_path))
+    backend.create_collection(2)
+    backend.upsert(["b"], unit(1, 1)[np.newaxis], [{"n": 0}])
+    backend.upsert(
+        ["a", "b", "a", "b"],
+        np.stack([unit(1, 0), unit(0, 1), unit(0, 1), unit(1, 0)]),
+        [{"n": 1}, {"n": 2}, {"n": 3}, {"n": 4}],
+    )
+
+    hits = backend.search(unit(0, 1), k=5)
+    assert backend.count() == 2
+    assert [(hit.id, hit.payload) for hit in hits] == [("a", {"n": 3}), ("b", {"n": 4})]
+
+    backend.delete(["a"])
+    reloaded = LocalBackend("memories", path=str(tmp_path))
+    for collection in (backend, reloaded):
+        assert collection.count() == 1
+        assert [(hit.id, hit.payload) for hit in collection.search(unit(1, 0), k=5)] == [
+            ("b", {"n": 4})
+        ]
+
+
+def test_collection_persists_and_appends_across_reloads(tmp_path):
+    backend = LocalBackend("memories", path=str(tmp_path))
+    backend.create_collection(2)
+    backend.upsert(["a", "b"], np.stack([unit(1, 0), unit(0, 1)]), [{"n": 1}, {"n": 2}])
+    backend.delete(["b"])
+
+    reloaded = LocalBackend("memories", path=str(tmp_path))
+    reloaded.upsert(["c"], unit(1, 1)[np.newaxis], [{"n": 3}])
+    reloaded = LocalBackend("memories", path=str(tmp_path))
+
+    assert reloaded.collection_exists()
+    assert reloaded.count() == 2
+    assert [hit.id for hit in reloaded.search(unit(1, 0.2), k=5)] == ["a", "c"]
+
+
+def test_scroll_pages_through_live_points():
+    backend = LocalBackend("memories")
+    backend.create_collection(2)
+    ids = [str(i) for i in range(5)]
+    backend.upsert(ids, np.tile(unit(1, 0), (5, 1)), [{} for _ in ids])
+    backend.delete(["2"])
+
+    seen, offset = [], None
+    while True:
+        records, offset = backend.scroll(limit=2, offset=offset)
+        seen.extend(record.id for record in records)
+        if offset is None:
+            break
+
+    assert seen == ["0", "1", "3", "4"]
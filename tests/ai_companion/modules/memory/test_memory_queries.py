@@ -0,0 +1,59 @@
+import asyncio
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+
+from ai_companion.modules.memory.long_term.backends import LocalBackend
+from ai_companion.modules.memory.long_term.memory_manager import MemoryManager
+from ai_companion.modules.memory.long_term.vector_store import VectorStore
+from ai_companion.settings import settings
+
+VOCABULARY = ["lagos", "nurse", "football"]
+
+
+class KeywordModel:
+    """Embeds a text as counts of a few keywords."""
+
+    def encode(self, texts, **kwargs):
+        batch = [texts] if isinstance(texts, str) else texts
+        vectors = np.array(
+            [[text.lower().count(word) + 0.01 for word in VOCABULARY] for text in batch],
+            dtype=np.float32,
+        )
+        return vectors[0] if isinstance(texts, str) else vectors
+
+
+def test_build_memory_queries_uses_recent_user_turns_only():
+    messages = [
+        HumanMessage(content="I live in Lagos"),
+        AIMessage(content="Lagos is great! " * 100),
+        HumanMessage(content="I work as a nurse " * 100),
+        HumanMessage(content="ok"),
+    ]
+
+    queries = MemoryManager.build_memory_queries(messages, max_turns=2, max_chars=40)
+
+    assert queries[0] == "ok"
+    assert queries[1].startswith("I work as a nurse") and len(queries[1]) <= 40
+    assert len(queries) == 2
+
+
+def test_batch_search_merges_hits_by_best_score(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(VectorStore, "_instance", None)
+    monkeypatch.setattr(VectorStore, "_initialized", False)
+    store = VectorStore()
+    store._model = KeywordModel()
+    store._backend = LocalBackend("memories")
+    store._backend.create_collection(len(VOCABULARY))
+    texts = ["User lives in Lagos", "User is a nurse", "User plays football"]
+    store._backend.upsert(
+        ["a", "b", "c"], store._model.encode(texts), [{"text": text} for text in texts]
+    )
+
+    memories = asyncio.run(
+        store.search_memories_batch_async(["moving to lagos", "my job as a nurse in lagos"], k=2)
+    )
+
+    assert [m.text for m in memories[:2]] == ["User lives in Lagos", "User is a nurse"]
+    assert len({m.text for m in memories}) == len(memories)
@@ -0,0 +1,132 @@
+from concurrent.futures import Future
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from ai_companion.modules.memory.long_term.backends import LocalBackend
+from ai_companion.modules.memory.long_term.qdrant_backend import QdrantBackend
+from ai_companion.modules.memory.long_term.migration import (
+    copy_with_embeddings,
+    export_memories,
+    iter_changed_records,
+    iter_records,
+    read_memories,
+    switch_alias,
+    track_ids,
+)
+
+
+class LengthEncoder:
+    """Encodes texts in the calling process, as [len(text), 1]."""
+
+    workers = 1
+
+    def __init__(self):
+        self.encoded = []
+
+    def submit(self, texts):
+        self.encoded.extend(texts)
+        future = Future()
+        future.set_result(np.array([[len(t), 1.0] for t in texts], dtype=np.float32))
+        return future
+
+
+def make_source() -> LocalBackend:
+    source = LocalBackend("memories")
+    source.create_collection(2)
+    texts = ["Lives in Lagos", "Works as a nurse", "Likes chess"]
+    source.upsert(
+        ["a", "b", "c"],
+        np.eye(3, 2, dtype=np.float32) + 0.1,
+        [{"text": text, "timestamp": "2024-01-01T00:00:00"} for text in texts],
+    )
+    return source
+
+
+@pytest.mark.parametrize("filename", ["memories.jsonl", "memories.parquet"])
+def test_export_import_round_trip_keeps_vectors(tmp_path, filename):
+    path = str(tmp_path / filename)
+    encoder = LengthEncoder()
+
+    assert export_memories(make_source(), path, batch_size=2, with_vectors=True) == 3
+    target = LocalBackend("restored")
+    copied = copy_with_embeddings(read_memories(path, batch_size=2), target, encoder, reembed=False)
+
+    assert copied == 3 and target.count() == 3 and encoder.encoded == []
+    assert {r.payload["text"] for r in target.scroll(10)[0]} == {
+        "Lives in Lagos",
+        "Works as a nurse",
+        "Likes chess",
+    }
+
+
+def test_reembed_encodes_every_record_into_new_collection():
+    encoder = LengthEncoder()
+    target = LocalBackend("memories_v2")
+
+    copy_with_embeddings(iter_records(make_source(), 2, with_vectors=False), target, encoder)
+
+    assert sorted(encoder.encoded) == ["Likes chess", "Lives in Lagos", "Works as a nurse"]
+    assert target.count() == 3
+
+
+def test_switch_alias_moves_live_name_to_new_collection():
+    v1 = QdrantBackend("memories_v1", location=":memory:")
+    v2 = QdrantBackend("memories_v2", location=":memory:")
+    v2.client = v1.client
+    v1.create_collection(2)
+    v2.create_collection(2)
+
+    switch_alias(v1, "memories")
+    switch_alias(v2, "memories")
+
+    assert v2.alias_target("memories") == "memories_v2"
+
+
+def test_switch_alias_refuses_to_replace_a_collection_by_default():
+    live = QdrantBackend("memories", location=":memory:")
+    live.create_collection(2)
+    v2 = QdrantBackend("memories_v2", location=":memory:")
+    v2.client = live.client
+    v2.create_collection(2)
+
+    with pytest.raises(ValueError):
+        switch_alias(v2, "memories")
+
+    switch_alias(v2, "memories", replace_collection=True)
+    assert live.collection_exists() and v2.alias_target("memories") == "memories_v2"
+
+
+def test_catch_up_copies_points_written_during_the_copy():
+    source = make_source()
+    target = LocalBackend("memories_v2")
+    copied_ids: set = set()
+    started = datetime.now().astimezone()
+
+    copy_with_embeddings(
+        track_ids(iter_records(source, 2, with_vectors=False), copied_ids), target, LengthEncoder()
+    )
+    # The live service stores a new memory and updates one during the copy
+    now = datetime.now().isoformat()
+    source.upsert(
+        ["d", "a"],
+        np.ones((2, 2), dtype=np.float32),
+        [
+            {"text": "Plays football", "timestamp": now},
+            {"text": "Lives in Abuja", "timestamp": now},
+        ],
+    )
+    encoder = LengthEncoder()
+    caught_up = copy_with_embeddings(
+        iter_changed_records(source, copied_ids, started, batch_size=2), target, encoder
+    )
+
+    assert caught_up == 2 and sorted(encoder.encoded) == ["Lives in Abuja", "Plays football"]
+    assert target.count() == 4
+    assert {r.payload["text"] for r in target.scroll(10)[0]} == {
+        "Lives in Abuja",
+        "Works as a nurse",
+        "Likes chess",
+        "Plays football",
+    }
@@ -0,0 +1,51 @@
+import numpy as np
+from qdrant_client.models import BinaryQuantization, ScalarQuantization
+
+from ai_companion.modules.memory.long_term.qdrant_backend import QdrantBackend, QdrantSchema
+
+
+def test_default_schema_keeps_plain_vectors_and_default_search():
+    schema = QdrantSchema()
+
+    config = schema.collection_config(384)
+
+    assert config["vectors_config"].size == 384
+    assert "quantization_config" not in config and "hnsw_config" not in config
+    assert schema.search_params() is None
+
+
+def test_schema_builds_quantization_hnsw_and_search_params():
+    schema = QdrantSchema(
+        quantization="scalar", oversampling=3.0, hnsw_m=32, search_hnsw_ef=128, on_disk=True
+    )
+
+    config = schema.collection_config(256)
+    params = schema.search_params()
+
+    assert config["vectors_config"].on_disk is True
+    assert isinstance(config["quantization_config"], ScalarQuantization)
+    assert config["hnsw_config"].m == 32
+    assert params is not None and params.hnsw_ef == 128
+    assert params.quantization is not None and params.quantization.oversampling == 3.0
+    assert isinstance(
+        QdrantSchema(quantization="binary").collection_config(8)["quantization_config"],
+        BinaryQuantization,
+    )
+
+
+def test_quantized_collection_is_searchable():
+    backend = QdrantBackend(
+        "memories", location=":memory:", schema=QdrantSchema(quantization="binary")
+    )
+    backend.create_collection(2)
+    backend.upsert(
+        ["00000000-0000-0000-0000-000000000001", "00000000-0000-0000-0000-000000000002"],
+        np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32),
+        [{"text": "a"}, {"text": "b"}],
+    )
+
+    hits = backend.search(np.array([0.9, 0.1], dtype=np.float32), k=1)
+    batch = backend.search_batch(np.array([[0.1, 0.9]], dtype=np.float32), k=1)
+
+    assert hits[0].payload["text"] == "a"
+    assert batch[0][0].payload["text"] == "b"
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from ai_companion.modules.memory.long_term.reranking import recency_weights, rerank_memories
+from ai_companion.modules.memory.long_term.vector_store import Memory
+
+NOW = datetime(2025, 1, 31)
+
+
+def memory(text: str, score: float, vector, days_old: float = 0.0) -> Memory:
+    timestamp = (NOW - timedelta(days=days_old)).isoformat()
+    return Memory(
+        text=text,
+        metadata={"timestamp": timestamp},
+        score=score,
+        vector=np.array(vector, dtype=np.float32),
+    )
+
+
+def test_mmr_skips_near_duplicates():
+    candidates = [
+        memory("User lives in Lagos", 0.90, [1.0, 0.0, 0.0]),
+        memory("User is based in Lagos", 0.89, [0.99, 0.05, 0.0]),
+        memory("User works as a nurse", 0.80, [0.0, 1.0, 0.0]),
+    ]
+
+    selected = rerank_memories(candidates, k=2, mmr_lambda=0.5, recency_weight=0.0, now=NOW)
+
+    assert [m.text for m in selected] == ["User lives in Lagos", "User works as a nurse"]
+
+
+def test_recency_decay_prefers_current_information():
+    candidates = [
+        memory("User works at a bank", 0.85, [1.0, 0.0], days_old=365),
+        memory("User works at a startup", 0.80, [0.0, 1.0], days_old=1),
+    ]
+
+    selected = rerank_memories(
+        candidates, k=1, mmr_lambda=1.0, half_life_days=30, recency_weight=0.5, now=NOW
+    )
+
+    assert selected[0].text == "User works at a startup"
+    assert selected[0].score is not None and selected[0].score < 0.80
+
+
+def test_without_vectors_ranks_by_relevance():
+    candidates = [
+        Memory(text="a", metadata={}, score=0.2),
+        Memory(text="b", metadata={}, score=0.9),
+    ]
+
+    assert [m.text for m in rerank_memories(candidates, k=5)] == ["b", "a"]
+
+
+def _local(moment: datetime) -> str:
+    return moment.astimezone().replace(tzinfo=None).isoformat()
+
+
+def test_naive_and_offset_timestamps_are_compared_in_utc():
+    now = datetime(2025, 1, 31, 12, tzinfo=timezone.utc)
+    candidates = [
+        Memory(text="imported", metadata={"timestamp": "2025-01-21T12:00:00Z"}, score=1.0),
+        # Stored memories carry the naive local time
+        Memory(text="stored", metadata={"timestamp": _local(now - timedelta(days=10))}, score=1.0),
+    ]
+
+    weights = recency_weights(candidates, half_life_days=10, recency_weight=1.0, now=now)
+
+    assert weights == pytest.approx([0.5, 0.5])
+    # A naive reference time is local time, like the stored timestamps
+    assert recency_weights(
+        candidates, half_life_days=10, recency_weight=1.0, now=datetime.fromisoformat(_local(now))
+    ) == pytest.approx([0.5, 0.5])
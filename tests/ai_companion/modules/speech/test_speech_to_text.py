@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ai_companion.modules.speech import speech_to_text
+from ai_companion.modules.speech.segmentation import split_on_silence, to_wav
+from ai_companion.modules.speech.speech_to_text import SpeechToText
+from ai_companion.settings import settings
+
+RATE = 16000
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype("<i2")
+
+
+def pause(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * RATE), dtype="<i2")
+
+
+def test_long_audio_is_cut_in_the_pauses():
+    samples = np.concatenate([tone(8), pause(1), tone(8), pause(1), tone(8)])
+
+    bounds = split_on_silence(samples, RATE, max_seconds=12, min_seconds=4)
+
+    assert len(bounds) == 3
+    for (_, end), (start, _) in zip(bounds, bounds[1:]):
+        # Cuts land in a pause, never inside a tone
+        assert end == start
+        assert np.abs(samples[end - 160 : end + 160]).max() == 0
+    assert all(end - start <= 12 * RATE for start, end in bounds)
+
+
+def test_speech_without_pauses_is_cut_at_the_maximum_length():
+    bounds = split_on_silence(tone(25), RATE, max_seconds=10, min_seconds=5)
+
+    assert [round((end - start) / RATE) for start, end in bounds] == [10, 10, 5]
+
+
+def test_silent_chunks_are_dropped():
+    samples = np.concatenate([tone(5), pause(30), tone(5)])
+
+    bounds = split_on_silence(samples, RATE, max_seconds=10, min_seconds=4)
+
+    assert all(np.abs(samples[start:end]).max() > 0 for start, end in bounds)
+    assert sum(end - start for start, end in bounds) < 25 * RATE
+
+
+def test_chunks_are_wrapped_as_wav():
+    assert to_wav(tone(1), RATE)[:4] == b"RIFF"
+
+
+def test_chunks_are_transcribed_concurrently_and_joined_in_order(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(settings, "STT_CHUNK_CONCURRENCY", 2)
+    stt = SpeechToText()
+    chunks = [f"chunk {i}".encode() for i in range(5)]
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    async def split(audio_data: bytes):
+        return chunks
+
+    def transcribe(audio_data: bytes, filename: str = "audio.wav"):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        # Later chunks finish first, the text still comes back in order
+        time.sleep(0.05 - 0.01 * chunks.index(audio_data))
+        with lock:
+            running[0] -= 1
+        return SimpleNamespace(text=f" {audio_data.decode()} ")
+
+    monkeypatch.setattr(stt, "_split_long_audio", split)
+    monkeypatch.setattr(stt, "_transcribe_sync", transcribe)
+
+    text = asyncio.run(stt.transcribe(b"voice note"))
+
+    assert text == "chunk 0 chunk 1 chunk 2 chunk 3 chunk 4"
+    assert peak[0] == 2
+
+
+def test_short_audio_is_sent_in_one_request(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(settings, "STT_LONG_AUDIO_THRESHOLD_SECONDS", None)
+    stt = SpeechToText()
+    requests = []
+
+    def transcribe(audio_data: bytes, filename: str = "audio.wav"):
+        requests.append(audio_data)
+        return SimpleNamespace(text="How far")
+
+    monkeypatch.setattr(stt, "_transcribe_sync", transcribe)
+
+    assert asyncio.run(stt.transcribe(b"voice note")) == "How far"
+    assert requests == [b"voice note"]
+
+
+def test_short_notes_are_not_decoded(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(settings, "STT_LONG_AUDIO_THRESHOLD_SECONDS", 60)
+    monkeypatch.setattr(speech_to_text, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(speech_to_text, "probe_duration", lambda audio: 12.5)
+
+    def decode_to_pcm(audio, sample_rate):
+        raise AssertionError("A note under the threshold should not be decoded")
+
+    monkeypatch.setattr(speech_to_text, "decode_to_pcm", decode_to_pcm)
+
+    assert asyncio.run(SpeechToText()._split_long_audio(b"voice note")) is None
+
+
+def test_notes_without_a_stated_duration_are_decoded(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(settings, "STT_LONG_AUDIO_THRESHOLD_SECONDS", 10)
+    monkeypatch.setattr(settings, "STT_CHUNK_MAX_SECONDS", 12)
+    monkeypatch.setattr(settings, "STT_CHUNK_MIN_SECONDS", 4)
+    monkeypatch.setattr(speech_to_text, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(speech_to_text, "probe_duration", lambda audio: None)
+    samples = np.concatenate([tone(8), pause(1), tone(8)])
+    monkeypatch.setattr(speech_to_text, "decode_to_pcm", lambda audio, sample_rate: samples)
+
+    chunks = asyncio.run(SpeechToText()._split_long_audio(b"voice note"))
+
+    assert chunks is not None and len(chunks) == 2
+
+
+def test_split_rejects_inconsistent_lengths():
+    with pytest.raises(ValueError):
+        split_on_silence(tone(1), RATE, max_seconds=5, min_seconds=5)
@@ -0,0 +1,60 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from ai_companion.modules.speech.transcoding import (
+    audio_mime_type,
+    ffmpeg_available,
+    input_args,
+    needs_transcode,
+    probe_duration,
+    transcode,
+)
+
+
+def test_raw_provider_formats_get_explicit_input_arguments():
+    assert input_args("pcm_16000") == ["-f", "s16le", "-ar", "16000", "-ac", "1"]
+    assert input_args("ulaw_8000") == ["-f", "mulaw", "-ar", "8000", "-ac", "1"]
+    assert input_args("mp3_44100_128") == []
+
+
+def test_transcode_is_skipped_when_the_provider_already_returns_the_target():
+    assert not needs_transcode("opus_48000_32", "ogg_opus")
+    assert not needs_transcode("mp3_22050_32", "mp3")
+    assert not needs_transcode("mp3_44100_128", None)
+    assert needs_transcode("mp3_44100_128", "ogg_opus")
+    assert needs_transcode("pcm_16000", "ogg_opus")
+
+
+def test_mime_type_follows_the_delivered_format():
+    assert audio_mime_type("mp3_44100_128") == "audio/mpeg"
+    assert audio_mime_type("opus_48000_32") == "audio/ogg"
+    assert audio_mime_type("pcm_16000") == "audio/L16;rate=16000"
+    assert audio_mime_type("mp3_44100_128", "ogg_opus") == "audio/ogg"
+
+
+def test_duration_is_unknown_without_ffprobe(monkeypatch):
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+
+    assert probe_duration(b"voice note") is None
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg is not installed")
+def test_duration_is_probed_without_decoding():
+    pcm = np.zeros(16000 * 3, dtype="<i2").tobytes()
+    voice_note = transcode([pcm], "mp3", provider_format="pcm_16000")
+
+    assert probe_duration(voice_note) == pytest.approx(3.0, abs=0.2)
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg is not installed")
+def test_pcm_chunks_are_transcoded_to_an_ogg_opus_voice_note():
+    seconds = np.arange(16000 * 2) / 16000
+    pcm = (np.sin(2 * np.pi * 440 * seconds) * 8000).astype("<i2").tobytes()
+    chunks = [pcm[i : i + 4096] for i in range(0, len(pcm), 4096)]
+
+    voice_note = transcode(chunks, "ogg_opus", provider_format="pcm_16000", bitrate="24k")
+
+    assert voice_note.startswith(b"OggS")
+    assert len(voice_note) < len(pcm) / 4
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+# Provider SDKs and ML libraries that must only load when a feature first needs them
+HEAVY_MODULES = [
+    "elevenlabs",
+    "groq",
+    "langchain_groq",
+    "qdrant_client",
+    "sentence_transformers",
+    "together",
+    "torch",
+]
+
+
+def imported_heavy_modules(statement: str) -> list[str]:
+    # A fresh interpreter, the test process has most of these imported already
+    code = f"import sys\n{statement}\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def test_importing_the_graph_defers_heavy_dependencies():
+    assert imported_heavy_modules("import ai_companion.graph.graph") == []
+
+
+def test_speech_package_loads_modules_on_attribute_access():
+    assert imported_heavy_modules("import ai_companion.modules.speech") == []
+    assert "elevenlabs" in imported_heavy_modules(
+        "from ai_companion.modules.speech import TextToSpeech"
+    )
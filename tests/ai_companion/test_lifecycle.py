@@ -0,0 +1,47 @@
+import asyncio
+
+from ai_companion import lifecycle
+
+
+def test_warm_up_times_steps_and_reports_readiness():
+    calls = []
+
+    async def load():
+        calls.append("load")
+
+    async def providers():
+        raise ValueError("Missing required environment variables: GROQ_API_KEY")
+
+    report = asyncio.run(
+        lifecycle.warm_up([("embedding_model", load), ("provider_clients", providers)])
+    )
+
+    assert calls == ["load"]
+    assert set(report.timings) == {"embedding_model", "provider_clients"}
+    assert "GROQ_API_KEY" in report.errors["provider_clients"]
+    # Provider clients are optional, so the process is still ready
+    assert report.ready and lifecycle.is_ready()
+    assert lifecycle.get_warmup_report() is report
+
+
+def test_failed_required_step_is_not_ready():
+    async def broken():
+        raise RuntimeError("qdrant unreachable")
+
+    report = asyncio.run(lifecycle.warm_up([("vector_backend", broken)]))
+
+    assert not report.ready
+    assert "not ready" in report.summary()
+
+
+def test_waiters_learn_of_a_failed_warm_up():
+    async def slow_broken():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("qdrant unreachable")
+
+    async def scenario():
+        waiter = asyncio.ensure_future(lifecycle.wait_until_ready())
+        await lifecycle.warm_up([("vector_backend", slow_broken)])
+        return await asyncio.wait_for(waiter, timeout=2)
+
+    assert asyncio.run(scenario()) is False